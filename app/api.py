@@ -0,0 +1,191 @@
+import os
+import hmac
+import datetime
+import logging
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from app.utils.ingesta import (
+    MAX_CLAVE,
+    IngestaSaturada,
+    Marca,
+    ingest_buffer,
+)
+from app.utils import db, empleados_cambios
+from app.utils.latidos import liveness_tracker
+
+MAX_MARCAS_POR_LOTE = int(os.getenv("NOVALINK_INGESTA_MAX_LOTE", "5000"))
+INGESTA_TOKEN = os.getenv("NOVALINK_INGESTA_TOKEN", "")
+# Only for local device simulators: accept requests without a token.
+INGESTA_SIN_TOKEN = os.getenv("NOVALINK_INGESTA_SIN_TOKEN", "0") == "1"
+
+
+def _error(
+    status: int, mensaje: str, headers: dict | None = None, **extra
+) -> JSONResponse:
+    return JSONResponse({"error": mensaje, **extra}, status_code=status, headers=headers)
+
+
+def _rechazo(request: Request, sin_token: bool = True) -> JSONResponse | None:
+    """The error response for a request without the device token, None if allowed.
+
+    Fails closed: without NOVALINK_INGESTA_TOKEN every request is refused,
+    unless NOVALINK_INGESTA_SIN_TOKEN=1 explicitly opens the routes that
+    pass `sin_token`.
+    """
+    if not INGESTA_TOKEN:
+        if INGESTA_SIN_TOKEN and sin_token:
+            return None
+        return _error(503, "API de dispositivos deshabilitada: falta NOVALINK_INGESTA_TOKEN")
+    header = request.headers.get("authorization", "")
+    if not hmac.compare_digest(header, f"Bearer {INGESTA_TOKEN}"):
+        return _error(401, "No autorizado")
+    return None
+
+
+def _parse_fechahora(value) -> datetime.datetime:
+    fechahora = datetime.datetime.fromisoformat(str(value))
+    if fechahora.tzinfo is not None:
+        fechahora = fechahora.astimezone().replace(tzinfo=None)
+    return fechahora
+
+
+def _parse_marca(dispositivo_id: int, item) -> Marca:
+    if not isinstance(item, dict):
+        raise ValueError("cada marca debe ser un objeto")
+    clave = item.get("clave")
+    if clave is not None:
+        clave = str(clave)
+        if not clave or len(clave) > MAX_CLAVE:
+            raise ValueError(f"clave vacía o de más de {MAX_CLAVE} caracteres")
+    empleado = item.get("empleado")
+    return Marca(
+        dispositivo_id=dispositivo_id,
+        empleado_id=int(empleado) if empleado is not None else None,
+        fechahora=_parse_fechahora(item["fechahora"]),
+        mensaje=str(item.get("mensaje") or ""),
+        clave=clave,
+    )
+
+
+async def ingest_transacciones(request: Request) -> JSONResponse:
+    """POST /api/transacciones: a batch of marks from one device.
+
+    Body: {"dispositivo": <dispositivos.codigo>, "marcas": [{"clave": "...",
+    "fechahora": "ISO 8601", "empleado": <id>, "mensaje": "..."}]}. Marks
+    whose (dispositivo, clave, fechahora) already exist are counted as
+    duplicates, so a device can resend a batch until it gets a 200.
+    """
+    if (rechazo := _rechazo(request)) is not None:
+        return rechazo
+    try:
+        body = await request.json()
+        dispositivo_id = int(body["dispositivo"])
+        items = body["marcas"]
+        if not isinstance(items, list):
+            raise TypeError("marcas")
+    except Exception:
+        return _error(400, "Se esperaba {'dispositivo': int, 'marcas': [...]}")
+    if len(items) > MAX_MARCAS_POR_LOTE:
+        return _error(413, f"Máximo {MAX_MARCAS_POR_LOTE} marcas por lote")
+    marcas = []
+    for index, item in enumerate(items):
+        try:
+            marcas.append(_parse_marca(dispositivo_id, item))
+        except (KeyError, TypeError, ValueError) as e:
+            return _error(422, f"Marca inválida: {e}", indice=index)
+    if not await ingest_buffer.known_device(dispositivo_id):
+        return _error(404, f"Dispositivo desconocido: {dispositivo_id}")
+    liveness_tracker.beat(dispositivo_id)
+    try:
+        result = await ingest_buffer.submit(marcas)
+    except IngestaSaturada:
+        return _error(429, "Ingesta saturada, reintente", headers={"Retry-After": "1"})
+    except Exception as e:
+        logging.warning(f"Ingestion batch from device {dispositivo_id} failed: {e}")
+        return _error(503, "No se pudo guardar el lote, reintente", headers={"Retry-After": "5"})
+    return JSONResponse(result)
+
+
+async def latidos(request: Request) -> JSONResponse:
+    """POST /api/latidos: heartbeats of one or more devices.
+
+    Body: {"dispositivo": <codigo>} or, from a gateway, {"dispositivos":
+    [<codigo>, ...]}. Only recorded in memory; unknown codes are returned
+    and ignored.
+    """
+    if (rechazo := _rechazo(request)) is not None:
+        return rechazo
+    try:
+        body = await request.json()
+        if "dispositivos" in body:
+            codigos = [int(codigo) for codigo in body["dispositivos"]]
+        else:
+            codigos = [int(body["dispositivo"])]
+    except Exception:
+        return _error(400, "Se esperaba {'dispositivo': int} o {'dispositivos': [int]}")
+    if len(codigos) > MAX_MARCAS_POR_LOTE:
+        return _error(413, f"Máximo {MAX_MARCAS_POR_LOTE} dispositivos por latido")
+    desconocidos = []
+    for codigo in codigos:
+        if await ingest_buffer.known_device(codigo):
+            liveness_tracker.beat(codigo)
+        else:
+            desconocidos.append(codigo)
+    return JSONResponse(
+        {"recibidos": len(codigos) - len(desconocidos), "desconocidos": desconocidos}
+    )
+
+
+async def cambios_empleados(request: Request) -> JSONResponse:
+    """GET /api/empleados/cambios?desde=N: roster changes after version N.
+
+    The device stores the returned `version` and sends it on the next call;
+    `desde=0` (or a missing parameter) asks for the full roster. See
+    empleados_cambios.changes_since for the delta and snapshot formats.
+    Returns personal data, so it always requires the device token.
+    """
+    if (rechazo := _rechazo(request, sin_token=False)) is not None:
+        return rechazo
+    try:
+        desde = int(request.query_params.get("desde", "0"))
+    except ValueError:
+        return _error(400, "'desde' debe ser un número de versión")
+    try:
+        result = await empleados_cambios.changes_since(desde)
+    except Exception as e:
+        logging.warning(f"Roster delta since {desde} failed: {e}")
+        return _error(503, "No se pudo leer el padrón, reintente", headers={"Retry-After": "5"})
+    return JSONResponse(result)
+
+
+async def ingesta_estado(request: Request) -> JSONResponse:
+    """GET /api/ingesta/estado: buffer occupancy, counters and connection budget of this worker."""
+    if (rechazo := _rechazo(request)) is not None:
+        return rechazo
+    metrics = ingest_buffer.metrics
+    return JSONResponse(
+        {
+            "pendientes": ingest_buffer.pending,
+            "max_pendientes": ingest_buffer.max_pending,
+            **vars(metrics),
+            "conexiones": db.engine_stats(),
+        }
+    )
+
+
+if not INGESTA_TOKEN:
+    logging.warning(
+        "NOVALINK_INGESTA_TOKEN is not set: the device API "
+        + ("accepts unauthenticated requests" if INGESTA_SIN_TOKEN else "refuses all requests")
+    )
+
+api = Starlette(
+    routes=[
+        Route("/api/transacciones", ingest_transacciones, methods=["POST"]),
+        Route("/api/latidos", latidos, methods=["POST"]),
+        Route("/api/empleados/cambios", cambios_empleados, methods=["GET"]),
+        Route("/api/ingesta/estado", ingesta_estado, methods=["GET"]),
+    ]
+)
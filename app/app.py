@@ -15,9 +15,16 @@ from app.pages.entidades import entidades_page
 from app.pages.empleados import empleados_page
 from app.pages.conectividad import conectividad_page
 from app.pages.transacciones import transacciones_page
+from app.pages.asistencia_diaria import asistencia_diaria_page
+from app.pages.horarios import horarios_page
 from app.pages.login import login_page
 from app.states.login_state import LoginState
 from app.utils.assets import ensure_assets
+from app.utils.migrations import migrate_on_startup
+from app.utils.scheduler import scheduler_lifespan
+from app.utils.ingesta import ingesta_lifespan
+from app.utils.asistencia_cierre import cierre_lifespan
+from app.api import api
 
 
 def dashboard() -> rx.Component:
@@ -38,6 +45,8 @@ def dashboard() -> rx.Component:
             ("Empleados", empleados_page()),
             ("Conectividad", conectividad_page()),
             ("Transacciones", transacciones_page()),
+            ("Asistencia Diaria", asistencia_diaria_page()),
+            ("Horarios", horarios_page()),
             rx.el.div(
                 rx.el.h2(
                     "Bienvenido al Panel de Administración",
@@ -85,7 +94,12 @@ app = rx.App(
             }
             """)
     ],
+    api_transformer=api,
 )
+app.register_lifespan_task(migrate_on_startup)
+app.register_lifespan_task(scheduler_lifespan)
+app.register_lifespan_task(cierre_lifespan)
+app.register_lifespan_task(ingesta_lifespan)
 app.add_page(index, route="/")
 app.add_page(dashboard, route="/dashboard", on_load=BaseState.check_login)
 app.add_page(login_page, route="/login", on_load=LoginState.on_load)
\ No newline at end of file
@@ -0,0 +1,292 @@
+import reflex as rx
+from app.states.asistencias_state import AsistenciasState
+
+TH_CLASS = "px-4 py-3 bg-gray-50 text-left text-xs font-medium text-gray-500 uppercase tracking-wider"
+TH_RIGHT_CLASS = "px-4 py-3 bg-gray-50 text-right text-xs font-medium text-gray-500 uppercase tracking-wider"
+TD_RIGHT_CLASS = "px-4 py-3 whitespace-nowrap text-sm text-gray-900 text-right"
+
+
+def resumen_row(fila: dict) -> rx.Component:
+    return rx.el.tr(
+        rx.el.td(
+            rx.el.p(fila["nombre"], class_name="text-sm font-medium text-gray-900"),
+            rx.el.p(fila["cedula"], class_name="text-xs text-gray-500"),
+            class_name="px-4 py-3 whitespace-nowrap",
+        ),
+        rx.el.td(fila["dias_asistidos"], class_name=TD_RIGHT_CLASS),
+        rx.el.td(
+            fila["faltas"],
+            class_name=rx.cond(
+                fila["faltas"] > 0,
+                "px-4 py-3 whitespace-nowrap text-sm text-red-600 font-medium text-right",
+                TD_RIGHT_CLASS,
+            ),
+        ),
+        rx.el.td(fila["atrasos"], class_name=TD_RIGHT_CLASS),
+        rx.el.td(fila["trabajado"], class_name=TD_RIGHT_CLASS),
+        rx.el.td(fila["atraso"], class_name=TD_RIGHT_CLASS),
+        rx.el.td(fila["salida_anticipada"], class_name=TD_RIGHT_CLASS),
+        rx.el.td(fila["sobretiempo"], class_name=TD_RIGHT_CLASS),
+        rx.el.td(fila["nocturnos"], class_name=TD_RIGHT_CLASS),
+        rx.el.td(fila["dia_libre"], class_name=TD_RIGHT_CLASS),
+        on_click=lambda: AsistenciasState.ver_detalle(fila["id"], fila["nombre"]),
+        class_name="hover:bg-gray-50 transition-colors cursor-pointer",
+    )
+
+
+def detalle_row(dia: dict) -> rx.Component:
+    return rx.el.tr(
+        rx.el.td(
+            dia["fecha"],
+            class_name=rx.cond(
+                dia["laborable"],
+                "px-4 py-2 whitespace-nowrap text-sm text-gray-900",
+                "px-4 py-2 whitespace-nowrap text-sm text-gray-400",
+            ),
+        ),
+        rx.el.td(dia["entrada"], class_name="px-4 py-2 text-sm text-gray-500"),
+        rx.el.td(dia["salida"], class_name="px-4 py-2 text-sm text-gray-500"),
+        rx.el.td(dia["trabajado"], class_name="px-4 py-2 text-sm text-gray-900 text-right"),
+        rx.el.td(dia["atraso"], class_name="px-4 py-2 text-sm text-gray-900 text-right"),
+        rx.el.td(
+            dia["salida_anticipada"], class_name="px-4 py-2 text-sm text-gray-900 text-right"
+        ),
+        rx.el.td(dia["sobretiempo"], class_name="px-4 py-2 text-sm text-gray-900 text-right"),
+        rx.el.td(dia["nocturnos"], class_name="px-4 py-2 text-sm text-gray-900 text-right"),
+        rx.el.td(
+            rx.cond(
+                dia["falta"],
+                rx.el.span(
+                    "Falta",
+                    class_name="px-2 py-0.5 text-xs font-medium rounded-full bg-red-100 text-red-700",
+                ),
+                rx.cond(
+                    dia["justificada"],
+                    rx.el.span(
+                        "Justificada",
+                        class_name="px-2 py-0.5 text-xs font-medium rounded-full bg-amber-100 text-amber-700",
+                    ),
+                    None,
+                ),
+            ),
+            class_name="px-4 py-2 text-sm",
+        ),
+        class_name="hover:bg-gray-50 transition-colors",
+    )
+
+
+def detalle_dialog() -> rx.Component:
+    return rx.dialog.root(
+        rx.dialog.content(
+            rx.dialog.title(
+                AsistenciasState.detalle_nombre,
+                class_name="text-lg font-bold text-gray-900 mb-4",
+            ),
+            rx.el.div(
+                rx.el.table(
+                    rx.el.thead(
+                        rx.el.tr(
+                            rx.el.th("Día", class_name=TH_CLASS),
+                            rx.el.th("Entrada", class_name=TH_CLASS),
+                            rx.el.th("Salida", class_name=TH_CLASS),
+                            rx.el.th("Trabajado", class_name=TH_RIGHT_CLASS),
+                            rx.el.th("Atraso", class_name=TH_RIGHT_CLASS),
+                            rx.el.th("Sal. Anticipada", class_name=TH_RIGHT_CLASS),
+                            rx.el.th("Sobretiempo", class_name=TH_RIGHT_CLASS),
+                            rx.el.th("Nocturno", class_name=TH_RIGHT_CLASS),
+                            rx.el.th("", class_name=TH_CLASS),
+                        )
+                    ),
+                    rx.el.tbody(
+                        rx.foreach(AsistenciasState.detalle, detalle_row),
+                        class_name="bg-white divide-y divide-gray-200",
+                    ),
+                    class_name="min-w-full divide-y divide-gray-200",
+                ),
+                class_name="border border-gray-200 rounded-lg max-h-[60vh] overflow-y-auto",
+            ),
+            rx.el.div(
+                rx.el.button(
+                    "Cerrar",
+                    on_click=AsistenciasState.cerrar_detalle,
+                    class_name="px-4 py-2 text-sm font-medium text-gray-700 hover:bg-gray-100 rounded-lg transition-colors",
+                ),
+                class_name="flex justify-end mt-6",
+            ),
+            class_name="bg-white rounded-xl p-6 w-full max-w-4xl shadow-xl",
+        ),
+        open=AsistenciasState.show_detalle,
+        on_open_change=lambda v: AsistenciasState.cerrar_detalle(),
+    )
+
+
+def asistencia_diaria_page() -> rx.Component:
+    input_class = "px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500/20 focus:border-blue-500 outline-none transition-all bg-white text-sm"
+    return rx.el.div(
+        detalle_dialog(),
+        rx.el.div(
+            rx.el.div(
+                rx.el.h2("Asistencia Diaria", class_name="text-2xl text-foreground"),
+                rx.el.div(
+                    rx.el.select(
+                        rx.el.option("Bloques por rango de empleados", value="rango"),
+                        rx.el.option("Bloques por nivel administrativo 1", value="nivel"),
+                        value=AsistenciasState.cierre_por,
+                        on_change=AsistenciasState.set_cierre_por,
+                        disabled=AsistenciasState.is_calculating,
+                        class_name=input_class,
+                    ),
+                    rx.el.button(
+                        rx.icon(
+                            rx.cond(AsistenciasState.is_calculating, "loader-circle", "calculator"),
+                            class_name=rx.cond(
+                                AsistenciasState.is_calculating,
+                                "h-4 w-4 mr-2 animate-spin",
+                                "h-4 w-4 mr-2",
+                            ),
+                        ),
+                        rx.cond(AsistenciasState.is_calculating, "Calculando...", "Calcular"),
+                        on_click=AsistenciasState.calcular,
+                        disabled=AsistenciasState.is_calculating,
+                        class_name="flex items-center px-4 py-2 text-sm font-medium bg-blue-600 text-white rounded-lg hover:bg-blue-700 transition-colors shadow-sm disabled:opacity-50",
+                    ),
+                    class_name="flex items-center gap-3",
+                ),
+                class_name="flex justify-between items-center mb-6",
+            ),
+            rx.cond(
+                AsistenciasState.is_calculating,
+                rx.el.div(
+                    rx.el.div(
+                        rx.el.span(
+                            rx.cond(
+                                AsistenciasState.progreso_etapa == "guardando",
+                                "Guardando resultados...",
+                                "Calculando bloques de empleados...",
+                            ),
+                        ),
+                        rx.el.span(
+                            AsistenciasState.progreso_completados,
+                            " / ",
+                            AsistenciasState.progreso_bloques,
+                        ),
+                        class_name="flex justify-between text-xs text-gray-600 mb-1",
+                    ),
+                    rx.el.div(
+                        rx.el.div(
+                            class_name="h-2 bg-blue-600 rounded-full transition-all",
+                            style={
+                                "width": AsistenciasState.progreso_porcentaje.to_string()
+                                + "%"
+                            },
+                        ),
+                        class_name="w-full h-2 bg-gray-200 rounded-full overflow-hidden",
+                    ),
+                    class_name="mb-6",
+                ),
+                None,
+            ),
+            rx.el.div(
+                rx.el.div(
+                    rx.el.input(
+                        type="date",
+                        value=AsistenciasState.fecha_desde,
+                        on_change=AsistenciasState.set_fecha_desde,
+                        class_name=input_class,
+                    ),
+                    rx.el.span("a", class_name="text-sm text-gray-500"),
+                    rx.el.input(
+                        type="date",
+                        value=AsistenciasState.fecha_hasta,
+                        on_change=AsistenciasState.set_fecha_hasta,
+                        class_name=input_class,
+                    ),
+                    rx.el.button(
+                        "Consultar",
+                        on_click=AsistenciasState.consultar,
+                        class_name="px-4 py-2 text-sm font-medium text-gray-700 bg-white border border-gray-300 rounded-lg hover:bg-gray-50 transition-colors shadow-sm",
+                    ),
+                    class_name="flex items-center gap-3",
+                ),
+                rx.el.div(
+                    rx.icon(
+                        "search",
+                        class_name="w-4 h-4 absolute left-3 top-1/2 -translate-y-1/2 text-gray-400",
+                    ),
+                    rx.debounce_input(
+                        rx.el.input(
+                            placeholder="Buscar por apellido, nombre o cédula...",
+                            on_change=AsistenciasState.set_search_query,
+                            class_name="w-full pl-9 pr-4 py-2 rounded-lg border border-gray-200 bg-white focus:ring-2 focus:ring-blue-500/20 focus:border-blue-500 outline-none transition-all text-sm",
+                        ),
+                        debounce_timeout=300,
+                    ),
+                    class_name="relative w-full max-w-xs",
+                ),
+                class_name="flex justify-between items-center gap-4 mb-6 bg-gray-50 p-4 rounded-lg border border-gray-200",
+            ),
+            rx.el.div(
+                rx.el.table(
+                    rx.el.thead(
+                        rx.el.tr(
+                            rx.el.th("Empleado", class_name=TH_CLASS),
+                            rx.el.th("Días", class_name=TH_RIGHT_CLASS),
+                            rx.el.th("Faltas", class_name=TH_RIGHT_CLASS),
+                            rx.el.th("Atrasos", class_name=TH_RIGHT_CLASS),
+                            rx.el.th("Trabajado", class_name=TH_RIGHT_CLASS),
+                            rx.el.th("Atraso", class_name=TH_RIGHT_CLASS),
+                            rx.el.th("Sal. Anticipada", class_name=TH_RIGHT_CLASS),
+                            rx.el.th("Sobretiempo", class_name=TH_RIGHT_CLASS),
+                            rx.el.th("Nocturno", class_name=TH_RIGHT_CLASS),
+                            rx.el.th("Día Libre", class_name=TH_RIGHT_CLASS),
+                        )
+                    ),
+                    rx.el.tbody(
+                        rx.cond(
+                            AsistenciasState.resumen.length() > 0,
+                            rx.foreach(AsistenciasState.resumen, resumen_row),
+                            rx.el.tr(
+                                rx.el.td(
+                                    "No hay resultados calculados para el período. Use Calcular para generarlos.",
+                                    col_span=10,
+                                    class_name="px-6 py-8 text-center text-gray-500",
+                                )
+                            ),
+                        ),
+                        class_name="bg-white divide-y divide-gray-200",
+                    ),
+                    class_name="min-w-full divide-y divide-gray-200",
+                ),
+                class_name="shadow overflow-x-auto border-b border-gray-200 sm:rounded-lg mb-4",
+            ),
+            rx.cond(
+                AsistenciasState.has_prev | AsistenciasState.has_next,
+                rx.el.div(
+                    rx.el.p(
+                        "Página ",
+                        rx.el.span(AsistenciasState.current_page, class_name="font-medium"),
+                        class_name="text-sm text-gray-700",
+                    ),
+                    rx.el.div(
+                        rx.el.button(
+                            "Anterior",
+                            on_click=AsistenciasState.prev_page,
+                            disabled=~AsistenciasState.has_prev,
+                            class_name="relative inline-flex items-center px-4 py-2 border border-gray-300 text-sm font-medium rounded-md text-gray-700 bg-white hover:bg-gray-50 disabled:opacity-50 disabled:cursor-not-allowed",
+                        ),
+                        rx.el.button(
+                            "Siguiente",
+                            on_click=AsistenciasState.next_page,
+                            disabled=~AsistenciasState.has_next,
+                            class_name="ml-3 relative inline-flex items-center px-4 py-2 border border-gray-300 text-sm font-medium rounded-md text-gray-700 bg-white hover:bg-gray-50 disabled:opacity-50 disabled:cursor-not-allowed",
+                        ),
+                        class_name="flex",
+                    ),
+                    class_name="flex items-center justify-between bg-white px-4 py-3 border-t border-gray-200 sm:px-6",
+                ),
+                None,
+            ),
+            class_name="animate-fade-in-up",
+        ),
+        class_name="w-full",
+    )
@@ -165,10 +165,13 @@ def catalogo_nivel1_page() -> rx.Component:
                         "search",
                         class_name="w-4 h-4 absolute left-3 top-1/2 -translate-y-1/2 text-gray-400",
                     ),
-                    rx.el.input(
-                        placeholder="Buscar...",
-                        on_change=CatalogoNivel1State.set_search_query,
-                        class_name="w-full pl-9 pr-4 py-2 rounded-lg border border-gray-200 bg-white focus:ring-2 focus:ring-blue-500/20 focus:border-blue-500 outline-none transition-all text-sm mb-4",
+                    rx.debounce_input(
+                        rx.el.input(
+                            placeholder="Buscar...",
+                            on_change=CatalogoNivel1State.set_search_query,
+                            class_name="w-full pl-9 pr-4 py-2 rounded-lg border border-gray-200 bg-white focus:ring-2 focus:ring-blue-500/20 focus:border-blue-500 outline-none transition-all text-sm mb-4",
+                        ),
+                        debounce_timeout=300,
                     ),
                     class_name="relative",
                 ),
@@ -1,5 +1,6 @@
 import reflex as rx
 from app.states.conectividad_state import ConectividadState
+from app.utils.sondeo import PUERTO_DEFECTO
 
 
 def status_badge(active: bool, text_true: str, text_false: str) -> rx.Component:
@@ -13,6 +14,28 @@ def status_badge(active: bool, text_true: str, text_false: str) -> rx.Component:
     )
 
 
+def sondeo_cell(dispositivo: dict) -> rx.Component:
+    return rx.match(
+        dispositivo["sondeo"],
+        ("", rx.el.span("—", class_name="text-sm text-gray-400")),
+        (
+            "pendiente",
+            rx.el.span("Sondeando…", class_name="text-sm text-gray-400 animate-pulse"),
+        ),
+        (
+            "ok",
+            rx.el.span(
+                dispositivo["latencia"],
+                class_name="inline-flex items-center px-2.5 py-0.5 rounded-full text-xs font-medium bg-green-100 text-green-800",
+            ),
+        ),
+        rx.el.span(
+            dispositivo["sondeo"],
+            class_name="inline-flex items-center px-2.5 py-0.5 rounded-full text-xs font-medium bg-red-100 text-red-800",
+        ),
+    )
+
+
 def dispositivo_row(dispositivo: dict) -> rx.Component:
     return rx.el.tr(
         rx.el.td(
@@ -31,6 +54,22 @@ def dispositivo_row(dispositivo: dict) -> rx.Component:
             status_badge(dispositivo["en_linea"], "Conectado", "Desconectado"),
             class_name="px-6 py-4 whitespace-nowrap",
         ),
+        rx.el.td(
+            sondeo_cell(dispositivo),
+            class_name="px-6 py-4 whitespace-nowrap",
+        ),
+        rx.el.td(
+            dispositivo["ultimo_latido"],
+            class_name="px-6 py-4 whitespace-nowrap text-sm text-gray-500",
+        ),
+        rx.el.td(
+            dispositivo["marcas_hoy"],
+            class_name="px-6 py-4 whitespace-nowrap text-sm text-gray-900 text-right",
+        ),
+        rx.el.td(
+            dispositivo["marcas_hora"],
+            class_name="px-6 py-4 whitespace-nowrap text-sm text-gray-500 text-right",
+        ),
         rx.el.td(
             rx.el.button(
                 rx.icon("pencil", class_name="h-4 w-4"),
@@ -85,6 +124,39 @@ def dispositivo_dialog() -> rx.Component:
                     ),
                     class_name="mb-4",
                 ),
+                rx.el.div(
+                    rx.el.div(
+                        rx.el.label(
+                            "Host",
+                            class_name="block text-xs font-medium text-gray-500 uppercase tracking-wider mb-1",
+                        ),
+                        rx.el.input(
+                            placeholder="192.168.1.201",
+                            on_change=lambda v: ConectividadState.update_current_field(
+                                "host", v
+                            ),
+                            class_name="w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500/20 focus:border-blue-500 outline-none transition-all bg-white",
+                            default_value=ConectividadState.current_dispositivo["host"],
+                        ),
+                        class_name="flex-1",
+                    ),
+                    rx.el.div(
+                        rx.el.label(
+                            "Puerto",
+                            class_name="block text-xs font-medium text-gray-500 uppercase tracking-wider mb-1",
+                        ),
+                        rx.el.input(
+                            placeholder=str(PUERTO_DEFECTO),
+                            on_change=lambda v: ConectividadState.update_current_field(
+                                "puerto", v
+                            ),
+                            class_name="w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500/20 focus:border-blue-500 outline-none transition-all bg-white",
+                            default_value=ConectividadState.current_dispositivo["puerto"],
+                        ),
+                        class_name="w-28",
+                    ),
+                    class_name="flex gap-3 mb-4",
+                ),
                 rx.el.div(
                     rx.el.label(
                         rx.el.input(
@@ -151,10 +223,50 @@ def conectividad_page() -> rx.Component:
                 rx.el.input(
                     placeholder="Buscar por código o descripción...",
                     on_change=ConectividadState.set_search_query,
-                    class_name="w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500/20 focus:border-blue-500 outline-none transition-all bg-white text-sm",
                     default_value=ConectividadState.search_query,
+                    class_name="w-full max-w-lg px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500/20 focus:border-blue-500 outline-none transition-all bg-white text-sm",
+                ),
+                rx.el.div(
+                    rx.cond(
+                        ConectividadState.sondeo_total > 0,
+                        rx.el.span(
+                            ConectividadState.sondeo_alcanzables,
+                            " de ",
+                            ConectividadState.sondeo_hechos,
+                            " alcanzables",
+                            rx.cond(
+                                ConectividadState.is_probing,
+                                rx.el.span(
+                                    " (",
+                                    ConectividadState.sondeo_hechos,
+                                    "/",
+                                    ConectividadState.sondeo_total,
+                                    ")",
+                                ),
+                                rx.el.span(" en ", ConectividadState.sondeo_segundos, " s"),
+                            ),
+                            class_name="text-sm text-gray-600",
+                        ),
+                        None,
+                    ),
+                    rx.cond(
+                        ConectividadState.is_probing,
+                        rx.el.button(
+                            rx.icon("circle-stop", class_name="h-4 w-4 mr-2"),
+                            "Detener",
+                            on_click=ConectividadState.cancelar_sondeo,
+                            class_name="flex items-center px-4 py-2 text-sm font-medium text-gray-700 border border-gray-300 rounded-lg hover:bg-gray-100 transition-colors",
+                        ),
+                        rx.el.button(
+                            rx.icon("radar", class_name="h-4 w-4 mr-2"),
+                            "Sondear",
+                            on_click=ConectividadState.sondear_dispositivos,
+                            class_name="flex items-center px-4 py-2 text-sm font-medium text-gray-700 border border-gray-300 rounded-lg hover:bg-gray-100 transition-colors",
+                        ),
+                    ),
+                    class_name="flex items-center gap-3",
                 ),
-                class_name="mb-6 max-w-lg",
+                class_name="flex justify-between items-center gap-4 mb-6",
             ),
             rx.el.div(
                 rx.el.table(
@@ -176,6 +288,22 @@ def conectividad_page() -> rx.Component:
                                 "Conectividad",
                                 class_name="px-6 py-3 bg-gray-50 text-left text-xs font-medium text-gray-500 uppercase tracking-wider",
                             ),
+                            rx.el.th(
+                                "Sondeo",
+                                class_name="px-6 py-3 bg-gray-50 text-left text-xs font-medium text-gray-500 uppercase tracking-wider",
+                            ),
+                            rx.el.th(
+                                "Último latido",
+                                class_name="px-6 py-3 bg-gray-50 text-left text-xs font-medium text-gray-500 uppercase tracking-wider",
+                            ),
+                            rx.el.th(
+                                "Marcas hoy",
+                                class_name="px-6 py-3 bg-gray-50 text-right text-xs font-medium text-gray-500 uppercase tracking-wider",
+                            ),
+                            rx.el.th(
+                                "Última hora",
+                                class_name="px-6 py-3 bg-gray-50 text-right text-xs font-medium text-gray-500 uppercase tracking-wider",
+                            ),
                             rx.el.th("", class_name="px-6 py-3 bg-gray-50"),
                         )
                     ),
@@ -191,5 +319,7 @@ def conectividad_page() -> rx.Component:
             ),
             class_name="animate-fade-in-up",
         ),
+        on_mount=ConectividadState.watch_estado,
+        on_unmount=ConectividadState.stop_estado,
         class_name="w-full",
     )
\ No newline at end of file
@@ -1,8 +1,8 @@
 import reflex as rx
-from app.states.empleados_state import EmpleadosState, Employee
+from app.states.empleados_state import EmpleadosState, EmployeeListItem
 
 
-def employee_list_item(emp: Employee) -> rx.Component:
+def employee_list_item(emp: EmployeeListItem) -> rx.Component:
     is_selected = EmpleadosState.selected_employee["id"] == emp["id"]
     return rx.el.div(
         rx.el.div(
@@ -508,12 +508,15 @@ def hierarchy_dialog() -> rx.Component:
                                 "search",
                                 class_name="absolute left-3 top-1/2 -translate-y-1/2 w-4 h-4 text-gray-400",
                             ),
-                            rx.el.input(
-                                placeholder="Escriba al menos 3 letras para buscar...",
-                                on_change=EmpleadosState.set_hierarchy_search_query,
-                                class_name="w-full pl-9 pr-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500/20 focus:border-blue-500 outline-none transition-all bg-white",
-                                auto_focus=True,
-                                default_value=EmpleadosState.hierarchy_search_query,
+                            rx.debounce_input(
+                                rx.el.input(
+                                    placeholder="Escriba al menos 3 letras para buscar...",
+                                    on_change=EmpleadosState.set_hierarchy_search_query,
+                                    class_name="w-full pl-9 pr-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500/20 focus:border-blue-500 outline-none transition-all bg-white",
+                                    auto_focus=True,
+                                    default_value=EmpleadosState.hierarchy_search_query,
+                                ),
+                                debounce_timeout=300,
                             ),
                             class_name="relative mb-2",
                         ),
@@ -686,10 +689,13 @@ def empleados_page() -> rx.Component:
                             "search",
                             class_name="w-4 h-4 absolute left-3 top-1/2 -translate-y-1/2 text-gray-400",
                         ),
-                        rx.el.input(
-                            placeholder="Buscar por nombre o cédula...",
-                            on_change=EmpleadosState.set_search_query,
-                            class_name="w-full pl-9 pr-4 py-2 rounded-lg border border-gray-200 bg-white focus:ring-2 focus:ring-blue-500/20 focus:border-blue-500 outline-none transition-all text-sm",
+                        rx.debounce_input(
+                            rx.el.input(
+                                placeholder="Buscar por nombre o cédula...",
+                                on_change=EmpleadosState.set_search_query,
+                                class_name="w-full pl-9 pr-4 py-2 rounded-lg border border-gray-200 bg-white focus:ring-2 focus:ring-blue-500/20 focus:border-blue-500 outline-none transition-all text-sm",
+                            ),
+                            debounce_timeout=300,
                         ),
                         class_name="relative mb-3",
                     ),
@@ -728,6 +734,16 @@ def empleados_page() -> rx.Component:
                         rx.foreach(
                             EmpleadosState.filtered_employees, employee_list_item
                         ),
+                        rx.cond(
+                            (EmpleadosState.search_query.length() >= 3)
+                            & EmpleadosState.has_more_employees,
+                            rx.el.button(
+                                "Cargar más",
+                                on_click=EmpleadosState.load_more_employees,
+                                class_name="w-full py-2 text-xs font-medium text-blue-600 hover:bg-blue-50 rounded-md transition-all",
+                            ),
+                            None,
+                        ),
                         class_name="space-y-2 overflow-y-auto pr-1 custom-scrollbar flex-1",
                     ),
                     class_name="flex flex-col h-full",
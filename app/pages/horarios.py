@@ -0,0 +1,274 @@
+import reflex as rx
+from app.states.horarios_state import HorariosState
+
+LABEL_CLASS = "block text-xs font-medium text-gray-500 uppercase tracking-wider mb-1"
+INPUT_CLASS = "w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500/20 focus:border-blue-500 outline-none transition-all bg-white"
+TIME_CLASS = "px-2 py-1 border border-gray-300 rounded-lg text-sm outline-none focus:border-blue-500 bg-white disabled:bg-gray-100 disabled:text-gray-400"
+TH_CLASS = "px-6 py-3 text-left text-xs text-muted-foreground uppercase tracking-wider"
+
+
+def dia_row(dia: dict) -> rx.Component:
+    return rx.el.div(
+        rx.el.label(
+            rx.el.input(
+                type="checkbox",
+                checked=dia["laborable"],
+                on_change=lambda value: HorariosState.set_dia_laborable(
+                    dia["indice"], value
+                ),
+                class_name="w-4 h-4 text-blue-600 border-gray-300 rounded focus:ring-blue-500",
+            ),
+            rx.el.span(dia["etiqueta"], class_name="ml-2 text-sm text-gray-700"),
+            class_name="flex items-center w-36 cursor-pointer",
+        ),
+        rx.el.input(
+            type="time",
+            value=dia["entrada"],
+            disabled=~dia["laborable"],
+            on_change=lambda value: HorariosState.set_dia_entrada(dia["indice"], value),
+            class_name=TIME_CLASS,
+        ),
+        rx.el.span("a", class_name="text-sm text-gray-500"),
+        rx.el.input(
+            type="time",
+            value=dia["salida"],
+            disabled=~dia["laborable"],
+            on_change=lambda value: HorariosState.set_dia_salida(dia["indice"], value),
+            class_name=TIME_CLASS,
+        ),
+        class_name="flex items-center gap-3 px-2 py-1 rounded-lg hover:bg-gray-50",
+    )
+
+
+def grupo_checkbox(grupo: dict) -> rx.Component:
+    return rx.el.label(
+        rx.el.input(
+            type="checkbox",
+            checked=grupo["asignado"],
+            on_change=lambda _: HorariosState.toggle_grupo(grupo["codigo"]),
+            class_name="w-4 h-4 text-blue-600 border-gray-300 rounded focus:ring-blue-500",
+        ),
+        rx.el.span(grupo["descripcion"], class_name="ml-2 text-sm text-gray-700"),
+        rx.cond(
+            (grupo["actual"] != "") & ~grupo["asignado"],
+            rx.el.span(
+                "(" + grupo["actual"].to(str) + ")",
+                class_name="ml-1 text-xs text-gray-400",
+            ),
+            None,
+        ),
+        class_name="flex items-center p-2 rounded-lg hover:bg-gray-50 transition-colors cursor-pointer",
+    )
+
+
+def horario_modal() -> rx.Component:
+    return rx.el.div(
+        rx.cond(
+            HorariosState.show_modal,
+            rx.el.div(
+                rx.el.div(
+                    rx.el.div(
+                        rx.el.h3(
+                            rx.cond(
+                                HorariosState.is_editing,
+                                "Editar Horario",
+                                "Añadir Horario",
+                            ),
+                            class_name="text-lg font-bold text-gray-900",
+                        ),
+                        rx.el.button(
+                            rx.icon(
+                                "x",
+                                class_name="h-5 w-5 text-gray-500 hover:text-gray-700",
+                            ),
+                            on_click=HorariosState.close_modal,
+                            class_name="p-1 rounded-full ios-hover",
+                        ),
+                        class_name="flex justify-between items-center pb-4 border-b",
+                    ),
+                    rx.el.div(
+                        rx.el.label("Descripción", class_name=LABEL_CLASS),
+                        rx.el.input(
+                            value=HorariosState.descripcion,
+                            on_change=HorariosState.set_descripcion,
+                            class_name=INPUT_CLASS + " mb-3",
+                        ),
+                        rx.el.div(
+                            rx.el.div(
+                                rx.el.label("Días del ciclo", class_name=LABEL_CLASS),
+                                rx.el.input(
+                                    type="number",
+                                    min="1",
+                                    max="366",
+                                    value=HorariosState.ciclo,
+                                    on_change=HorariosState.set_ciclo,
+                                    class_name=INPUT_CLASS,
+                                ),
+                            ),
+                            rx.el.div(
+                                rx.el.label("Inicio del ciclo", class_name=LABEL_CLASS),
+                                rx.el.input(
+                                    type="date",
+                                    value=HorariosState.fecha_base,
+                                    on_change=HorariosState.set_fecha_base,
+                                    class_name=INPUT_CLASS,
+                                ),
+                            ),
+                            rx.el.div(
+                                rx.el.label("Tolerancia (min)", class_name=LABEL_CLASS),
+                                rx.el.input(
+                                    type="number",
+                                    min="0",
+                                    value=HorariosState.tolerancia,
+                                    on_change=HorariosState.set_tolerancia,
+                                    class_name=INPUT_CLASS,
+                                ),
+                            ),
+                            class_name="grid grid-cols-1 md:grid-cols-3 gap-3 mb-3",
+                        ),
+                        rx.el.p(
+                            "Marque los días laborables. Una salida anterior a la entrada termina al día siguiente.",
+                            class_name="text-xs text-gray-500 mb-2",
+                        ),
+                        rx.el.div(
+                            rx.foreach(HorariosState.dias, dia_row),
+                            class_name="flex flex-col gap-1 mb-3 p-3 bg-gray-50 rounded-xl border border-gray-100",
+                        ),
+                        rx.el.label("Grupos", class_name=LABEL_CLASS),
+                        rx.el.div(
+                            rx.foreach(HorariosState.grupos, grupo_checkbox),
+                            class_name="grid grid-cols-2 gap-2 mb-3 p-4 bg-gray-50 rounded-xl border border-gray-100",
+                        ),
+                        rx.el.label(
+                            rx.el.input(
+                                type="checkbox",
+                                checked=HorariosState.activo,
+                                on_change=HorariosState.set_activo,
+                                class_name="w-4 h-4 text-blue-600 border-gray-300 rounded focus:ring-blue-500",
+                            ),
+                            rx.el.span("Activo", class_name="ml-2 text-sm text-gray-700"),
+                            class_name="flex items-center p-2 rounded-lg hover:bg-gray-50 transition-colors cursor-pointer",
+                        ),
+                        class_name="py-4 max-h-[70vh] overflow-y-auto pr-2 custom-scrollbar",
+                    ),
+                    rx.el.div(
+                        rx.el.button(
+                            "Cancelar",
+                            on_click=HorariosState.close_modal,
+                            class_name="px-4 py-2 text-sm font-medium text-gray-700 hover:bg-gray-100 rounded-lg transition-colors",
+                        ),
+                        rx.el.button(
+                            "Guardar",
+                            on_click=HorariosState.save_horario,
+                            class_name="px-4 py-2 text-sm font-medium bg-blue-600 text-white rounded-lg hover:bg-blue-700 transition-colors shadow-sm ml-3",
+                        ),
+                        class_name="flex justify-end pt-4 border-t",
+                    ),
+                    class_name="bg-white rounded-xl shadow-xl p-5 w-full max-w-2xl",
+                ),
+                class_name="fixed inset-0 z-50 flex items-center justify-center p-4 bg-black/30 ios-blur",
+            ),
+        )
+    )
+
+
+def horarios_page() -> rx.Component:
+    return rx.el.div(
+        horario_modal(),
+        rx.el.div(
+            rx.el.h2("Horarios", class_name="text-2xl text-foreground"),
+            rx.el.div(
+                rx.el.label(
+                    rx.el.input(
+                        type="checkbox",
+                        checked=HorariosState.show_inactive,
+                        on_change=HorariosState.set_show_inactive,
+                        class_name="h-4 w-4 rounded border-input text-primary focus:ring-ring",
+                    ),
+                    rx.el.span(
+                        "Mostrar inactivos",
+                        class_name="ml-2 text-sm font-medium text-foreground",
+                    ),
+                    class_name="flex items-center cursor-pointer select-none",
+                ),
+                class_name="absolute left-1/2 top-1/2 transform -translate-x-1/2 -translate-y-1/2",
+            ),
+            rx.el.button(
+                rx.icon("circle_plus", class_name="h-5 w-5 mr-2"),
+                "Añadir Horario",
+                on_click=HorariosState.open_add_modal,
+                class_name="flex items-center px-4 py-2 bg-primary text-primary-foreground rounded-lg shadow-md ios-hover transition-smooth",
+            ),
+            class_name="flex justify-between items-center mb-6 relative",
+        ),
+        rx.el.div(
+            rx.el.table(
+                rx.el.thead(
+                    rx.el.tr(
+                        rx.el.th("Descripción", class_name=TH_CLASS),
+                        rx.el.th("Ciclo", class_name=TH_CLASS),
+                        rx.el.th("Grupos", class_name=TH_CLASS),
+                        rx.el.th("Estado", class_name=TH_CLASS),
+                        rx.el.th(
+                            "Acciones",
+                            class_name="px-6 py-3 text-right text-xs text-muted-foreground uppercase tracking-wider",
+                        ),
+                    )
+                ),
+                rx.el.tbody(
+                    rx.foreach(
+                        HorariosState.filtered_horarios,
+                        lambda h: rx.el.tr(
+                            rx.el.td(
+                                h["descripcion"],
+                                class_name="px-6 py-4 whitespace-nowrap text-sm text-muted-foreground",
+                            ),
+                            rx.el.td(
+                                h["laborables"].to(str)
+                                + " de "
+                                + h["ciclo"].to(str)
+                                + " días desde "
+                                + h["fecha_base"],
+                                class_name="px-6 py-4 whitespace-nowrap text-sm text-muted-foreground",
+                            ),
+                            rx.el.td(
+                                h["grupos"],
+                                class_name="px-6 py-4 text-sm text-muted-foreground",
+                            ),
+                            rx.el.td(
+                                rx.el.span(
+                                    rx.cond(h["estado"], "Activo", "Inactivo"),
+                                    class_name=rx.cond(
+                                        h["estado"],
+                                        "px-2 inline-flex text-xs leading-5 rounded-full bg-green-100 text-green-800",
+                                        "px-2 inline-flex text-xs leading-5 rounded-full bg-red-100 text-red-800",
+                                    ),
+                                ),
+                                class_name="px-6 py-4 whitespace-nowrap text-sm",
+                            ),
+                            rx.el.td(
+                                rx.el.button(
+                                    rx.icon("pencil", class_name="h-5 w-5 text-primary"),
+                                    on_click=lambda: HorariosState.open_edit_modal(h),
+                                    class_name="p-2 hover:bg-accent rounded-full transition-smooth",
+                                ),
+                                rx.el.button(
+                                    rx.icon(
+                                        "trash-2", class_name="h-5 w-5 text-destructive"
+                                    ),
+                                    on_click=lambda: HorariosState.delete_horario(h["id"]),
+                                    class_name="p-2 hover:bg-accent rounded-full transition-smooth",
+                                ),
+                                class_name="px-6 py-4 whitespace-nowrap text-right text-sm font-medium",
+                            ),
+                            class_name="bg-card divide-y divide-border",
+                        ),
+                    ),
+                    class_name="bg-card divide-y divide-border",
+                ),
+                class_name="min-w-full divide-y divide-border",
+            ),
+            class_name="w-full overflow-x-auto border shadow-sm sm:rounded-lg bg-card",
+        ),
+        class_name="animate-fade-in-up",
+    )
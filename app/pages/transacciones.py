@@ -17,6 +17,133 @@ def transaccion_row(transaccion: dict) -> rx.Component:
     )
 
 
+def resumen_card(item: dict) -> rx.Component:
+    return rx.el.div(
+        rx.el.div(
+            rx.el.span(item["descripcion"], class_name="text-sm font-medium text-gray-900 truncate"),
+            rx.el.span(item["total"], class_name="text-lg font-semibold text-gray-900"),
+            class_name="flex justify-between items-baseline gap-2",
+        ),
+        rx.el.div(
+            rx.foreach(
+                item["barras"],
+                lambda altura: rx.el.div(
+                    class_name="flex-1 bg-blue-400 rounded-sm min-h-[1px]",
+                    style={"height": altura.to_string() + "%"},
+                ),
+            ),
+            class_name="flex items-end gap-px h-10 mt-2",
+        ),
+        rx.el.p(
+            "Hora actual: ",
+            rx.el.span(item["hora_actual"], class_name="font-medium"),
+            class_name="text-xs text-gray-500 mt-1",
+        ),
+        class_name="bg-white p-3 rounded-lg border border-gray-200",
+    )
+
+
+def resumen_panel() -> rx.Component:
+    return rx.cond(
+        TransaccionesState.resumen.length() > 0,
+        rx.el.div(
+            rx.el.h3(
+                "Resumen de hoy por dispositivo",
+                class_name="text-xs font-medium text-gray-500 uppercase tracking-wider mb-2",
+            ),
+            rx.el.div(
+                rx.foreach(TransaccionesState.resumen, resumen_card),
+                class_name="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-4 gap-3",
+            ),
+            class_name="mb-6",
+        ),
+        None,
+    )
+
+
+def historial_row(fila: dict) -> rx.Component:
+    return rx.el.tr(
+        rx.el.td(fila["fecha"], class_name="px-6 py-2 whitespace-nowrap text-sm text-gray-900"),
+        rx.el.td(fila["descripcion"], class_name="px-6 py-2 whitespace-nowrap text-sm text-gray-500"),
+        rx.el.td(fila["total"], class_name="px-6 py-2 whitespace-nowrap text-sm text-gray-900 text-right"),
+        class_name="hover:bg-gray-50 transition-colors",
+    )
+
+
+def historial_panel() -> rx.Component:
+    date_input_class = "px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500/20 focus:border-blue-500 outline-none transition-all bg-white text-sm"
+    return rx.el.div(
+        rx.el.button(
+            rx.icon(
+                rx.cond(TransaccionesState.show_historial, "chevron-down", "chevron-right"),
+                class_name="h-4 w-4 mr-2",
+            ),
+            "Historial por día",
+            on_click=TransaccionesState.toggle_historial,
+            class_name="flex items-center text-sm font-medium text-gray-700 hover:text-gray-900",
+        ),
+        rx.cond(
+            TransaccionesState.show_historial,
+            rx.el.div(
+                rx.el.div(
+                    rx.el.input(
+                        type="date",
+                        value=TransaccionesState.historial_desde,
+                        on_change=TransaccionesState.set_historial_desde,
+                        class_name=date_input_class,
+                    ),
+                    rx.el.span("a", class_name="text-sm text-gray-500"),
+                    rx.el.input(
+                        type="date",
+                        value=TransaccionesState.historial_hasta,
+                        on_change=TransaccionesState.set_historial_hasta,
+                        class_name=date_input_class,
+                    ),
+                    rx.el.button(
+                        "Consultar",
+                        on_click=TransaccionesState.load_historial,
+                        class_name="px-4 py-2 text-sm font-medium bg-blue-600 text-white rounded-lg hover:bg-blue-700 transition-colors shadow-sm",
+                    ),
+                    rx.el.span(
+                        "Total: ",
+                        rx.el.span(TransaccionesState.historial_total, class_name="font-medium"),
+                        class_name="text-sm text-gray-700 ml-auto",
+                    ),
+                    class_name="flex items-center gap-3 my-4",
+                ),
+                rx.el.div(
+                    rx.el.table(
+                        rx.el.thead(
+                            rx.el.tr(
+                                rx.el.th(
+                                    "Fecha",
+                                    class_name="px-6 py-3 bg-gray-50 text-left text-xs font-medium text-gray-500 uppercase tracking-wider",
+                                ),
+                                rx.el.th(
+                                    "Dispositivo",
+                                    class_name="px-6 py-3 bg-gray-50 text-left text-xs font-medium text-gray-500 uppercase tracking-wider",
+                                ),
+                                rx.el.th(
+                                    "Marcas",
+                                    class_name="px-6 py-3 bg-gray-50 text-right text-xs font-medium text-gray-500 uppercase tracking-wider",
+                                ),
+                            )
+                        ),
+                        rx.el.tbody(
+                            rx.foreach(TransaccionesState.historial, historial_row),
+                            class_name="bg-white divide-y divide-gray-200",
+                        ),
+                        class_name="min-w-full divide-y divide-gray-200",
+                    ),
+                    class_name="shadow overflow-hidden border-b border-gray-200 sm:rounded-lg max-h-96 overflow-y-auto",
+                ),
+            ),
+            None,
+        ),
+        class_name="mt-8",
+    )
+
+
 def transacciones_page() -> rx.Component:
     return rx.el.div(
         rx.el.div(
@@ -25,7 +152,7 @@ def transacciones_page() -> rx.Component:
                 rx.el.button(
                     rx.icon("refresh-ccw", class_name="h-4 w-4 mr-2"),
                     "Actualizar",
-                    on_click=TransaccionesState.load_transacciones,
+                    on_click=TransaccionesState.refresh,
                     class_name="flex items-center px-4 py-2 text-sm font-medium text-gray-700 bg-white border border-gray-300 rounded-lg hover:bg-gray-50 transition-colors shadow-sm",
                 ),
                 class_name="flex justify-between items-center mb-6",
@@ -49,6 +176,17 @@ def transacciones_page() -> rx.Component:
                     class_name="w-full max-w-xs",
                 ),
                 rx.el.div(
+                    rx.cond(
+                        TransaccionesState.feed_activo,
+                        rx.el.span(
+                            rx.el.span(
+                                class_name="h-2 w-2 rounded-full bg-green-500 animate-pulse"
+                            ),
+                            "En vivo",
+                            class_name="flex items-center gap-2 text-xs font-medium text-green-700 mr-4",
+                        ),
+                        None,
+                    ),
                     rx.el.span(
                         "Mostrando transacciones del día actual",
                         class_name="text-sm text-gray-500 italic",
@@ -57,6 +195,7 @@ def transacciones_page() -> rx.Component:
                 ),
                 class_name="flex justify-between items-end mb-6 bg-gray-50 p-4 rounded-lg border border-gray-200",
             ),
+            resumen_panel(),
             rx.el.div(
                 rx.el.table(
                     rx.el.thead(
@@ -96,7 +235,7 @@ def transacciones_page() -> rx.Component:
                 class_name="shadow overflow-hidden border-b border-gray-200 sm:rounded-lg mb-4",
             ),
             rx.cond(
-                TransaccionesState.total_pages > 1,
+                TransaccionesState.has_prev | TransaccionesState.has_next,
                 rx.el.div(
                     rx.el.div(
                         rx.el.p(
@@ -131,7 +270,10 @@ def transacciones_page() -> rx.Component:
                 ),
                 None,
             ),
+            historial_panel(),
             class_name="animate-fade-in-up",
         ),
+        on_mount=TransaccionesState.watch_feed,
+        on_unmount=TransaccionesState.stop_feed,
         class_name="w-full",
     )
\ No newline at end of file
@@ -0,0 +1,257 @@
+import reflex as rx
+from typing import TypedDict
+from app.states.database_state import DatabaseState
+from app.utils import asistencia, asistencia_cierre
+import datetime
+import logging
+
+DIAS_SEMANA = ("Lun", "Mar", "Mié", "Jue", "Vie", "Sáb", "Dom")
+
+
+class ResumenAsistencia(TypedDict):
+    id: int
+    cedula: str
+    nombre: str
+    dias_asistidos: int
+    faltas: int
+    atrasos: int
+    trabajado: str
+    atraso: str
+    salida_anticipada: str
+    sobretiempo: str
+    nocturnos: str
+    dia_libre: str
+
+
+class DetalleDia(TypedDict):
+    fecha: str
+    entrada: str
+    salida: str
+    marcas: int
+    laborable: bool
+    trabajado: str
+    atraso: str
+    salida_anticipada: str
+    sobretiempo: str
+    nocturnos: str
+    falta: bool
+    justificada: bool
+
+
+def _hhmm(minutos) -> str:
+    """Minutes as h:mm; empty for zero so totals stand out in the table."""
+    minutos = int(minutos or 0)
+    if not minutos:
+        return ""
+    return f"{minutos // 60}:{minutos % 60:02d}"
+
+
+def _hora(valor) -> str:
+    return valor.strftime("%H:%M") if valor else ""
+
+
+def _to_resumen(row: dict) -> ResumenAsistencia:
+    return ResumenAsistencia(
+        id=row["id"],
+        cedula=row["cedula"] or "",
+        nombre=f"{row['apellidos'] or ''} {row['nombres'] or ''}".strip(),
+        dias_asistidos=row["dias_asistidos"],
+        faltas=row["faltas"],
+        atrasos=row["atrasos"],
+        trabajado=_hhmm(row["minutos_trabajados"]),
+        atraso=_hhmm(row["minutos_atraso"]),
+        salida_anticipada=_hhmm(row["minutos_salida_anticipada"]),
+        sobretiempo=_hhmm(row["minutos_sobretiempo"]),
+        nocturnos=_hhmm(row["minutos_nocturnos"]),
+        dia_libre=_hhmm(row["minutos_dia_libre"]),
+    )
+
+
+def _to_detalle(row: dict) -> DetalleDia:
+    return DetalleDia(
+        fecha=f"{DIAS_SEMANA[row['fecha'].weekday()]} {row['fecha']:%d/%m}",
+        entrada=_hora(row["entrada"]),
+        salida=_hora(row["salida"]),
+        marcas=row["marcas"],
+        laborable=row["laborable"],
+        trabajado=_hhmm(row["minutos_trabajados"]),
+        atraso=_hhmm(row["minutos_atraso"]),
+        salida_anticipada=_hhmm(row["minutos_salida_anticipada"]),
+        sobretiempo=_hhmm(row["minutos_sobretiempo"] + row["minutos_dia_libre"]),
+        nocturnos=_hhmm(row["minutos_nocturnos"]),
+        falta=row["falta"],
+        justificada=row["justificada"],
+    )
+
+
+class AsistenciasState(DatabaseState):
+    """State for the daily attendance results page."""
+
+    fecha_desde: str = ""
+    fecha_hasta: str = ""
+    search_query: str = ""
+    resumen: list[ResumenAsistencia] = []
+    current_page: int = 1
+    items_per_page: int = 20
+    has_more: bool = False
+    is_loading: bool = False
+    is_calculating: bool = False
+    cierre_por: str = asistencia_cierre.POR_RANGO
+    progreso_bloques: int = 0
+    progreso_completados: int = 0
+    progreso_etapa: str = ""
+    show_detalle: bool = False
+    detalle_nombre: str = ""
+    detalle: list[DetalleDia] = []
+
+    @rx.var
+    def progreso_porcentaje(self) -> int:
+        if not self.progreso_bloques:
+            return 0
+        return round(self.progreso_completados * 100 / self.progreso_bloques)
+
+    @rx.var
+    def has_next(self) -> bool:
+        return self.has_more
+
+    @rx.var
+    def has_prev(self) -> bool:
+        return self.current_page > 1
+
+    def _periodo(self) -> tuple[datetime.date, datetime.date] | None:
+        try:
+            desde = datetime.date.fromisoformat(self.fecha_desde)
+            hasta = datetime.date.fromisoformat(self.fecha_hasta)
+        except ValueError:
+            return None
+        return (hasta, desde) if desde > hasta else (desde, hasta)
+
+    @rx.event
+    async def on_load(self):
+        """Default to the current month up to today and load its totals."""
+        logging.info("🔄 Loading Asistencia Diaria page...")
+        if not self.fecha_hasta:
+            hoy = datetime.date.today()
+            self.fecha_desde = hoy.replace(day=1).isoformat()
+            self.fecha_hasta = hoy.isoformat()
+        self.current_page = 1
+        await self.load_resumen()
+
+    @rx.event
+    def set_fecha_desde(self, value: str):
+        self.fecha_desde = value
+
+    @rx.event
+    def set_fecha_hasta(self, value: str):
+        self.fecha_hasta = value
+
+    @rx.event
+    async def set_search_query(self, value: str):
+        self.search_query = value
+        self.current_page = 1
+        await self.load_resumen()
+
+    @rx.event
+    async def load_resumen(self):
+        """Per-employee totals of the selected period, one page at a time."""
+        periodo = self._periodo()
+        if periodo is None:
+            self.resumen = []
+            self.has_more = False
+            return
+        self.is_loading = True
+        try:
+            rows = await asistencia.resumen_periodo(
+                *periodo,
+                termino=self.search_query,
+                limit=self.items_per_page + 1,
+                offset=(self.current_page - 1) * self.items_per_page,
+            )
+            self.has_more = len(rows) > self.items_per_page
+            self.resumen = [_to_resumen(row) for row in rows[: self.items_per_page]]
+        except Exception as e:
+            logging.exception(f"Error loading attendance summary: {e}")
+            self.resumen = []
+            self.has_more = False
+        self.is_loading = False
+
+    @rx.event
+    def consultar(self):
+        if self._periodo() is None:
+            return rx.toast.error("Seleccione un rango de fechas válido.")
+        self.current_page = 1
+        return AsistenciasState.load_resumen
+
+    @rx.event
+    def next_page(self):
+        if self.has_next:
+            self.current_page += 1
+            return AsistenciasState.load_resumen
+
+    @rx.event
+    def prev_page(self):
+        if self.has_prev:
+            self.current_page -= 1
+            return AsistenciasState.load_resumen
+
+    @rx.event
+    def set_cierre_por(self, value: str):
+        self.cierre_por = value
+
+    @rx.event(background=True)
+    async def calcular(self):
+        """Close the selected period for every active employee, streaming progress."""
+        async with self:
+            if self.is_calculating:
+                return
+            periodo = self._periodo()
+            por = self.cierre_por
+            self.is_calculating = periodo is not None
+            self.progreso_bloques = 0
+            self.progreso_completados = 0
+            self.progreso_etapa = ""
+        if periodo is None:
+            yield rx.toast.error("Seleccione un rango de fechas válido.")
+            return
+        filas = 0
+        try:
+            async for progreso in asistencia_cierre.cerrar_periodo(*periodo, por):
+                async with self:
+                    self.progreso_bloques = progreso.bloques
+                    self.progreso_completados = progreso.completados
+                    self.progreso_etapa = progreso.etapa
+                filas = progreso.filas
+        except Exception as e:
+            logging.exception(f"Error calculating attendance: {e}")
+            async with self:
+                self.is_calculating = False
+            yield rx.toast.error("Error al calcular la asistencia del período.")
+            return
+        async with self:
+            self.is_calculating = False
+            self.current_page = 1
+        yield AsistenciasState.load_resumen
+        yield rx.toast.success(
+            f"Asistencia calculada ({filas} registros actualizados)."
+        )
+
+    @rx.event
+    async def ver_detalle(self, empleado_id: int, nombre: str):
+        """Day by day results of one employee in the selected period."""
+        periodo = self._periodo()
+        if periodo is None:
+            return
+        try:
+            rows = await asistencia.detalle_empleado(empleado_id, *periodo)
+        except Exception as e:
+            logging.exception(f"Error loading attendance detail: {e}")
+            yield rx.toast.error("Error al cargar el detalle de asistencia.")
+            return
+        self.detalle = [_to_detalle(row) for row in rows]
+        self.detalle_nombre = nombre
+        self.show_detalle = True
+
+    @rx.event
+    def cerrar_detalle(self):
+        self.show_detalle = False
+        self.detalle = []
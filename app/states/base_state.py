@@ -1,9 +1,9 @@
 import reflex as rx
 from pydantic import BaseModel
 from app.states.database_state import DatabaseState
-import secrets
 import logging
-from sqlalchemy import text
+from app.utils.sessions import session_service
+from app.utils.parametros import parametros_registry
 
 
 class NavItem(BaseModel):
@@ -67,7 +67,14 @@ class BaseState(DatabaseState):
                 NavItem(name="Empleados", icon="user-circle"),
             ],
         ),
-        NavItem(name="Asistencias", icon="clipboard-check", sub_items=[]),
+        NavItem(
+            name="Asistencias",
+            icon="clipboard-check",
+            sub_items=[
+                NavItem(name="Asistencia Diaria", icon="calendar-check"),
+                NavItem(name="Horarios", icon="clock"),
+            ],
+        ),
     ]
 
     @rx.event
@@ -125,6 +132,16 @@ class BaseState(DatabaseState):
 
             state = await self.get_state(TransaccionesState)
             await state.on_load()
+        elif page == "Asistencia Diaria":
+            from app.states.asistencias_state import AsistenciasState
+
+            state = await self.get_state(AsistenciasState)
+            await state.on_load()
+        elif page == "Horarios":
+            from app.states.horarios_state import HorariosState
+
+            state = await self.get_state(HorariosState)
+            await state.on_load()
 
     @rx.event
     def toggle_module(self, module_name: str):
@@ -156,28 +173,6 @@ class BaseState(DatabaseState):
         initials = "".join((word[0] for word in words if word))
         return initials[:2].upper()
 
-    async def _ensure_session_table(self):
-        """Ensure the sessions table exists in the central database."""
-        try:
-            query = """
-                CREATE TABLE IF NOT EXISTS public.sesiones (
-                    id SERIAL PRIMARY KEY,
-                    token VARCHAR(255) UNIQUE NOT NULL,
-                    usuario_id INTEGER NOT NULL,
-                    database_name VARCHAR(50) NOT NULL,
-                    fecha_inicio TIMESTAMP DEFAULT NOW(),
-                    fecha_ultimo_acceso TIMESTAMP DEFAULT NOW(),
-                    fecha_expiracion TIMESTAMP,
-                    ip_address VARCHAR(50),
-                    user_agent TEXT,
-                    activa BOOLEAN DEFAULT true
-                );
-                CREATE INDEX IF NOT EXISTS idx_sesiones_token ON public.sesiones(token);
-            """
-            await self._execute_write(query, target_db="novalink")
-        except Exception as e:
-            logging.exception(f"Error creating sessions table: {e}")
-
     @rx.event
     async def create_session(
         self,
@@ -187,29 +182,10 @@ class BaseState(DatabaseState):
         user_agent: str = "",
     ):
         """Create a new session for the user."""
-        await self._ensure_session_table()
         try:
-            token = secrets.token_urlsafe(32)
-            self.auth_token = token
-            insert_query = """
-                INSERT INTO public.sesiones (
-                    token, usuario_id, database_name, 
-                    fecha_inicio, fecha_ultimo_acceso, fecha_expiracion, 
-                    ip_address, user_agent, activa
-                ) VALUES (
-                    :token, :uid, :db_name, 
-                    NOW(), NOW(), NOW() + INTERVAL '30 minutes', 
-                    :ip, :ua, true
-                )
-            """
-            params = {
-                "token": token,
-                "uid": user_id,
-                "db_name": database_name,
-                "ip": ip_address,
-                "ua": user_agent,
-            }
-            await self._execute_write(insert_query, params, target_db="novalink")
+            self.auth_token = await session_service.create(
+                user_id, database_name, ip_address, user_agent
+            )
             logging.info(f"Session created for user {user_id} in {database_name}")
         except Exception as e:
             logging.exception(f"Error creating session: {e}")
@@ -219,69 +195,29 @@ class BaseState(DatabaseState):
     async def cleanup_expired_sessions(self):
         """Mark expired sessions as inactive."""
         try:
-            query = """
-                UPDATE public.sesiones 
-                SET activa = false 
-                WHERE fecha_expiracion < NOW() AND activa = true
-            """
-            await self._execute_write(query, target_db="novalink")
+            await session_service.reap_expired()
         except Exception as e:
             logging.exception(f"Error cleaning expired sessions: {e}")
 
     @rx.event
     async def validate_session(self) -> bool:
-        """Validate the current session token."""
-        await self._ensure_session_table()
-        await self.cleanup_expired_sessions()
+        """Validate the current session token, renewing it in a single round trip."""
         if not self.auth_token:
             return False
         try:
-            query = """
-                SELECT 
-                    id, usuario_id, database_name, fecha_expiracion, activa
-                FROM public.sesiones 
-                WHERE token = :token
-            """
-            results = await self._execute_query(
-                query, {"token": self.auth_token}, target_db="novalink"
-            )
-            if not results:
-                return False
-            session = results[0]
-            if not session["activa"]:
+            session = await session_service.validate(self.auth_token)
+            if session is None:
+                self.auth_token = ""
                 return False
-            check_exp_query = """
-                SELECT 1 FROM public.sesiones 
-                WHERE token = :token AND fecha_expiracion > NOW()
-            """
-            valid_results = await self._execute_query(
-                check_exp_query, {"token": self.auth_token}, target_db="novalink"
-            )
-            if not valid_results:
-                await self.close_session()
-                return False
-            update_query = """
-                UPDATE public.sesiones 
-                SET 
-                    fecha_ultimo_acceso = NOW(),
-                    fecha_expiracion = NOW() + INTERVAL '30 minutes'
-                WHERE token = :token
-            """
-            await self._execute_write(
-                update_query, {"token": self.auth_token}, target_db="novalink"
-            )
-            logging.info(
-                f"Session renewed for user {session['usuario_id']} via validation"
-            )
-            self.logged_user_id = session["usuario_id"]
-            self.current_database_name = session["database_name"]
+            self.logged_user_id = session.usuario_id
+            self.current_database_name = session.database_name
             if not self.logged_user_name:
                 try:
                     user_query = "SELECT nombre, descripcion FROM public.usuarios WHERE id = :uid"
                     user_res = await self._execute_query(
                         user_query,
-                        {"uid": session["usuario_id"]},
-                        target_db=session["database_name"],
+                        {"uid": session.usuario_id},
+                        target_db=session.database_name,
                     )
                     if user_res:
                         self.logged_user_name = user_res[0]["nombre"]
@@ -296,13 +232,9 @@ class BaseState(DatabaseState):
     @rx.event
     async def close_session(self):
         """Close the current session."""
-        await self._ensure_session_table()
         if self.auth_token:
             try:
-                query = "UPDATE public.sesiones SET activa = false WHERE token = :token"
-                await self._execute_write(
-                    query, {"token": self.auth_token}, target_db="novalink"
-                )
+                await session_service.close(self.auth_token)
                 logging.info("Session explicitly closed via logout")
             except Exception as e:
                 logging.exception(f"Error closing session: {e}")
@@ -314,22 +246,12 @@ class BaseState(DatabaseState):
         if not self.has_db_connection:
             return
         try:
-            query = "SELECT codigo, valor FROM public.parametros WHERE codigo IN (5, 8, 11, 14, 17)"
-            results = await self._execute_query(query, target_db="novalink")
-            params = {row["codigo"]: row["valor"] for row in results}
+            params = await parametros_registry.get("novalink")
             for module in self.navigation_menu:
                 if module.name == "Catálogos":
                     for sub in module.sub_items:
-                        if sub.name == "Nivel 1":
-                            sub.label = params.get(5, "Nivel 1")
-                        elif sub.name == "Nivel 2":
-                            sub.label = params.get(8, "Nivel 2")
-                        elif sub.name == "Nivel 3":
-                            sub.label = params.get(11, "Nivel 3")
-                        elif sub.name == "Nivel 4":
-                            sub.label = params.get(14, "Nivel 4")
-                        elif sub.name == "Nivel 5":
-                            sub.label = params.get(17, "Nivel 5")
+                        if sub.name.startswith("Nivel "):
+                            sub.label = params.etiqueta_nivel(int(sub.name[-1]))
                     break
             self.navigation_menu = list(self.navigation_menu)
         except Exception as e:
@@ -344,4 +266,5 @@ class BaseState(DatabaseState):
                 "Invalid or expired session detected during check_login. Redirecting to login."
             )
             return rx.redirect("/login")
+        await self._ensure_schema(self.current_database_name)
         await self.update_catalog_labels()
\ No newline at end of file
@@ -2,7 +2,8 @@ import reflex as rx
 from typing import TypedDict, Optional
 import logging
 from app.states.database_state import DatabaseState
-from sqlalchemy import text
+from app.utils import search
+from app.utils.catalogs import catalog_cache, format_timestamp
 
 
 class CatalogoItem(TypedDict):
@@ -13,6 +14,25 @@ class CatalogoItem(TypedDict):
     fecha_modificacion: str
 
 
+CATALOGO_COLUMNS = """
+    codigo,
+    descripcion,
+    activo,
+    COALESCE(to_char(fechacreacion, 'YYYY-MM-DD HH24:MI'), '') as fecha_creacion,
+    COALESCE(to_char(fechamodificacion, 'YYYY-MM-DD HH24:MI'), '') as fecha_modificacion
+"""
+
+
+def _item_from_row(row: dict) -> CatalogoItem:
+    return CatalogoItem(
+        codigo=row["codigo"],
+        descripcion=row["descripcion"],
+        activo=bool(row["activo"]),
+        fecha_creacion=row["fecha_creacion"],
+        fecha_modificacion=row["fecha_modificacion"],
+    )
+
+
 class CatalogoBaseState(DatabaseState):
     """Base state for catalog CRUD operations."""
 
@@ -27,25 +47,49 @@ class CatalogoBaseState(DatabaseState):
     show_inactive: bool = False
     is_editing: bool = False
     search_query: str = ""
+    search_results: list[CatalogoItem] = []
     table_name: str = ""
 
     @rx.var
     def filtered_items(self) -> list[CatalogoItem]:
-        items = self.items
+        if self.search_query.strip():
+            return self.search_results
         if not self.show_inactive:
-            items = [i for i in items if i["activo"]]
-        if self.search_query:
-            q = self.search_query.lower()
-            items = [i for i in items if q in i["descripcion"].lower()]
-        return items
+            return [i for i in self.items if i["activo"]]
+        return self.items
 
     @rx.event
-    def set_show_inactive(self, value: bool):
+    async def set_show_inactive(self, value: bool):
         self.show_inactive = value
+        await self.search_items()
 
     @rx.event
-    def set_search_query(self, value: str):
+    async def set_search_query(self, value: str):
         self.search_query = value
+        await self.search_items()
+
+    @rx.event
+    async def search_items(self):
+        """Ranked, accent-insensitive search of the catalog in the database."""
+        if not self.table_name or not self.search_query.strip():
+            self.search_results = []
+            return
+        try:
+            db_name = await self._resolve_target_db()
+            results = await search.search(
+                db_name,
+                self.table_name,
+                ("descripcion",),
+                self.search_query,
+                select=CATALOGO_COLUMNS,
+                key="codigo",
+                filters=() if self.show_inactive else ("activo = true",),
+                limit=50,
+            )
+            self.search_results = [_item_from_row(row) for row in results]
+        except Exception as e:
+            logging.exception(f"Error searching items in {self.table_name}: {e}")
+            self.search_results = []
 
     @rx.event
     def set_selected_item_description(self, value: str):
@@ -87,17 +131,17 @@ class CatalogoBaseState(DatabaseState):
         if not self.table_name:
             return
         try:
-            query = f"\n                SELECT \n                    codigo,\n                    descripcion,\n                    activo,\n                    COALESCE(to_char(fechacreacion, 'YYYY-MM-DD HH24:MI'), '') as fecha_creacion,\n                    COALESCE(to_char(fechamodificacion, 'YYYY-MM-DD HH24:MI'), '') as fecha_modificacion\n                FROM public.{self.table_name} \n                ORDER BY descripcion ASC\n            "
-            results = await self._execute_query(query)
+            db_name = await self._resolve_target_db()
+            rows = await catalog_cache.get(db_name, self.table_name)
             self.items = [
                 CatalogoItem(
                     codigo=row["codigo"],
                     descripcion=row["descripcion"],
-                    activo=bool(row["activo"]),
-                    fecha_creacion=row["fecha_creacion"],
-                    fecha_modificacion=row["fecha_modificacion"],
+                    activo=bool(row.get("activo")),
+                    fecha_creacion=format_timestamp(row.get("fechacreacion")),
+                    fecha_modificacion=format_timestamp(row.get("fechamodificacion")),
                 )
-                for row in results
+                for row in rows
             ]
         except Exception as e:
             logging.exception(f"Error loading items from {self.table_name}: {e}")
@@ -140,8 +184,12 @@ class CatalogoBaseState(DatabaseState):
                     },
                 )
                 rx.toast.success("Registro actualizado correctamente.")
+            catalog_cache.invalidate(
+                await self._resolve_target_db(), self.table_name
+            )
             self.cancel_edit()
             await self.load_items()
+            await self.search_items()
         except Exception as e:
             logging.exception(f"Error saving item to {self.table_name}: {e}")
             rx.toast.error(f"Error al guardar: {e}")
\ No newline at end of file
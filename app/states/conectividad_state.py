@@ -1,8 +1,18 @@
 import reflex as rx
+import time
+import uuid
+import asyncio
+import datetime
+import contextlib
 from typing import Optional, TypedDict
 from app.states.database_state import DatabaseState
+from app.utils import sondeo, transacciones_resumen
+from app.utils.latidos import liveness_tracker
+from app.utils.transacciones_feed import client_connected
 import logging
 
+SONDEO_REFRESCO = 0.25
+
 
 class Dispositivo(TypedDict):
     id: int
@@ -10,6 +20,24 @@ class Dispositivo(TypedDict):
     descripcion: str
     activo: bool
     en_linea: bool
+    marcas_hoy: int
+    marcas_hora: int
+    ultimo_latido: str
+    host: str
+    puerto: str
+    sondeo: str
+    latencia: str
+
+
+def _ultimo_latido(estado: dict | None) -> str:
+    if estado is None or estado["segundos"] is None:
+        return "—"
+    segundos = estado["segundos"]
+    if segundos < 60:
+        return f"hace {segundos} s"
+    if segundos < 3600:
+        return f"hace {segundos // 60} min"
+    return f"hace {segundos // 3600} h"
 
 
 class ConectividadState(DatabaseState):
@@ -21,6 +49,13 @@ class ConectividadState(DatabaseState):
     show_dialog: bool = False
     current_dispositivo: dict = {}
     error_message: str = ""
+    _estado_id: str = ""
+    is_probing: bool = False
+    sondeo_total: int = 0
+    sondeo_hechos: int = 0
+    sondeo_alcanzables: int = 0
+    sondeo_segundos: str = ""
+    _sondeo_id: str = ""
 
     @rx.event
     async def on_load(self):
@@ -33,8 +68,11 @@ class ConectividadState(DatabaseState):
         """Fetch all devices from the database."""
         self.is_loading = True
         try:
-            query = "SELECT codigo, descripcion, activo, enlinea FROM public.dispositivos WHERE codigo > 0 ORDER BY codigo"
+            query = "SELECT codigo, descripcion, activo, enlinea, host, puerto FROM public.dispositivos WHERE codigo > 0 ORDER BY codigo"
             results = await self._execute_query(query, target_db="novalink")
+            marcas = await self._marcas_hoy()
+            hora = datetime.datetime.now().hour
+            latidos = await liveness_tracker.estados()
             self.dispositivos = [
                 Dispositivo(
                     id=int(row["codigo"]),
@@ -42,6 +80,15 @@ class ConectividadState(DatabaseState):
                     descripcion=row["descripcion"] or "",
                     activo=bool(row["activo"]),
                     en_linea=bool(row["enlinea"]),
+                    marcas_hoy=marcas.get(row["codigo"], {}).get("total", 0),
+                    marcas_hora=marcas.get(row["codigo"], {}).get(
+                        "por_hora", [0] * 24
+                    )[hora],
+                    ultimo_latido=_ultimo_latido(latidos.get(row["codigo"])),
+                    host=row["host"] or "",
+                    puerto=str(row["puerto"] or ""),
+                    sondeo="",
+                    latencia="",
                 )
                 for row in results
             ]
@@ -51,6 +98,133 @@ class ConectividadState(DatabaseState):
         finally:
             self.is_loading = False
 
+    @rx.event(background=True)
+    async def watch_estado(self):
+        """Refresh online status and last heartbeats while the page is open.
+
+        Reads dispositivos through liveness_tracker.estados(), shared by every
+        open page of this worker, so status is the same whichever worker hears
+        a device. Superseded by the next call for the same tab and ends with
+        stop_estado or when the tab disconnects.
+        """
+        estado_id = uuid.uuid4().hex
+        async with self:
+            self._estado_id = estado_id
+            token = self.router.session.client_token
+        while True:
+            await asyncio.sleep(liveness_tracker.sweep_interval)
+            if not client_connected(token):
+                break
+            latidos = await liveness_tracker.estados()
+            async with self:
+                if self._estado_id != estado_id:
+                    break
+                dispositivos = []
+                for dispositivo in self.dispositivos:
+                    estado = latidos.get(dispositivo["id"])
+                    dispositivo = dict(dispositivo)
+                    if estado is not None:
+                        dispositivo["en_linea"] = estado["en_linea"]
+                    dispositivo["ultimo_latido"] = _ultimo_latido(estado)
+                    dispositivos.append(dispositivo)
+                self.dispositivos = dispositivos
+
+    @rx.event
+    def stop_estado(self):
+        self._estado_id = ""
+
+    @rx.event(background=True)
+    async def sondear_dispositivos(self):
+        """TCP-probe every active device with a host, streaming results into the table.
+
+        Results are applied in batches every SONDEO_REFRESCO seconds, so
+        hundreds of devices do not mean hundreds of state updates.
+        """
+        sondeo_id = uuid.uuid4().hex
+        async with self:
+            if self.is_probing:
+                return
+            targets = [
+                (d["id"], d["host"], int(d["puerto"] or sondeo.PUERTO_DEFECTO))
+                for d in self.dispositivos
+                if d["activo"] and d["host"]
+            ]
+            if not targets:
+                yield rx.toast.info("No hay dispositivos activos con dirección configurada.")
+                return
+            self._sondeo_id = sondeo_id
+            self.is_probing = True
+            self.sondeo_total = len(targets)
+            self.sondeo_hechos = 0
+            self.sondeo_alcanzables = 0
+            self.sondeo_segundos = ""
+            self.dispositivos = [
+                {**d, "sondeo": "pendiente" if d["activo"] and d["host"] else "", "latencia": ""}
+                for d in self.dispositivos
+            ]
+        start = time.monotonic()
+        pending: dict[int, sondeo.ResultadoSondeo] = {}
+        last_push = start
+        try:
+            async with contextlib.aclosing(sondeo.probe_all(targets)) as results:
+                async for result in results:
+                    pending[result.codigo] = result
+                    now = time.monotonic()
+                    if now - last_push < SONDEO_REFRESCO and len(pending) < len(targets):
+                        continue
+                    last_push = now
+                    async with self:
+                        if self._sondeo_id != sondeo_id:
+                            break
+                        self._apply_sondeo(pending)
+                    pending = {}
+        except Exception as e:
+            logging.exception(f"Error probing devices: {e}")
+            async with self:
+                yield rx.toast.error("Error al sondear los dispositivos.")
+        finally:
+            async with self:
+                if self._sondeo_id == sondeo_id:
+                    self._apply_sondeo(pending)
+                    self.sondeo_segundos = f"{time.monotonic() - start:.1f}"
+                    self.is_probing = False
+                    self._sondeo_id = ""
+
+    @rx.event
+    def cancelar_sondeo(self):
+        self._sondeo_id = ""
+        self.is_probing = False
+        self.dispositivos = [
+            {**d, "sondeo": ""} if d["sondeo"] == "pendiente" else d
+            for d in self.dispositivos
+        ]
+
+    def _apply_sondeo(self, results: dict[int, sondeo.ResultadoSondeo]):
+        if not results:
+            return
+        self.sondeo_hechos += len(results)
+        self.sondeo_alcanzables += sum(1 for r in results.values() if r.alcanzable)
+        dispositivos = []
+        for dispositivo in self.dispositivos:
+            result = results.get(dispositivo["id"])
+            if result is not None:
+                dispositivo = dict(dispositivo)
+                dispositivo["sondeo"] = "ok" if result.alcanzable else result.error
+                dispositivo["latencia"] = (
+                    f"{result.latencia_ms:.0f} ms" if result.alcanzable else ""
+                )
+            dispositivos.append(dispositivo)
+        self.dispositivos = dispositivos
+
+    async def _marcas_hoy(self) -> dict[int, dict]:
+        """Today's per-device totals from the hourly rollup, keyed by codigo."""
+        try:
+            resumen = await transacciones_resumen.resumen_dia()
+        except Exception as e:
+            logging.exception(f"Error loading transaction summary: {e}")
+            return {}
+        return {item["dispositivo_id"]: item for item in resumen}
+
     @rx.event
     def set_search_query(self, query: str):
         self.search_query = query
@@ -67,6 +241,8 @@ class ConectividadState(DatabaseState):
                 "descripcion": "",
                 "activo": True,
                 "en_linea": False,
+                "host": "",
+                "puerto": "",
             }
         self.show_dialog = True
         self.error_message = ""
@@ -94,12 +270,22 @@ class ConectividadState(DatabaseState):
             logging.exception(f"Error converting code to int: {e}")
             self.error_message = "El código debe ser numérico."
             return
+        host = str(self.current_dispositivo.get("host", "") or "").strip() or None
+        port_str = str(self.current_dispositivo.get("puerto", "") or "").strip()
+        try:
+            port = int(port_str) if port_str else None
+        except ValueError:
+            self.error_message = "El puerto debe ser numérico."
+            return
+        if port is not None and not 0 < port < 65536:
+            self.error_message = "El puerto debe estar entre 1 y 65535."
+            return
         try:
             original_pk = self.current_dispositivo.get("id", 0)
             if original_pk == 0:
                 query = """
-                    INSERT INTO public.dispositivos (codigo, descripcion, activo, enlinea)
-                    VALUES (:codigo, :descripcion, :activo, :enlinea)
+                    INSERT INTO public.dispositivos (codigo, descripcion, activo, enlinea, host, puerto)
+                    VALUES (:codigo, :descripcion, :activo, false, :host, :puerto)
                 """
                 await self._execute_write(
                     query,
@@ -107,14 +293,16 @@ class ConectividadState(DatabaseState):
                         "codigo": code,
                         "descripcion": desc,
                         "activo": self.current_dispositivo.get("activo", True),
-                        "enlinea": self.current_dispositivo.get("en_linea", False),
+                        "host": host,
+                        "puerto": port,
                     },
                     target_db="novalink",
                 )
             else:
                 query = """
                     UPDATE public.dispositivos
-                    SET codigo = :new_codigo, descripcion = :descripcion, activo = :activo, enlinea = :enlinea
+                    SET codigo = :new_codigo, descripcion = :descripcion, activo = :activo,
+                        host = :host, puerto = :puerto
                     WHERE codigo = :original_pk
                 """
                 await self._execute_write(
@@ -124,7 +312,8 @@ class ConectividadState(DatabaseState):
                         "new_codigo": code,
                         "descripcion": desc,
                         "activo": self.current_dispositivo.get("activo", True),
-                        "enlinea": self.current_dispositivo.get("en_linea", False),
+                        "host": host,
+                        "puerto": port,
                     },
                     target_db="novalink",
                 )
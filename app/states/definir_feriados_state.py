@@ -2,9 +2,12 @@ import reflex as rx
 from typing import TypedDict, Literal
 import datetime
 import calendar
+import functools
 import logging
-from sqlalchemy import text
 from app.states.database_state import DatabaseState
+from app.utils import parametros
+from app.utils.feriados import FERIADOS_DB, feriados_resolver
+from app.utils.parametros import parametros_registry
 
 HolidayType = Literal[
     "descanso_obligatorio", "feriado_recuperable", "jornada_recuperacion"
@@ -27,6 +30,52 @@ class AdministrativeLevel(TypedDict):
     name: str
 
 
+MESES = (
+    "Enero",
+    "Febrero",
+    "Marzo",
+    "Abril",
+    "Mayo",
+    "Junio",
+    "Julio",
+    "Agosto",
+    "Septiembre",
+    "Octubre",
+    "Noviembre",
+    "Diciembre",
+)
+# Weeks start on Sunday, like the day headers of the page.
+PRIMER_DIA_SEMANA = calendar.SUNDAY
+
+
+@functools.lru_cache(maxsize=32)
+def calendar_grid(year: int, firstweekday: int = PRIMER_DIA_SEMANA) -> list[Month]:
+    """Weeks of each month of `year`, built once per process.
+
+    The grid does not depend on the holidays, so it is shared by every
+    session and must not be modified; day cells are styled from the
+    `holidays` dict on the client.
+    """
+    cal = calendar.Calendar(firstweekday=firstweekday)
+    return [
+        Month(
+            month_name=MESES[month_num - 1],
+            weeks=[
+                [
+                    Day(
+                        day_num=day_date.day,
+                        date_str=day_date.isoformat(),
+                        is_current_month=day_date.month == month_num,
+                    )
+                    for day_date in week
+                ]
+                for week in cal.monthdatescalendar(year, month_num)
+            ],
+        )
+        for month_num in range(1, 13)
+    ]
+
+
 class DefinirFeriadosState(DatabaseState):
     selected_year: int = datetime.date.today().year
     holidays: dict[str, HolidayType] = {}
@@ -35,20 +84,6 @@ class DefinirFeriadosState(DatabaseState):
     nivel_asociacion_numero: int = 0
     niveles_administrativos: list[AdministrativeLevel] = []
     nivel_administrativo_seleccionado: str = ""
-    spanish_months: dict[str, str] = {
-        "January": "Enero",
-        "February": "Febrero",
-        "March": "Marzo",
-        "April": "Abril",
-        "May": "Mayo",
-        "June": "Junio",
-        "July": "Julio",
-        "August": "Agosto",
-        "September": "Septiembre",
-        "October": "Octubre",
-        "November": "Noviembre",
-        "December": "Diciembre",
-    }
 
     @rx.event
     async def on_load(self):
@@ -63,15 +98,13 @@ class DefinirFeriadosState(DatabaseState):
             self.show_nivel_filter = False
             return
         try:
-            query = (
-                "SELECT codigo, valor FROM public.parametros WHERE codigo IN (20, 21)"
-            )
-            results = await self._execute_query(query, target_db="novalink")
-            params = {row["codigo"]: row["valor"] for row in results}
-            is_enabled = params.get(20, "0") == "1"
+            params = await parametros_registry.get("novalink")
+            is_enabled = params.activo(parametros.ASOCIAR_CALENDARIO)
             if is_enabled:
                 self.show_nivel_filter = True
-                self.nivel_asociacion_numero = int(params.get(21, "4"))
+                self.nivel_asociacion_numero = params.entero(
+                    parametros.NIVEL_ASOCIACION, 4
+                )
                 if self.nivel_asociacion_numero not in [1, 2, 3, 4, 5]:
                     logging.error(
                         f"Invalid association level number: {self.nivel_asociacion_numero}"
@@ -161,7 +194,7 @@ class DefinirFeriadosState(DatabaseState):
                     "cod_nivel": int(self.nivel_administrativo_seleccionado),
                 }
                 results_editable = await self._execute_query(
-                    query_editable, params_editable
+                    query_editable, params_editable, target_db=FERIADOS_DB
                 )
                 self.holidays = {
                     row["fecha"]: type_mapping.get(row["tipo"])
@@ -171,7 +204,7 @@ class DefinirFeriadosState(DatabaseState):
                 query_readonly = "SELECT fecha::text as fecha, tipo FROM feriados WHERE anio = :year AND codigoniveladm = -1"
                 params_readonly = {"year": self.selected_year}
                 results_readonly = await self._execute_query(
-                    query_readonly, params_readonly
+                    query_readonly, params_readonly, target_db=FERIADOS_DB
                 )
                 self.readonly_holidays = {
                     row["fecha"]: type_mapping.get(row["tipo"])
@@ -181,7 +214,9 @@ class DefinirFeriadosState(DatabaseState):
             else:
                 query = "SELECT fecha::text as fecha, tipo FROM feriados WHERE anio = :year AND codigoniveladm = -1"
                 params = {"year": self.selected_year}
-                results = await self._execute_query(query, params)
+                results = await self._execute_query(
+                    query, params, target_db=FERIADOS_DB
+                )
                 self.holidays = {
                     row["fecha"]: type_mapping.get(row["tipo"])
                     for row in results
@@ -230,18 +265,9 @@ class DefinirFeriadosState(DatabaseState):
 
             base_state = await self.get_state(BaseState)
             user = base_state.logged_user_name or "system"
-            engine = self._get_db_engine(base_state.current_database_name or "novalink")
-            if not engine:
-                return rx.toast.error("No hay conexión a la base de datos")
-            params_query = (
-                "SELECT codigo, valor FROM public.parametros WHERE codigo IN (4, 20)"
-            )
-            params_result = await self._execute_query(
-                params_query, target_db="novalink"
-            )
-            params_map = {row["codigo"]: row["valor"] for row in params_result}
-            param_4 = int(params_map.get(4, "4"))
-            param_20 = params_map.get(20, "0")
+            params = await parametros_registry.get("novalink")
+            param_4 = params.niveles_habilitados(4)
+            param_20 = params.texto(parametros.ASOCIAR_CALENDARIO, "0")
             nivelasociacion = 0
             codigoniveladm = -1
             if param_20 == "0":
@@ -261,41 +287,70 @@ class DefinirFeriadosState(DatabaseState):
                 "feriado_recuperable": 2,
                 "jornada_recuperacion": 3,
             }
-            with engine.begin() as conn:
-                conn.execute(
-                    text(
-                        "DELETE FROM feriados WHERE anio = :year AND codigoniveladm = :cod_nivel"
+            fechas: list[datetime.date] = []
+            tipos: list[int] = []
+            for date_str, type_str in self.holidays.items():
+                dt = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
+                if dt.year == self.selected_year:
+                    fechas.append(dt)
+                    tipos.append(type_mapping_rev.get(type_str, 1))
+            # One statement whatever the number of dates: rows whose date or
+            # type changed are deleted, new ones inserted, the rest untouched.
+            # Both sides see the rows as they were before the statement.
+            async with self._db_transaction(FERIADOS_DB) as conn:
+                cambios = await conn.execute(
+                    """
+                    WITH editado AS (
+                        SELECT fecha, tipo
+                        FROM unnest(CAST(:fechas AS date[]), CAST(:tipos AS integer[]))
+                            AS e(fecha, tipo)
                     ),
-                    {"year": self.selected_year, "cod_nivel": codigoniveladm},
-                )
-                for date_str, type_str in self.holidays.items():
-                    dt = datetime.datetime.strptime(date_str, "%Y-%m-%d")
-                    if dt.year == self.selected_year:
-                        tipo_val = type_mapping_rev.get(type_str, 1)
-                        insert_query = """
-                            INSERT INTO feriados (
-                                fecha, anio, mes, dia, fila, 
-                                nivelasociacion, codigoniveladm, 
-                                usuario, fechahoraauditoria, tipo, horas
-                            ) VALUES (
-                                :fecha, :anio, :mes, :dia, 1,
-                                :nivel_asoc, :cod_nivel,
-                                :usuario, NOW(), :tipo, 0
-                            )
-                        """
-                        conn.execute(
-                            text(insert_query),
-                            {
-                                "fecha": date_str,
-                                "anio": dt.year,
-                                "mes": dt.month,
-                                "dia": dt.day,
-                                "usuario": user,
-                                "tipo": tipo_val,
-                                "nivel_asoc": nivelasociacion,
-                                "cod_nivel": codigoniveladm,
-                            },
+                    borrados AS (
+                        DELETE FROM feriados f
+                        WHERE f.anio = :year AND f.codigoniveladm = :cod_nivel
+                        AND NOT EXISTS (
+                            SELECT 1 FROM editado e
+                            WHERE e.fecha = f.fecha AND e.tipo = f.tipo
+                        )
+                        RETURNING 1
+                    ),
+                    insertados AS (
+                        INSERT INTO feriados (
+                            fecha, anio, mes, dia, fila,
+                            nivelasociacion, codigoniveladm,
+                            usuario, fechahoraauditoria, tipo, horas
                         )
+                        SELECT e.fecha, :year, EXTRACT(MONTH FROM e.fecha),
+                               EXTRACT(DAY FROM e.fecha), 1,
+                               :nivel_asoc, :cod_nivel,
+                               :usuario, NOW(), e.tipo, 0
+                        FROM editado e
+                        WHERE NOT EXISTS (
+                            SELECT 1 FROM feriados f
+                            WHERE f.anio = :year AND f.codigoniveladm = :cod_nivel
+                            AND f.fecha = e.fecha AND f.tipo = e.tipo
+                        )
+                        RETURNING 1
+                    )
+                    SELECT (SELECT COUNT(*) FROM borrados) AS borrados,
+                           (SELECT COUNT(*) FROM insertados) AS insertados
+                    """,
+                    {
+                        "fechas": fechas,
+                        "tipos": tipos,
+                        "year": self.selected_year,
+                        "cod_nivel": codigoniveladm,
+                        "nivel_asoc": nivelasociacion,
+                        "usuario": user,
+                    },
+                )
+            borrados, insertados = cambios[0]["borrados"], cambios[0]["insertados"]
+            logging.info(
+                f"Holidays {self.selected_year} level {codigoniveladm}: "
+                f"{borrados} rows deleted, {insertados} inserted"
+            )
+            if borrados or insertados:
+                feriados_resolver.invalidate(FERIADOS_DB, self.selected_year)
             return rx.toast.success(
                 f"Feriados del año {self.selected_year} guardados correctamente."
             )
@@ -312,24 +367,4 @@ class DefinirFeriadosState(DatabaseState):
 
     @rx.var
     def calendar_data(self) -> list[Month]:
-        year = self.selected_year
-        months_data = []
-        cal = calendar.Calendar(firstweekday=6)
-        for month_num in range(1, 13):
-            month_name_en = datetime.date(year, month_num, 1).strftime("%B")
-            month_name_es = self.spanish_months.get(month_name_en, month_name_en)
-            month_calendar = cal.monthdatescalendar(year, month_num)
-            weeks_data = []
-            for week in month_calendar:
-                week_days = []
-                for day_date in week:
-                    week_days.append(
-                        {
-                            "day_num": day_date.day,
-                            "date_str": day_date.strftime("%Y-%m-%d"),
-                            "is_current_month": day_date.month == month_num,
-                        }
-                    )
-                weeks_data.append(week_days)
-            months_data.append({"month_name": month_name_es, "weeks": weeks_data})
-        return months_data
\ No newline at end of file
+        return calendar_grid(self.selected_year)
@@ -1,9 +1,14 @@
 import reflex as rx
 from typing import TypedDict, Any, Optional
 import logging
+import asyncio
+import time
 import hashlib
-import datetime
 from app.states.database_state import DatabaseState
+from app.utils import search
+from app.utils.catalogs import fetch_catalogs
+from app.utils import parametros
+from app.utils.parametros import parametros_registry
 
 
 class Employee(TypedDict):
@@ -40,6 +45,14 @@ class Employee(TypedDict):
     fechamodificacion: str
 
 
+class EmployeeListItem(TypedDict):
+    id: int
+    cedula: str
+    nombres: str
+    apellidos: str
+    activo: bool
+
+
 class CatalogItem(TypedDict):
     id: int
     descripcion: str
@@ -50,8 +63,94 @@ class HierarchyItem(TypedDict):
     name: str
 
 
+EMPLOYEE_PAGE_SIZE = 50
+EMPLOYEE_SELECT = """
+    SELECT
+        id, cedula, nombres, apellidos, correoelectronico,
+        transporte, alimentacion, zona,
+        COALESCE(to_char(fechacalculovacaciones, 'YYYY-MM-DD'), '') as fechacalculovacaciones,
+        COALESCE(to_char(fechaingreso, 'YYYY-MM-DD'), '') as fechaingreso,
+        ganarecargonocturno, ganasobretiempo, stconautorizacion,
+        ganarecargodialibre, offline,
+        niveladm1, niveladm2, niveladm3, niveladm4, niveladm5,
+        cargo, tipo, grupo, atributotabular, atributotexto,
+        accesoweb, pwd, activo,
+        COALESCE(nivelautorizacion, 0) as nivelautorizacion,
+        COALESCE(to_char(fechacreacion, 'YYYY-MM-DD HH24:MI:SS'), '') as fechacreacion,
+        COALESCE(to_char(fechamodificacion, 'YYYY-MM-DD HH24:MI:SS'), '') as fechamodificacion
+    FROM public.empleados
+"""
+EMPLOYEE_LIST_COLUMNS = """
+    id, COALESCE(cedula, '') as cedula, COALESCE(nombres, '') as nombres,
+    COALESCE(apellidos, '') as apellidos, COALESCE(activo, true) as activo
+"""
+
+
+def _employee_from_row(row: dict) -> Employee:
+    return Employee(
+        id=row["id"],
+        cedula=row["cedula"] or "",
+        nombres=row["nombres"] or "",
+        apellidos=row["apellidos"] or "",
+        correoelectronico=row["correoelectronico"] or "",
+        transporte=bool(row.get("transporte", False)),
+        alimentacion=bool(row.get("alimentacion", False)),
+        zona=row.get("zona") or 0,
+        fechacalculovacaciones=row["fechacalculovacaciones"],
+        fechaingreso=row["fechaingreso"],
+        ganarecargonocturno=bool(row["ganarecargonocturno"]),
+        ganasobretiempo=bool(row["ganasobretiempo"]),
+        stconautorizacion=bool(row["stconautorizacion"]),
+        ganarecargodialibre=bool(row["ganarecargodialibre"]),
+        offline=bool(row["offline"]),
+        niveladm1=row["niveladm1"] or 0,
+        niveladm2=row["niveladm2"] or 0,
+        niveladm3=row["niveladm3"] or 0,
+        niveladm4=row["niveladm4"] or 0,
+        niveladm5=row["niveladm5"] or 0,
+        cargo=row["cargo"] or 0,
+        tipo=row["tipo"] or 0,
+        grupo=row["grupo"] or 0,
+        atributotabular=row["atributotabular"] or 0,
+        atributotexto=row["atributotexto"] or "",
+        accesoweb=bool(row["accesoweb"]),
+        pwd=row["pwd"] or "",
+        activo=bool(row["activo"]),
+        nivelautorizacion=row.get("nivelautorizacion") or 0,
+        fechacreacion=row["fechacreacion"],
+        fechamodificacion=row["fechamodificacion"],
+    )
+
+
+def _list_item_from_row(row: dict) -> EmployeeListItem:
+    return EmployeeListItem(
+        id=row["id"],
+        cedula=row["cedula"],
+        nombres=row["nombres"],
+        apellidos=row["apellidos"],
+        activo=bool(row["activo"]),
+    )
+
+
+CATALOG_FIELDS = {
+    "cat_nivel1": "niveladm1",
+    "cat_nivel2": "niveladm2",
+    "cat_nivel3": "niveladm3",
+    "cat_nivel4": "niveladm4",
+    "cat_nivel5": "niveladm5",
+    "cat_cargos": "cargos",
+    "cat_grupos": "grupos",
+    "cat_tipos": "tipoempleado",
+    "cat_attr_tabular": "atributotabularemp",
+}
+
+
 class EmpleadosState(DatabaseState):
-    employees: list[Employee] = []
+    employees: list[EmployeeListItem] = []
+    recent_employees: list[EmployeeListItem] = []
+    has_more_employees: bool = False
+    is_searching: bool = False
+    _employee_cursor: dict = {}
     selected_employee: Employee = {
         "id": 0,
         "cedula": "",
@@ -127,8 +226,7 @@ class EmpleadosState(DatabaseState):
     def filtered_hierarchy_employees(self) -> list[HierarchyItem]:
         if len(self.hierarchy_search_query) < 3:
             return []
-        query = self.hierarchy_search_query.lower()
-        return [emp for emp in self.available_employees if query in emp["name"].lower()]
+        return self.available_employees
 
     @rx.var
     def selected_hierarchy_employee_name(self) -> str:
@@ -140,8 +238,9 @@ class EmpleadosState(DatabaseState):
         return ""
 
     @rx.event
-    def set_hierarchy_search_query(self, value: str):
+    async def set_hierarchy_search_query(self, value: str):
         self.hierarchy_search_query = value
+        await self.load_available_employees()
 
     @rx.event
     def select_hierarchy_employee_from_search(self, emp_id: int):
@@ -182,39 +281,10 @@ class EmpleadosState(DatabaseState):
         self.is_email_editable = not self.is_email_editable
 
     @rx.var
-    def recent_employees(self) -> list[Employee]:
-        if not self.employees:
-            return []
-        cutoff = (datetime.datetime.now() - datetime.timedelta(days=7)).strftime(
-            "%Y-%m-%d %H:%M:%S"
-        )
-
-        @rx.event
-        def get_sort_date(e: Employee):
-            d1 = e.get("fechacreacion") or ""
-            d2 = e.get("fechamodificacion") or ""
-            return max(d1, d2)
-
-        recent = [e for e in self.employees if get_sort_date(e) >= cutoff]
-        recent.sort(key=get_sort_date, reverse=True)
-        return recent[:10]
-
-    @rx.var
-    def filtered_employees(self) -> list[Employee]:
+    def filtered_employees(self) -> list[EmployeeListItem]:
         if len(self.search_query) < 3:
             return self.recent_employees
-        items = self.employees
-        if not self.show_inactive:
-            items = [e for e in items if e["activo"]]
-        q = self.search_query.lower()
-        items = [
-            e
-            for e in items
-            if q in e["nombres"].lower()
-            or q in e["apellidos"].lower()
-            or q in e["cedula"].lower()
-        ]
-        return items
+        return self.employees
 
     @rx.var
     def form_title(self) -> str:
@@ -227,12 +297,14 @@ class EmpleadosState(DatabaseState):
         return self.selected_employee["accesoweb"]
 
     @rx.event
-    def set_search_query(self, value: str):
+    async def set_search_query(self, value: str):
         self.search_query = value
+        await self.search_employees()
 
     @rx.event
-    def set_show_inactive(self, value: bool):
+    async def set_show_inactive(self, value: bool):
         self.show_inactive = value
+        await self.search_employees()
 
     @rx.event
     def set_field(self, field: str, value: Any):
@@ -305,10 +377,18 @@ class EmpleadosState(DatabaseState):
         self.is_editing = True
 
     @rx.event
-    async def select_employee(self, employee: Employee):
-        self.editing_employee_id = employee["id"]
-        self.selected_employee = employee.copy()
-        self.id_input = f"{employee['id']:010d}"
+    async def select_employee(self, employee: EmployeeListItem):
+        """Load the full record of a list item (the list only carries display columns)."""
+        rows = await self._execute_query(
+            f"{EMPLOYEE_SELECT} WHERE id = :id", {"id": employee["id"]}, target_db="novalink"
+        )
+        if not rows:
+            yield rx.toast.error("No se encontró el empleado seleccionado.")
+            return
+        full = _employee_from_row(rows[0])
+        self.editing_employee_id = full["id"]
+        self.selected_employee = full
+        self.id_input = f"{full['id']:010d}"
         self.is_editing = True
         self.is_email_editable = False
         await self.load_hierarchy()
@@ -319,175 +399,15 @@ class EmpleadosState(DatabaseState):
         self.is_email_editable = False
         self.new_employee()
 
-    async def _ensure_tables(self):
-        if not self.has_db_connection:
-            return
-        try:
-            query = """
-                CREATE TABLE IF NOT EXISTS public.empleados (
-                    id BIGINT PRIMARY KEY,
-                    cedula VARCHAR(20),
-                    apellidos VARCHAR(50),
-                    nombres VARCHAR(50),
-                    correoelectronico VARCHAR(50),
-                    telefono VARCHAR(50) DEFAULT '',
-                    direccion VARCHAR(200) DEFAULT '',
-                    fechanacimiento DATE DEFAULT NOW(),
-                    solotarjeta BOOLEAN DEFAULT false,
-                    ganarecargonocturno BOOLEAN DEFAULT false,
-                    ganasobretiempo BOOLEAN DEFAULT false,
-                    stconautorizacion BOOLEAN DEFAULT false,
-                    ganarecargodialibre BOOLEAN DEFAULT false,
-                    offline BOOLEAN DEFAULT false,
-                    niveladm1 BIGINT DEFAULT 0,
-                    niveladm2 BIGINT DEFAULT 0,
-                    niveladm3 BIGINT DEFAULT 0,
-                    niveladm4 BIGINT DEFAULT 0,
-                    niveladm5 BIGINT DEFAULT 0,
-                    cargo BIGINT DEFAULT 0,
-                    tipo BIGINT DEFAULT 0,
-                    grupo BIGINT DEFAULT 0,
-                    atributotabular BIGINT DEFAULT 0,
-                    atributotexto VARCHAR(10),
-                    accesoweb BOOLEAN DEFAULT false,
-                    pwd TEXT,
-                    activo BOOLEAN DEFAULT true,
-                    fechacreacion TIMESTAMP DEFAULT NOW(),
-                    usuario BIGINT DEFAULT 1,
-                    usuariocrea BIGINT DEFAULT 1,
-                    fechamodificacion TIMESTAMP,
-                    usuariomodifica BIGINT,
-                    nivelautorizacion SMALLINT DEFAULT 0
-                )
-            """
-            await self._execute_write(query, target_db="novalink")
-            try:
-                await self._execute_write(
-                    "ALTER TABLE public.empleados DISABLE TRIGGER tr_log_empleados",
-                    target_db="novalink",
-                )
-            except Exception as e:
-                logging.exception(
-                    f"Could not disable trigger tr_log_empleados (might not exist): {e}"
-                )
-            try:
-                alter_query_usr = "ALTER TABLE public.empleados ADD COLUMN IF NOT EXISTS usuario BIGINT DEFAULT 1"
-                await self._execute_write(alter_query_usr, target_db="novalink")
-                alter_query = "ALTER TABLE public.empleados ADD COLUMN IF NOT EXISTS grupo BIGINT DEFAULT 0"
-                await self._execute_write(alter_query, target_db="novalink")
-                alter_query_tel = "ALTER TABLE public.empleados ADD COLUMN IF NOT EXISTS telefono VARCHAR(50) DEFAULT ''"
-                await self._execute_write(alter_query_tel, target_db="novalink")
-                mod_query_tel = "ALTER TABLE public.empleados ALTER COLUMN telefono TYPE VARCHAR(50), ALTER COLUMN telefono SET DEFAULT ''"
-                await self._execute_write(mod_query_tel, target_db="novalink")
-                fix_nulls_tel = (
-                    "UPDATE public.empleados SET telefono = '' WHERE telefono IS NULL"
-                )
-                await self._execute_write(fix_nulls_tel, target_db="novalink")
-                alter_query_dir = "ALTER TABLE public.empleados ADD COLUMN IF NOT EXISTS direccion VARCHAR(200) DEFAULT ''"
-                await self._execute_write(alter_query_dir, target_db="novalink")
-                mod_query_dir = "ALTER TABLE public.empleados ALTER COLUMN direccion TYPE VARCHAR(200), ALTER COLUMN direccion SET DEFAULT ''"
-                await self._execute_write(mod_query_dir, target_db="novalink")
-                fix_nulls_dir = (
-                    "UPDATE public.empleados SET direccion = '' WHERE direccion IS NULL"
-                )
-                await self._execute_write(fix_nulls_dir, target_db="novalink")
-                alter_query_fnac = "ALTER TABLE public.empleados ADD COLUMN IF NOT EXISTS fechanacimiento DATE DEFAULT NOW()"
-                await self._execute_write(alter_query_fnac, target_db="novalink")
-                alter_query_st = "ALTER TABLE public.empleados ADD COLUMN IF NOT EXISTS solotarjeta BOOLEAN DEFAULT false"
-                await self._execute_write(alter_query_st, target_db="novalink")
-                fix_nulls_st = "UPDATE public.empleados SET solotarjeta = false WHERE solotarjeta IS NULL"
-                await self._execute_write(fix_nulls_st, target_db="novalink")
-                alter_query_auth = "ALTER TABLE public.empleados ADD COLUMN IF NOT EXISTS nivelautorizacion SMALLINT DEFAULT 0"
-                await self._execute_write(alter_query_auth, target_db="novalink")
-                fix_nulls_query = "UPDATE public.empleados SET nivelautorizacion = 0 WHERE nivelautorizacion IS NULL"
-                await self._execute_write(fix_nulls_query, target_db="novalink")
-                force_default_query = "ALTER TABLE public.empleados ALTER COLUMN nivelautorizacion SET DEFAULT 0"
-                await self._execute_write(force_default_query, target_db="novalink")
-            finally:
-                try:
-                    await self._execute_write(
-                        "ALTER TABLE public.empleados ENABLE TRIGGER tr_log_empleados",
-                        target_db="novalink",
-                    )
-                except Exception as e:
-                    logging.exception(f"Could not enable trigger tr_log_empleados: {e}")
-        except Exception as e:
-            logging.exception(f"Error ensuring empleados table: {e}")
-
     @rx.event
     async def on_load(self):
-        await self._ensure_tables()
-        await self._ensure_jerarquias_table()
-        await self._drop_fk_constraints()
-        await self.load_config()
-        await self.load_catalogs()
-        await self.load_employees()
-
-    async def _drop_fk_constraints(self):
-        """Drop foreign key constraints to allow saving with default values (0)."""
-        if not self.has_db_connection:
-            return
-        try:
-            query_find = """
-                SELECT constraint_name 
-                FROM information_schema.table_constraints 
-                WHERE table_name = 'empleados' 
-                AND constraint_type = 'FOREIGN KEY' 
-                AND table_schema = 'public'
-            """
-            results = await self._execute_query(query_find, target_db="novalink")
-            for row in results:
-                constraint = row["constraint_name"]
-                logging.info(f"Dropping FK constraint: {constraint}")
-                drop_query = (
-                    f'ALTER TABLE public.empleados DROP CONSTRAINT "{constraint}"'
-                )
-                await self._execute_write(drop_query, target_db="novalink")
-        except Exception as e:
-            logging.exception(f"Error dropping foreign keys: {e}")
-
-    async def _ensure_jerarquias_table(self):
-        if not self.has_db_connection:
-            return
-        try:
-            query = """
-                CREATE TABLE IF NOT EXISTS public.jerarquias (
-                    id SERIAL PRIMARY KEY,
-                    superior BIGINT,
-                    subalterno BIGINT,
-                    fechacreacion TIMESTAMP DEFAULT NOW(),
-                    usuariocrea BIGINT
-                )
-            """
-            await self._execute_write(query, target_db="novalink")
-            drop_cols = [
-                "empleado_superior",
-                "empleado_subordinado",
-                "usuario",
-                "subordinado",
-            ]
-            for col in drop_cols:
-                try:
-                    await self._execute_write(
-                        f"ALTER TABLE public.jerarquias DROP COLUMN IF EXISTS {col}",
-                        target_db="novalink",
-                    )
-                except Exception as e:
-                    logging.exception(
-                        f"Could not drop column {col} from jerarquias: {e}"
-                    )
-            alter_superior = (
-                "ALTER TABLE public.jerarquias ADD COLUMN IF NOT EXISTS superior BIGINT"
-            )
-            await self._execute_write(alter_superior, target_db="novalink")
-            alter_subalterno = "ALTER TABLE public.jerarquias ADD COLUMN IF NOT EXISTS subalterno BIGINT"
-            await self._execute_write(alter_subalterno, target_db="novalink")
-            alter_fecha = "ALTER TABLE public.jerarquias ADD COLUMN IF NOT EXISTS fechacreacion TIMESTAMP DEFAULT NOW()"
-            await self._execute_write(alter_fecha, target_db="novalink")
-            alter_usuariocrea = "ALTER TABLE public.jerarquias ADD COLUMN IF NOT EXISTS usuariocrea BIGINT"
-            await self._execute_write(alter_usuariocrea, target_db="novalink")
-        except Exception as e:
-            logging.exception(f"Error ensuring jerarquias table: {e}")
+        start = time.perf_counter()
+        await asyncio.gather(
+            self.load_config(), self.load_catalogs(), self.load_employees()
+        )
+        logging.info(
+            f"⏱️ Empleados page data loaded in {(time.perf_counter() - start) * 1000:.1f} ms"
+        )
 
     @rx.event
     async def load_hierarchy(self):
@@ -581,26 +501,25 @@ class EmpleadosState(DatabaseState):
 
     @rx.event
     async def load_available_employees(self):
-        """Load employees for selection, excluding current and already related."""
+        """Search active employees for the hierarchy dialog, excluding current and already related."""
         self.available_employees = []
-        if not self.has_db_connection:
+        if not self.has_db_connection or len(self.hierarchy_search_query) < 3:
             return
         try:
-            query = """
-                SELECT id, cedula || ' - ' || apellidos || ' ' || nombres as name
-                FROM public.empleados
-                WHERE activo = true
-                ORDER BY apellidos, nombres
-            """
-            results = await self._execute_query(query, target_db="novalink")
-            current_id = self.selected_employee["id"]
-            existing_ids = {current_id}
+            existing_ids = {self.selected_employee["id"]}
             existing_ids.update((s["id"] for s in self.superiores))
             existing_ids.update((s["id"] for s in self.subalternos))
+            results = await search.search(
+                "novalink",
+                "empleados",
+                ("apellidos", "nombres", "cedula"),
+                self.hierarchy_search_query,
+                select="id, COALESCE(cedula, '') || ' - ' || COALESCE(apellidos, '') || ' ' || COALESCE(nombres, '') as name",
+                filters=("activo = true", "id <> ALL(:excluir)"),
+                params={"excluir": list(existing_ids)},
+            )
             self.available_employees = [
-                HierarchyItem(id=row["id"], name=row["name"])
-                for row in results
-                if row["id"] not in existing_ids
+                HierarchyItem(id=row["id"], name=row["name"]) for row in results
             ]
         except Exception as e:
             logging.exception(f"Error loading available employees: {e}")
@@ -683,108 +602,110 @@ class EmpleadosState(DatabaseState):
         if not self.has_db_connection:
             return
         try:
-            query = "SELECT codigo, valor FROM public.parametros WHERE codigo IN (4, 5, 8, 11, 14, 17, 35, 36, 39, 40)"
-            results = await self._execute_query(query, target_db="novalink")
-            params = {row["codigo"]: row["valor"] for row in results}
-            self.niveles_habilitados = int(params.get(4, "5"))
+            params = await parametros_registry.get("novalink")
+            self.niveles_habilitados = params.niveles_habilitados()
             self.labels_niveles = {
-                "1": params.get(5, "Nivel 1"),
-                "2": params.get(8, "Nivel 2"),
-                "3": params.get(11, "Nivel 3"),
-                "4": params.get(14, "Nivel 4"),
-                "5": params.get(17, "Nivel 5"),
+                str(nivel): params.etiqueta_nivel(nivel) for nivel in range(1, 6)
             }
-            self.has_attr_tabular = params.get(35, "0") == "1"
-            self.label_attr_tabular = params.get(36, "Atributo Tabular")
-            self.has_attr_texto = params.get(39, "0") == "1"
-            self.label_attr_texto = params.get(40, "Atributo Texto")
+            self.has_attr_tabular = params.activo(parametros.ATRIBUTO_TABULAR)
+            self.label_attr_tabular = params.texto(
+                parametros.ETIQUETA_ATRIBUTO_TABULAR, "Atributo Tabular"
+            )
+            self.has_attr_texto = params.activo(parametros.ATRIBUTO_TEXTO)
+            self.label_attr_texto = params.texto(
+                parametros.ETIQUETA_ATRIBUTO_TEXTO, "Atributo Texto"
+            )
         except Exception as e:
             logging.exception(f"Error loading config: {e}")
 
-    async def _fetch_catalog(self, table: str) -> list[CatalogItem]:
+    @rx.event
+    async def load_catalogs(self):
+        """Load every dropdown source of the form from the shared catalog cache."""
+        catalogs = await fetch_catalogs("novalink")
+        for attr, table in CATALOG_FIELDS.items():
+            setattr(
+                self,
+                attr,
+                [
+                    CatalogItem(id=row["codigo"], descripcion=row["descripcion"])
+                    for row in catalogs.get(table, [])
+                ],
+            )
+
+    async def _fetch_employee_page(
+        self, after: dict | None = None
+    ) -> list[EmployeeListItem]:
+        """One ranked page of list columns from the shared search subsystem.
+
+        Keeps the keyset cursor of the last row in `_employee_cursor` and
+        fetches one extra row to know whether another page exists.
+        """
+        filters = () if self.show_inactive else ("activo = true",)
+        rows = await search.search(
+            "novalink",
+            "empleados",
+            ("apellidos", "nombres", "cedula"),
+            self.search_query,
+            select=EMPLOYEE_LIST_COLUMNS,
+            filters=filters,
+            limit=EMPLOYEE_PAGE_SIZE + 1,
+            after=after,
+        )
+        self.has_more_employees = len(rows) > EMPLOYEE_PAGE_SIZE
+        rows = rows[:EMPLOYEE_PAGE_SIZE]
+        self._employee_cursor = search.cursor_of(rows[-1]) if rows else {}
+        return [_list_item_from_row(row) for row in rows]
+
+    @rx.event
+    async def search_employees(self):
+        """Run the current search from the first page."""
+        if len(self.search_query) < 3:
+            self.employees = []
+            self.has_more_employees = False
+            return
+        self.is_searching = True
         try:
-            query = f"SELECT codigo, descripcion FROM public.{table} WHERE codigo > 0 AND activo = true ORDER BY descripcion"
-            results = await self._execute_query(query, target_db="novalink")
-            return [
-                CatalogItem(id=row["codigo"], descripcion=row["descripcion"])
-                for row in results
-            ]
+            self.employees = await self._fetch_employee_page()
         except Exception as e:
-            logging.exception(f"Error fetching catalog {table}: {e}")
-            return []
+            logging.exception(f"Error searching employees: {e}")
+            self.employees = []
+            self.has_more_employees = False
+        finally:
+            self.is_searching = False
 
     @rx.event
-    async def load_catalogs(self):
-        self.cat_nivel1 = await self._fetch_catalog("niveladm1")
-        self.cat_nivel2 = await self._fetch_catalog("niveladm2")
-        self.cat_nivel3 = await self._fetch_catalog("niveladm3")
-        self.cat_nivel4 = await self._fetch_catalog("niveladm4")
-        self.cat_nivel5 = await self._fetch_catalog("niveladm5")
-        self.cat_cargos = await self._fetch_catalog("cargos")
-        self.cat_grupos = await self._fetch_catalog("grupos")
-        self.cat_tipos = await self._fetch_catalog("tipoempleado")
-        self.cat_attr_tabular = await self._fetch_catalog("atributotabularemp")
+    async def load_more_employees(self):
+        """Append the next keyset page after the last loaded row."""
+        if not self.has_more_employees or not self._employee_cursor:
+            return
+        try:
+            page = await self._fetch_employee_page(after=self._employee_cursor)
+            self.employees = self.employees + page
+        except Exception as e:
+            logging.exception(f"Error loading more employees: {e}")
 
     @rx.event
-    async def load_employees(self):
+    async def load_recent_employees(self):
+        """Last 10 employees created or modified in the past 7 days."""
         try:
-            query = """
-                SELECT 
-                    id, cedula, nombres, apellidos, correoelectronico,
-                    transporte, alimentacion, zona,
-                    COALESCE(to_char(fechacalculovacaciones, 'YYYY-MM-DD'), '') as fechacalculovacaciones,
-                    COALESCE(to_char(fechaingreso, 'YYYY-MM-DD'), '') as fechaingreso,
-                    ganarecargonocturno, ganasobretiempo, stconautorizacion,
-                    ganarecargodialibre, offline,
-                    niveladm1, niveladm2, niveladm3, niveladm4, niveladm5,
-                    cargo, tipo, grupo, atributotabular, atributotexto,
-                    accesoweb, pwd, activo,
-                    COALESCE(nivelautorizacion, 0) as nivelautorizacion,
-                    COALESCE(to_char(fechacreacion, 'YYYY-MM-DD HH24:MI:SS'), '') as fechacreacion,
-                    COALESCE(to_char(fechamodificacion, 'YYYY-MM-DD HH24:MI:SS'), '') as fechamodificacion
+            query = f"""
+                SELECT {EMPLOYEE_LIST_COLUMNS}
                 FROM public.empleados
-                ORDER BY apellidos, nombres
+                WHERE GREATEST(fechacreacion, fechamodificacion) >= NOW() - INTERVAL '7 days'
+                ORDER BY GREATEST(fechacreacion, fechamodificacion) DESC
+                LIMIT 10
             """
             results = await self._execute_query(query, target_db="novalink")
-            self.employees = [
-                Employee(
-                    id=row["id"],
-                    cedula=row["cedula"] or "",
-                    nombres=row["nombres"] or "",
-                    apellidos=row["apellidos"] or "",
-                    correoelectronico=row["correoelectronico"] or "",
-                    transporte=bool(row.get("transporte", False)),
-                    alimentacion=bool(row.get("alimentacion", False)),
-                    zona=row.get("zona") or 0,
-                    fechacalculovacaciones=row["fechacalculovacaciones"],
-                    fechaingreso=row["fechaingreso"],
-                    ganarecargonocturno=bool(row["ganarecargonocturno"]),
-                    ganasobretiempo=bool(row["ganasobretiempo"]),
-                    stconautorizacion=bool(row["stconautorizacion"]),
-                    ganarecargodialibre=bool(row["ganarecargodialibre"]),
-                    offline=bool(row["offline"]),
-                    niveladm1=row["niveladm1"] or 0,
-                    niveladm2=row["niveladm2"] or 0,
-                    niveladm3=row["niveladm3"] or 0,
-                    niveladm4=row["niveladm4"] or 0,
-                    niveladm5=row["niveladm5"] or 0,
-                    cargo=row["cargo"] or 0,
-                    tipo=row["tipo"] or 0,
-                    grupo=row["grupo"] or 0,
-                    atributotabular=row["atributotabular"] or 0,
-                    atributotexto=row["atributotexto"] or "",
-                    accesoweb=bool(row["accesoweb"]),
-                    pwd=row["pwd"] or "",
-                    activo=bool(row["activo"]),
-                    nivelautorizacion=row.get("nivelautorizacion") or 0,
-                    fechacreacion=row["fechacreacion"],
-                    fechamodificacion=row["fechamodificacion"],
-                )
-                for row in results
-            ]
+            self.recent_employees = [_list_item_from_row(row) for row in results]
         except Exception as e:
-            logging.exception(f"Error loading employees: {e}")
-            self.employees = []
+            logging.exception(f"Error loading recent employees: {e}")
+            self.recent_employees = []
+
+    @rx.event
+    async def load_employees(self):
+        """Refresh the list panel: recent employees plus the active search, if any."""
+        await self.load_recent_employees()
+        await self.search_employees()
 
     @rx.event
     async def save_employee(self):
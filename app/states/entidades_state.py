@@ -2,6 +2,10 @@ import reflex as rx
 from typing import TypedDict
 import logging
 from app.states.database_state import DatabaseState
+from app.utils import search
+from app.utils.catalogs import catalog_cache, format_timestamp
+from app.utils import parametros
+from app.utils.parametros import parametros_registry
 
 
 class EntidadItem(TypedDict):
@@ -18,12 +22,24 @@ class NivelConfig(TypedDict):
     label: str
 
 
+def _item_from_row(row: dict) -> EntidadItem:
+    return EntidadItem(
+        codigo=row["codigo"],
+        descripcion=row["descripcion"],
+        fecha_creacion=row["fecha_creacion"],
+        usuario=row["usuario"],
+        parent_id=int(row["parent_id"]),
+        activo=bool(row.get("activo", True)),
+    )
+
+
 class EntidadesState(DatabaseState):
     items: list[EntidadItem] = []
     niveles_config: list[NivelConfig] = []
     selected_nivel: str = "1"
     table_name: str = "niveladm1"
     search_query: str = ""
+    search_results: list[EntidadItem] = []
     show_inactive: bool = False
     selected_item: EntidadItem = {
         "codigo": 0,
@@ -45,21 +61,21 @@ class EntidadesState(DatabaseState):
 
     @rx.var
     def filtered_items(self) -> list[EntidadItem]:
-        items = self.items
+        if self.search_query.strip():
+            return self.search_results
         if not self.show_inactive:
-            items = [i for i in items if i.get("activo", True)]
-        if self.search_query:
-            q = self.search_query.lower()
-            items = [i for i in items if q in i["descripcion"].lower()]
-        return items
+            return [i for i in self.items if i.get("activo", True)]
+        return self.items
 
     @rx.event
-    def set_show_inactive(self, value: bool):
+    async def set_show_inactive(self, value: bool):
         self.show_inactive = value
+        await self.search_items()
 
     @rx.event
-    def set_search_query(self, value: str):
+    async def set_search_query(self, value: str):
         self.search_query = value
+        await self.search_items()
 
     @rx.event
     def set_selected_item_description(self, value: str):
@@ -137,79 +153,10 @@ class EntidadesState(DatabaseState):
         self.selected_parent_nivel3 = ""
         self.selected_parent_nivel4 = ""
 
-    async def _ensure_activo_columns(self):
-        """Ensure 'activo' column exists in all niveladm tables and cargos table."""
-        if not self.has_db_connection:
-            return
-        from app.states.base_state import BaseState
-
-        base_state = await self.get_state(BaseState)
-        target_db = base_state.current_database_name or "novalink"
-        for i in range(1, 6):
-            try:
-                query = f"ALTER TABLE public.niveladm{i} ADD COLUMN IF NOT EXISTS activo BOOLEAN DEFAULT true"
-                await self._execute_write(query, target_db=target_db)
-            except Exception as e:
-                logging.exception(
-                    f"Migration: Could not add column 'activo' to niveladm{i}: {e}"
-                )
-        try:
-            query = "ALTER TABLE public.cargos ADD COLUMN IF NOT EXISTS activo BOOLEAN DEFAULT true"
-            await self._execute_write(query, target_db=target_db)
-        except Exception as e:
-            logging.exception(
-                f"Migration: Could not add column 'activo' to cargos: {e}"
-            )
-        try:
-            query = "ALTER TABLE public.grupos ADD COLUMN IF NOT EXISTS activo BOOLEAN DEFAULT true"
-            await self._execute_write(query, target_db=target_db)
-        except Exception as e:
-            logging.exception(
-                f"Migration: Could not add column 'activo' to grupos: {e}"
-            )
-        try:
-            create_query = """
-                CREATE TABLE IF NOT EXISTS public.atributotabularemp (
-                    codigo INTEGER PRIMARY KEY,
-                    descripcion TEXT,
-                    niveladm1 INTEGER,
-                    fechacreacion TIMESTAMP,
-                    usuario TEXT,
-                    activo BOOLEAN DEFAULT true
-                )
-            """
-            await self._execute_write(create_query, target_db=target_db)
-            query_nivel = "ALTER TABLE public.atributotabularemp ADD COLUMN IF NOT EXISTS niveladm1 INTEGER"
-            await self._execute_write(query_nivel, target_db=target_db)
-            query = "ALTER TABLE public.atributotabularemp ADD COLUMN IF NOT EXISTS activo BOOLEAN DEFAULT true"
-            await self._execute_write(query, target_db=target_db)
-        except Exception as e:
-            logging.exception(
-                f"Migration: Could not ensure atributotabularemp table/column: {e}"
-            )
-        try:
-            create_query = """
-                CREATE TABLE IF NOT EXISTS public.tipoempleado (
-                    codigo INTEGER PRIMARY KEY,
-                    descripcion TEXT,
-                    fechacreacion TIMESTAMP,
-                    usuario TEXT,
-                    activo BOOLEAN DEFAULT true
-                )
-            """
-            await self._execute_write(create_query, target_db=target_db)
-            query = "ALTER TABLE public.tipoempleado ADD COLUMN IF NOT EXISTS activo BOOLEAN DEFAULT true"
-            await self._execute_write(query, target_db=target_db)
-        except Exception as e:
-            logging.exception(
-                f"Migration: Could not ensure tipoempleado table/column: {e}"
-            )
-
     @rx.event
     async def on_load(self):
         """Load initial data."""
         logging.info("🔄 Cargando datos iniciales de Entidades...")
-        await self._ensure_activo_columns()
         await self.load_config()
         self.table_name = f"niveladm{self.selected_nivel}"
         await self.load_items()
@@ -240,11 +187,11 @@ class EntidadesState(DatabaseState):
                 logging.exception(f"Error parsing selected level: {e}")
                 return
         try:
-            query = f"SELECT codigo, descripcion FROM public.{parent_table} ORDER BY descripcion"
-            results = await self._execute_query(query)
+            db_name = await self._resolve_target_db()
+            rows = await catalog_cache.get(db_name, parent_table)
             items = [
                 {"codigo": str(row["codigo"]), "descripcion": row["descripcion"]}
-                for row in results
+                for row in rows
             ]
             if target_list == "nivel1":
                 self.parent_items_nivel1 = items
@@ -257,87 +204,72 @@ class EntidadesState(DatabaseState):
         except Exception as e:
             logging.exception(f"Error loading parent items from {parent_table}: {e}")
 
+    def _parent_column(self) -> str | None:
+        """Column holding the parent level of the selected level, if it has one."""
+        if self.selected_nivel in ("cargos", "grupos", "atributo"):
+            return "niveladm1"
+        if self.selected_nivel in ("2", "3", "4", "5"):
+            return f"niveladm{int(self.selected_nivel) - 1}"
+        return None
+
+    def _item_columns(self) -> str:
+        """Projection used by the search for the selected level."""
+        parent_col = self._parent_column()
+        return f"""
+            codigo,
+            descripcion,
+            COALESCE(to_char(fechacreacion, 'YYYY-MM-DD HH24:MI'), '') as fecha_creacion,
+            COALESCE(usuario, '') as usuario,
+            COALESCE(activo, true) as activo,
+            {f"COALESCE({parent_col}, 0)" if parent_col else "0"} as parent_id
+        """
+
     @rx.event
     async def load_items(self):
         if not self.table_name:
             return
         try:
-            if self.selected_nivel == "cargos":
-                query = """
-                    SELECT 
-                        codigo,
-                        descripcion,
-                        COALESCE(to_char(fechacreacion, 'YYYY-MM-DD HH24:MI'), '') as fecha_creacion,
-                        COALESCE(usuario, '') as usuario,
-                        COALESCE(activo, true) as activo,
-                        COALESCE(niveladm1, 0) as parent_id
-                    FROM public.cargos 
-                    ORDER BY descripcion ASC
-                """
-            elif self.selected_nivel == "grupos":
-                query = """
-                    SELECT 
-                        codigo,
-                        descripcion,
-                        COALESCE(to_char(fechacreacion, 'YYYY-MM-DD HH24:MI'), '') as fecha_creacion,
-                        COALESCE(usuario, '') as usuario,
-                        COALESCE(activo, true) as activo,
-                        COALESCE(niveladm1, 0) as parent_id
-                    FROM public.grupos 
-                    ORDER BY descripcion ASC
-                """
-            elif self.selected_nivel == "tipoempleado":
-                query = """
-                    SELECT 
-                        codigo,
-                        descripcion,
-                        COALESCE(to_char(fechacreacion, 'YYYY-MM-DD HH24:MI'), '') as fecha_creacion,
-                        COALESCE(usuario, '') as usuario,
-                        COALESCE(activo, true) as activo,
-                        0 as parent_id
-                    FROM public.tipoempleado 
-                    ORDER BY descripcion ASC
-                """
-            elif self.selected_nivel == "atributo":
-                query = """
-                    SELECT 
-                        codigo,
-                        descripcion,
-                        COALESCE(to_char(fechacreacion, 'YYYY-MM-DD HH24:MI'), '') as fecha_creacion,
-                        COALESCE(usuario, '') as usuario,
-                        COALESCE(activo, true) as activo,
-                        COALESCE(niveladm1, 0) as parent_id
-                    FROM public.atributotabularemp 
-                    ORDER BY descripcion ASC
-                """
-            else:
-                parent_col = ""
-                if self.selected_nivel == "2":
-                    parent_col = ", COALESCE(niveladm1, 0) as parent_id"
-                elif self.selected_nivel == "3":
-                    parent_col = ", COALESCE(niveladm2, 0) as parent_id"
-                elif self.selected_nivel == "4":
-                    parent_col = ", COALESCE(niveladm3, 0) as parent_id"
-                elif self.selected_nivel == "5":
-                    parent_col = ", COALESCE(niveladm4, 0) as parent_id"
-                else:
-                    parent_col = ", 0 as parent_id"
-                query = f"\n                    SELECT \n                        codigo,\n                        descripcion,\n                        COALESCE(to_char(fechacreacion, 'YYYY-MM-DD HH24:MI'), '') as fecha_creacion,\n                        COALESCE(usuario, '') as usuario,\n                        COALESCE(activo, true) as activo{parent_col}\n                    FROM public.{self.table_name} \n                    ORDER BY descripcion ASC\n                "
-            results = await self._execute_query(query)
+            db_name = await self._resolve_target_db()
+            rows = await catalog_cache.get(db_name, self.table_name)
+            parent_col = self._parent_column()
             self.items = [
                 EntidadItem(
                     codigo=row["codigo"],
                     descripcion=row["descripcion"],
-                    fecha_creacion=row["fecha_creacion"],
-                    usuario=row["usuario"],
-                    parent_id=int(row["parent_id"]),
-                    activo=bool(row.get("activo", True)),
+                    fecha_creacion=format_timestamp(row.get("fechacreacion")),
+                    usuario=str(row.get("usuario") or ""),
+                    parent_id=int(row.get(parent_col) or 0) if parent_col else 0,
+                    activo=row.get("activo") is not False,
                 )
-                for row in results
+                for row in rows
             ]
         except Exception as e:
             logging.exception(f"Error loading items from {self.table_name}: {e}")
             self.items = []
+        await self.search_items()
+
+    @rx.event
+    async def search_items(self):
+        """Ranked, accent-insensitive search of the selected level in the database."""
+        if not self.table_name or not self.search_query.strip():
+            self.search_results = []
+            return
+        try:
+            db_name = await self._resolve_target_db()
+            results = await search.search(
+                db_name,
+                self.table_name,
+                ("descripcion",),
+                self.search_query,
+                select=self._item_columns(),
+                key="codigo",
+                filters=() if self.show_inactive else ("COALESCE(activo, true) = true",),
+                limit=50,
+            )
+            self.search_results = [_item_from_row(row) for row in results]
+        except Exception as e:
+            logging.exception(f"Error searching items in {self.table_name}: {e}")
+            self.search_results = []
 
     @rx.event
     async def save_item(self):
@@ -627,6 +559,9 @@ class EntidadesState(DatabaseState):
                 query = f"UPDATE public.{self.table_name} SET {set_clause} WHERE codigo = :id"
                 await self._execute_write(query, params)
                 rx.toast.success("Registro actualizado correctamente.")
+            catalog_cache.invalidate(
+                await self._resolve_target_db(), self.table_name
+            )
             self.cancel_edit()
             await self.load_items()
         except Exception as e:
@@ -646,21 +581,18 @@ class EntidadesState(DatabaseState):
             ]
             return
         try:
-            query = "SELECT codigo, valor FROM public.parametros WHERE codigo IN (4, 5, 8, 11, 14, 17, 35, 36)"
-            results = await self._execute_query(query, target_db="novalink")
-            params = {row["codigo"]: row["valor"] for row in results}
-            count = int(params.get(4, "5"))
+            params = await parametros_registry.get("novalink")
+            count = params.niveles_habilitados()
             configs = []
-            label_codes = {1: 5, 2: 8, 3: 11, 4: 14, 5: 17}
-            for i in range(1, count + 1):
-                code = label_codes.get(i)
-                label = params.get(code, f"Nivel {i}")
-                configs.append({"id": str(i), "label": label})
+            for i in range(1, min(count, 5) + 1):
+                configs.append({"id": str(i), "label": params.etiqueta_nivel(i)})
             configs.append({"id": "cargos", "label": "Cargos"})
             configs.append({"id": "grupos", "label": "Grupos"})
             configs.append({"id": "tipoempleado", "label": "Tipo Empleado"})
-            if params.get(35, "0") == "1":
-                label_attr = params.get(36, "Atributo Adicional")
+            if params.activo(parametros.ATRIBUTO_TABULAR):
+                label_attr = params.texto(
+                    parametros.ETIQUETA_ATRIBUTO_TABULAR, "Atributo Adicional"
+                )
                 configs.append({"id": "atributo", "label": label_attr})
             self.niveles_config = configs
             try:
@@ -0,0 +1,373 @@
+import reflex as rx
+from typing import TypedDict
+from app.states.database_state import DatabaseState
+from app.states.asistencias_state import DIAS_SEMANA
+from app.utils.horarios import (
+    FECHA_BASE_DEFECTO,
+    HORARIOS_DB,
+    MINUTOS_DIA,
+    SIN_HORARIO,
+)
+from app.utils.catalogs import catalog_cache
+import datetime
+import logging
+
+
+class HorarioFila(TypedDict):
+    id: int
+    descripcion: str
+    ciclo: int
+    fecha_base: str
+    tolerancia: int
+    entradas: list[int]
+    salidas: list[int]
+    laborables: int
+    grupos: str
+    estado: bool
+
+
+class DiaHorario(TypedDict):
+    indice: int
+    etiqueta: str
+    laborable: bool
+    entrada: str
+    salida: str
+
+
+class GrupoHorario(TypedDict):
+    codigo: int
+    descripcion: str
+    actual: str
+    asignado: bool
+
+
+def _hora(minutos: int) -> str:
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+
+def _minutos(valor: str) -> int | None:
+    try:
+        horas, minutos = valor.split(":")[:2]
+        resultado = int(horas) * 60 + int(minutos)
+    except ValueError:
+        return None
+    return resultado if 0 <= resultado < MINUTOS_DIA else None
+
+
+class HorariosState(DatabaseState):
+    horarios: list[HorarioFila] = []
+    show_inactive: bool = False
+    show_modal: bool = False
+    is_editing: bool = False
+    editing_id: int = 0
+    descripcion: str = ""
+    ciclo: int = 7
+    fecha_base: str = FECHA_BASE_DEFECTO.isoformat()
+    tolerancia: int = 5
+    activo: bool = True
+    dias: list[DiaHorario] = []
+    grupos: list[GrupoHorario] = []
+
+    @rx.var
+    def filtered_horarios(self) -> list[HorarioFila]:
+        if self.show_inactive:
+            return self.horarios
+        return [h for h in self.horarios if h["estado"]]
+
+    @rx.event
+    def set_show_inactive(self, value: bool):
+        self.show_inactive = value
+
+    @rx.event
+    async def on_load(self):
+        """Load schedules from database on page load."""
+        await self.load_horarios()
+
+    async def _catalogos(self) -> dict[str, list[dict[str, object]]]:
+        return await catalog_cache.get_many(HORARIOS_DB, ("grupos", "horarios"))
+
+    @rx.event
+    async def load_horarios(self):
+        """Load schedules and the grupos that use them from the catalog cache."""
+        try:
+            catalogos = await self._catalogos()
+            grupos_por_horario: dict[int, list[str]] = {}
+            for grupo in catalogos["grupos"]:
+                if grupo.get("horario") and grupo.get("activo") is not False:
+                    grupos_por_horario.setdefault(grupo["horario"], []).append(
+                        grupo["descripcion"]
+                    )
+            self.horarios = [
+                HorarioFila(
+                    id=row["codigo"],
+                    descripcion=row["descripcion"],
+                    ciclo=row["ciclo"],
+                    fecha_base=str(row["fecha_base"])[:10],
+                    tolerancia=row["tolerancia"],
+                    entradas=list(row["entradas"]),
+                    salidas=list(row["salidas"]),
+                    laborables=sum(1 for e in row["entradas"] if e != SIN_HORARIO),
+                    grupos=", ".join(grupos_por_horario.get(row["codigo"], [])),
+                    estado=row.get("activo") is not False,
+                )
+                for row in catalogos["horarios"]
+            ]
+        except Exception as e:
+            logging.exception(f"Error loading horarios: {e}")
+            self.horarios = []
+
+    def _etiquetar(self):
+        """Day labels; weekly cycles also show the weekday of each day."""
+        try:
+            base = datetime.date.fromisoformat(self.fecha_base)
+        except ValueError:
+            base = FECHA_BASE_DEFECTO
+        for dia in self.dias:
+            etiqueta = f"Día {dia['indice'] + 1}"
+            if self.ciclo == 7:
+                dia_semana = (base + datetime.timedelta(days=dia["indice"])).weekday()
+                etiqueta = f"{etiqueta} ({DIAS_SEMANA[dia_semana]})"
+            dia["etiqueta"] = etiqueta
+
+    def _redimensionar(self, ciclo: int):
+        """Keep the first `ciclo` days, adding workdays like the last one."""
+        modelo = self.dias[-1] if self.dias else None
+        self.dias = self.dias[:ciclo] + [
+            DiaHorario(
+                indice=i,
+                etiqueta="",
+                laborable=modelo["laborable"] if modelo else i % 7 < 5,
+                entrada=modelo["entrada"] if modelo else "08:00",
+                salida=modelo["salida"] if modelo else "17:00",
+            )
+            for i in range(len(self.dias), ciclo)
+        ]
+        self.ciclo = ciclo
+        self._etiquetar()
+
+    async def _cargar_grupos(self):
+        catalogos = await self._catalogos()
+        nombres = {row["codigo"]: row["descripcion"] for row in catalogos["horarios"]}
+        self.grupos = [
+            GrupoHorario(
+                codigo=row["codigo"],
+                descripcion=row["descripcion"],
+                actual=nombres.get(row.get("horario"), ""),
+                asignado=bool(self.editing_id) and row.get("horario") == self.editing_id,
+            )
+            for row in catalogos["grupos"]
+            if (row.get("codigo") or 0) > 0 and row.get("activo") is True
+        ]
+
+    @rx.event
+    async def open_add_modal(self):
+        self.is_editing = False
+        self.editing_id = 0
+        self.descripcion = ""
+        self.fecha_base = FECHA_BASE_DEFECTO.isoformat()
+        self.tolerancia = 5
+        self.activo = True
+        self.dias = []
+        self._redimensionar(7)
+        try:
+            await self._cargar_grupos()
+        except Exception as e:
+            logging.exception(f"Error loading grupos: {e}")
+            self.grupos = []
+        self.show_modal = True
+
+    @rx.event
+    async def open_edit_modal(self, fila: HorarioFila):
+        self.is_editing = True
+        self.editing_id = fila["id"]
+        self.descripcion = fila["descripcion"]
+        self.ciclo = fila["ciclo"]
+        self.fecha_base = fila["fecha_base"]
+        self.tolerancia = fila["tolerancia"]
+        self.activo = fila["estado"]
+        self.dias = [
+            DiaHorario(
+                indice=i,
+                etiqueta="",
+                laborable=entrada != SIN_HORARIO,
+                entrada=_hora(entrada) if entrada != SIN_HORARIO else "",
+                salida=_hora(salida) if salida != SIN_HORARIO else "",
+            )
+            for i, (entrada, salida) in enumerate(zip(fila["entradas"], fila["salidas"]))
+        ]
+        self._etiquetar()
+        try:
+            await self._cargar_grupos()
+        except Exception as e:
+            logging.exception(f"Error loading grupos: {e}")
+            self.grupos = []
+        self.show_modal = True
+
+    @rx.event
+    def close_modal(self):
+        self.show_modal = False
+
+    @rx.event
+    def set_descripcion(self, value: str):
+        self.descripcion = value
+
+    @rx.event
+    def set_ciclo(self, value: str | int):
+        try:
+            ciclo = int(value)
+        except (ValueError, TypeError):
+            return
+        if 1 <= ciclo <= 366:
+            self._redimensionar(ciclo)
+
+    @rx.event
+    def set_fecha_base(self, value: str):
+        self.fecha_base = value
+        self._etiquetar()
+
+    @rx.event
+    def set_tolerancia(self, value: str | int):
+        try:
+            self.tolerancia = max(0, int(value))
+        except (ValueError, TypeError):
+            pass
+
+    @rx.event
+    def set_activo(self, value: bool):
+        self.activo = value
+
+    @rx.event
+    def set_dia_laborable(self, indice: int, value: bool):
+        self.dias[indice]["laborable"] = value
+        if value and not self.dias[indice]["entrada"]:
+            self.dias[indice]["entrada"] = "08:00"
+            self.dias[indice]["salida"] = "17:00"
+
+    @rx.event
+    def set_dia_entrada(self, indice: int, value: str):
+        self.dias[indice]["entrada"] = value
+
+    @rx.event
+    def set_dia_salida(self, indice: int, value: str):
+        self.dias[indice]["salida"] = value
+
+    @rx.event
+    def toggle_grupo(self, codigo: int):
+        for grupo in self.grupos:
+            if grupo["codigo"] == codigo:
+                grupo["asignado"] = not grupo["asignado"]
+
+    @rx.event
+    async def save_horario(self):
+        descripcion = self.descripcion.strip()
+        if not descripcion:
+            return rx.toast.error("La descripción es requerida.")
+        try:
+            fecha_base = datetime.date.fromisoformat(self.fecha_base)
+        except ValueError:
+            return rx.toast.error("La fecha de inicio del ciclo no es válida.")
+        entradas: list[int] = []
+        salidas: list[int] = []
+        for dia in self.dias:
+            if not dia["laborable"]:
+                entradas.append(SIN_HORARIO)
+                salidas.append(SIN_HORARIO)
+                continue
+            entrada, salida = _minutos(dia["entrada"]), _minutos(dia["salida"])
+            if entrada is None or salida is None or entrada == salida:
+                return rx.toast.error(f"Horas inválidas en {dia['etiqueta']}.")
+            entradas.append(entrada)
+            salidas.append(salida)
+        from app.states.base_state import BaseState
+
+        base_state = await self.get_state(BaseState)
+        user_id = base_state.logged_user_id or 1
+        grupos = [g["codigo"] for g in self.grupos if g["asignado"]]
+        try:
+            async with self._db_transaction(HORARIOS_DB) as conn:
+                codigo = self.editing_id
+                if not codigo:
+                    siguiente = await conn.execute(
+                        "SELECT COALESCE(MAX(codigo), 0) + 1 AS codigo FROM public.horarios"
+                    )
+                    codigo = siguiente[0]["codigo"]
+                await conn.execute(
+                    """
+                    INSERT INTO public.horarios (
+                        codigo, descripcion, ciclo, fecha_base, entradas, salidas,
+                        tolerancia, activo, usuario
+                    )
+                    VALUES (
+                        :codigo, :descripcion, :ciclo, :fecha_base,
+                        CAST(:entradas AS integer[]), CAST(:salidas AS integer[]),
+                        :tolerancia, :activo, :usuario
+                    )
+                    ON CONFLICT (codigo) DO UPDATE SET
+                        descripcion = EXCLUDED.descripcion,
+                        ciclo = EXCLUDED.ciclo,
+                        fecha_base = EXCLUDED.fecha_base,
+                        entradas = EXCLUDED.entradas,
+                        salidas = EXCLUDED.salidas,
+                        tolerancia = EXCLUDED.tolerancia,
+                        activo = EXCLUDED.activo,
+                        usuario = EXCLUDED.usuario,
+                        fechamodificacion = NOW()
+                    """,
+                    {
+                        "codigo": codigo,
+                        "descripcion": descripcion,
+                        "ciclo": len(self.dias),
+                        "fecha_base": fecha_base,
+                        "entradas": entradas,
+                        "salidas": salidas,
+                        "tolerancia": self.tolerancia,
+                        "activo": self.activo,
+                        "usuario": str(user_id),
+                    },
+                )
+                await conn.execute(
+                    """
+                    UPDATE public.grupos SET horario = NULL
+                    WHERE horario = :codigo AND codigo <> ALL(CAST(:grupos AS integer[]))
+                    """,
+                    {"codigo": codigo, "grupos": grupos},
+                )
+                await conn.execute(
+                    """
+                    UPDATE public.grupos SET horario = :codigo
+                    WHERE codigo = ANY(CAST(:grupos AS integer[]))
+                    AND horario IS DISTINCT FROM :codigo
+                    """,
+                    {"codigo": codigo, "grupos": grupos},
+                )
+            catalog_cache.invalidate(HORARIOS_DB, "horarios")
+            catalog_cache.invalidate(HORARIOS_DB, "grupos")
+            self.show_modal = False
+            await self.load_horarios()
+            return rx.toast.success(
+                "Horario actualizado correctamente."
+                if self.is_editing
+                else "Horario creado correctamente."
+            )
+        except Exception as e:
+            logging.exception(f"Error saving horario: {e}")
+            return rx.toast.error(f"Error al guardar: {e}")
+
+    @rx.event
+    async def delete_horario(self, horario_id: int):
+        try:
+            await self._execute_write(
+                """
+                UPDATE public.horarios
+                SET activo = false, fechamodificacion = NOW()
+                WHERE codigo = :id
+                """,
+                {"id": horario_id},
+                HORARIOS_DB,
+            )
+            catalog_cache.invalidate(HORARIOS_DB, "horarios")
+            await self.load_horarios()
+            return rx.toast.info("Horario desactivado.")
+        except Exception as e:
+            logging.exception(f"Error deleting horario: {e}")
+            return rx.toast.error(f"Error al eliminar: {e}")
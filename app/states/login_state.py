@@ -4,6 +4,8 @@ import logging
 import hashlib
 from typing import TypedDict
 from app.states.database_state import DatabaseState
+from app.utils import parametros
+from app.utils.parametros import parametros_registry
 
 
 class Company(TypedDict):
@@ -131,11 +133,12 @@ class LoginState(DatabaseState):
             yield rx.toast.error(self.error_message)
             return
         target_db = selected_company["db_name"]
-        if not self.verify_connection(target_db):
+        if not await self.verify_connection(target_db):
             self.error_message = f"Error de conexión con la base de datos: {target_db}"
             self.is_loading = False
             yield rx.toast.error(self.error_message)
             return
+        await self._ensure_schema(target_db)
         try:
             query = """
                 SELECT id, nombre, descripcion, pwd, activo 
@@ -166,12 +169,8 @@ class LoginState(DatabaseState):
                 return
             validity_days = 90
             try:
-                param_query = "SELECT valor FROM parametros WHERE codigo = 80"
-                param_result = await self._execute_query(
-                    param_query, target_db=target_db
-                )
-                if param_result:
-                    validity_days = int(param_result[0]["valor"])
+                params = await parametros_registry.get(target_db)
+                validity_days = params.entero(parametros.VIGENCIA_PASSWORD, 90)
             except Exception as e:
                 logging.exception(f"Could not fetch password validity parameter: {e}")
             check_query = """
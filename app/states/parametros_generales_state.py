@@ -2,7 +2,8 @@ import reflex as rx
 import asyncio
 import logging
 from app.states.database_state import DatabaseState
-from sqlalchemy import text
+from app.utils import parametros
+from app.utils.parametros import parametros_registry
 
 
 class ParametrosGeneralesState(DatabaseState):
@@ -45,35 +46,29 @@ class ParametrosGeneralesState(DatabaseState):
             self.param_40 = "Descripción de prueba"
             return
         try:
-            query = """
-                SELECT codigo, valor
-                FROM public.parametros 
-                WHERE codigo IN (4, 5, 8, 11, 14, 17, 20, 21, 35, 36, 39, 40)
-            """
-            results = await self._execute_query(query, target_db="novalink")
-            params = {row["codigo"]: row["valor"] for row in results}
-            self.niveles_habilitados = int(params.get(4, "4"))
-            self.nivel_1 = params.get(5, "")
-            self.nivel_2 = params.get(8, "")
-            self.nivel_3 = params.get(11, "")
-            self.nivel_4 = params.get(14, "")
-            self.nivel_5 = params.get(17, "")
-            self.asociar_calendario = params.get(20, "0") == "1"
-            self.nivel_asociacion = params.get(21, "4")
-            self.param_35 = params.get(35, "0")
-            self.param_36 = params.get(36, "")
-            self.param_39 = params.get(39, "0")
-            self.param_40 = params.get(40, "")
+            params = await parametros_registry.get("novalink")
+            self.niveles_habilitados = params.niveles_habilitados(4)
+            self.nivel_1 = params.etiqueta_nivel(1, "")
+            self.nivel_2 = params.etiqueta_nivel(2, "")
+            self.nivel_3 = params.etiqueta_nivel(3, "")
+            self.nivel_4 = params.etiqueta_nivel(4, "")
+            self.nivel_5 = params.etiqueta_nivel(5, "")
+            self.asociar_calendario = params.activo(parametros.ASOCIAR_CALENDARIO)
+            self.nivel_asociacion = params.texto(parametros.NIVEL_ASOCIACION, "4")
+            self.param_35 = params.texto(parametros.ATRIBUTO_TABULAR, "0")
+            self.param_36 = params.texto(parametros.ETIQUETA_ATRIBUTO_TABULAR)
+            self.param_39 = params.texto(parametros.ATRIBUTO_TEXTO, "0")
+            self.param_40 = params.texto(parametros.ETIQUETA_ATRIBUTO_TEXTO)
         except Exception as e:
             logging.exception(f"Error loading parameters: {e}")
             rx.toast.error("Error al cargar parámetros de la base de datos")
 
-    def _update_param(self, conn, codigo: int, valor: str | int):
+    async def _update_param(self, conn, codigo: int, valor: str | int):
         """Helper to update a single parameter."""
         val_str = str(valor)
         logging.info(f"Executing UPDATE: code={codigo}, value='{val_str}'")
-        conn.execute(
-            text("UPDATE public.parametros SET valor = :valor WHERE codigo = :codigo"),
+        await conn.execute(
+            "UPDATE public.parametros SET valor = :valor WHERE codigo = :codigo",
             {"valor": val_str, "codigo": codigo},
         )
 
@@ -88,25 +83,23 @@ class ParametrosGeneralesState(DatabaseState):
             yield rx.toast.success("Simulación: Parámetros guardados localmente")
             return
         try:
-            engine = self._get_db_engine("novalink")
-            if not engine:
-                raise Exception("No connection to novalink database")
             logging.info(
                 f"Starting save_parameters transaction. Niveles habilitados: {self.niveles_habilitados}"
             )
-            with engine.begin() as conn:
-                self._update_param(conn, 4, self.niveles_habilitados)
-                self._update_param(conn, 5, self.nivel_1)
-                self._update_param(conn, 8, self.nivel_2)
-                self._update_param(conn, 11, self.nivel_3)
-                self._update_param(conn, 14, self.nivel_4)
-                self._update_param(conn, 17, self.nivel_5)
-                self._update_param(conn, 20, "1" if self.asociar_calendario else "0")
-                self._update_param(conn, 21, self.nivel_asociacion)
-                self._update_param(conn, 35, self.param_35)
-                self._update_param(conn, 36, self.param_36)
-                self._update_param(conn, 39, self.param_39)
-                self._update_param(conn, 40, self.param_40)
+            async with self._db_transaction("novalink") as conn:
+                await self._update_param(conn, 4, self.niveles_habilitados)
+                await self._update_param(conn, 5, self.nivel_1)
+                await self._update_param(conn, 8, self.nivel_2)
+                await self._update_param(conn, 11, self.nivel_3)
+                await self._update_param(conn, 14, self.nivel_4)
+                await self._update_param(conn, 17, self.nivel_5)
+                await self._update_param(conn, 20, "1" if self.asociar_calendario else "0")
+                await self._update_param(conn, 21, self.nivel_asociacion)
+                await self._update_param(conn, 35, self.param_35)
+                await self._update_param(conn, 36, self.param_36)
+                await self._update_param(conn, 39, self.param_39)
+                await self._update_param(conn, 40, self.param_40)
+            parametros_registry.invalidate("novalink")
             logging.info("Transaction committed successfully.")
             self.is_loading = False
             yield rx.toast.success("Parámetros actualizados correctamente en Novalink")
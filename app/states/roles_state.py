@@ -1,7 +1,6 @@
 import reflex as rx
 from typing import TypedDict
 import logging
-from sqlalchemy import text
 from app.states.database_state import DatabaseState
 
 
@@ -123,43 +122,40 @@ class RolesState(DatabaseState):
         base_state = await self.get_state(BaseState)
         user_id = base_state.logged_user_id or 1
         current_db = base_state.current_database_name or "novalink"
-        engine = self._get_db_engine(current_db)
-        if not engine:
-            return rx.toast.error("Error de conexión a la base de datos")
         try:
-            with engine.begin() as conn:
+            async with self._db_transaction(current_db) as conn:
                 role_id = 0
                 if self.is_editing and self.modal_role["id"] != "0":
                     role_id = int(self.modal_role["id"])
-                    conn.execute(
-                        text("""
+                    await conn.execute(
+                        """
                             UPDATE perfiles 
                             SET descripcion = :name, usuariomodifica = :uid, fechamodificacion = NOW() 
                             WHERE id = :id
-                        """),
+                        """,
                         {"name": name, "uid": user_id, "id": role_id},
                     )
                 else:
-                    result = conn.execute(
-                        text("""
+                    result = await conn.execute(
+                        """
                             INSERT INTO perfiles (descripcion, activo, usuariocrea, fechacreacion) 
                             VALUES (:name, true, :uid, NOW()) 
                             RETURNING id
-                        """),
+                        """,
                         {"name": name, "uid": user_id},
                     )
-                    role_id = result.scalar()
-                conn.execute(
-                    text("DELETE FROM modulosperfil WHERE perfil = :id"),
+                    role_id = result[0]["id"]
+                await conn.execute(
+                    "DELETE FROM modulosperfil WHERE perfil = :id",
                     {"id": role_id},
                 )
                 if self.modal_role["permissions"]:
                     for mod_id in self.modal_role["permissions"]:
-                        conn.execute(
-                            text("""
+                        await conn.execute(
+                            """
                                 INSERT INTO modulosperfil (perfil, modulo, usuariocrea, fechacreacion) 
                                 VALUES (:id, :mod, :uid, NOW())
-                            """),
+                            """,
                             {"id": role_id, "mod": int(mod_id), "uid": user_id},
                         )
             action = "actualizado" if self.is_editing else "creado"
@@ -1,8 +1,16 @@
 import reflex as rx
 from typing import TypedDict, Optional
 from app.states.database_state import DatabaseState
+from app.utils import transacciones, transacciones_resumen
+from app.utils.transacciones_feed import transaction_feed, client_connected
+import asyncio
+import datetime
 import logging
 import math
+import uuid
+
+# How often an idle live feed checks that its browser tab is still there.
+FEED_IDLE_CHECK = 30.0
 
 
 class Transaccion(TypedDict):
@@ -12,11 +20,51 @@ class Transaccion(TypedDict):
     mensaje: str
 
 
+def _to_transaccion(row: dict) -> Transaccion:
+    return Transaccion(
+        id=row["id"],
+        dispositivo=row["dispositivo_desc"] or "Desconocido",
+        fechahora=row["fechahora"].strftime("%Y-%m-%d %H:%M:%S")
+        if row["fechahora"]
+        else "",
+        mensaje=row["mensaje"] or "",
+    )
+
+
 class DispositivoFilter(TypedDict):
     id: int
     descripcion: str
 
 
+class ResumenDispositivo(TypedDict):
+    dispositivo_id: int
+    descripcion: str
+    total: int
+    hora_actual: int
+    por_hora: list[int]
+    barras: list[int]
+
+
+class HistorialFila(TypedDict):
+    fecha: str
+    descripcion: str
+    total: int
+
+
+def _to_resumen(item: dict, hora: int) -> ResumenDispositivo:
+    """Day summary of one device; `barras` are the hours as % of its peak."""
+    por_hora = item["por_hora"]
+    pico = max(por_hora) or 1
+    return ResumenDispositivo(
+        dispositivo_id=item["dispositivo_id"],
+        descripcion=item["descripcion"],
+        total=item["total"],
+        hora_actual=por_hora[hora],
+        por_hora=por_hora,
+        barras=[round(total * 100 / pico) for total in por_hora],
+    )
+
+
 class TransaccionesState(DatabaseState):
     """State for managing transactions view."""
 
@@ -27,6 +75,17 @@ class TransaccionesState(DatabaseState):
     current_page: int = 1
     items_per_page: int = 15
     total_items: int = 0
+    has_more: bool = False
+    feed_activo: bool = False
+    resumen: list[ResumenDispositivo] = []
+    show_historial: bool = False
+    historial_desde: str = ""
+    historial_hasta: str = ""
+    historial: list[HistorialFila] = []
+    historial_total: int = 0
+    _page_cursors: list[dict] = []
+    _row_cursors: list[dict] = []
+    _feed_id: str = ""
 
     @rx.var
     def total_pages(self) -> int:
@@ -38,7 +97,7 @@ class TransaccionesState(DatabaseState):
 
     @rx.var
     def has_next(self) -> bool:
-        return self.current_page < self.total_pages
+        return self.has_more
 
     @rx.var
     def has_prev(self) -> bool:
@@ -48,21 +107,10 @@ class TransaccionesState(DatabaseState):
     async def on_load(self):
         """Load transactions data on page load."""
         logging.info("🔄 Loading Transacciones page...")
-        await self._ensure_tables()
         await self.load_dispositivos_filter()
-        await self.load_transacciones()
-
-    async def _ensure_tables(self):
-        """Ensure transacciones table exists."""
-        query = """
-            CREATE TABLE IF NOT EXISTS public.transacciones (
-                id SERIAL PRIMARY KEY,
-                dispositivo_id BIGINT,
-                fechahora TIMESTAMP DEFAULT NOW(),
-                mensaje TEXT
-            );
-        """
-        await self._execute_write(query, target_db="novalink")
+        self.current_page = 1
+        self._page_cursors = []
+        await asyncio.gather(self.load_transacciones(), self.load_resumen())
 
     @rx.event
     async def load_dispositivos_filter(self):
@@ -79,49 +127,124 @@ class TransaccionesState(DatabaseState):
 
     @rx.event
     async def load_transacciones(self):
-        """Fetch transactions with filters and pagination."""
+        """Fetch the current page of today's transactions and the day's total."""
         self.is_loading = True
+        dispositivo_id = (
+            int(self.selected_dispositivo_id) if self.selected_dispositivo_id else None
+        )
+        after = (
+            self._page_cursors[self.current_page - 2] if self.current_page > 1 else None
+        )
         try:
-            conditions = ["DATE(t.fechahora) = CURRENT_DATE"]
-            params = {}
-            if self.selected_dispositivo_id and self.selected_dispositivo_id != "":
-                conditions.append("t.dispositivo_id = :dev_id")
-                params["dev_id"] = int(self.selected_dispositivo_id)
-            where_clause = " AND ".join(conditions)
-            count_query = f"SELECT COUNT(*) as count FROM public.transacciones t WHERE {where_clause}"
-            count_res = await self._execute_query(
-                count_query, params, target_db="novalink"
+            results = await transacciones.fetch_day(
+                dispositivo_id=dispositivo_id,
+                limit=self.items_per_page + 1,
+                after=after,
             )
-            self.total_items = count_res[0]["count"] if count_res else 0
-            offset = (self.current_page - 1) * self.items_per_page
-            query = f"\n                SELECT \n                    t.id, \n                    d.descripcion as dispositivo_desc, \n                    t.fechahora, \n                    t.mensaje\n                FROM public.transacciones t\n                LEFT JOIN public.dispositivos d ON t.dispositivo_id = d.codigo\n                WHERE {where_clause}\n                ORDER BY t.fechahora DESC\n                LIMIT :limit OFFSET :offset\n            "
-            params["limit"] = self.items_per_page
-            params["offset"] = offset
-            results = await self._execute_query(query, params, target_db="novalink")
-            self.transacciones = [
-                Transaccion(
-                    id=row["id"],
-                    dispositivo=row["dispositivo_desc"] or "Desconocido",
-                    fechahora=row["fechahora"].strftime("%Y-%m-%d %H:%M:%S")
-                    if row["fechahora"]
-                    else "",
-                    mensaje=row["mensaje"] or "",
-                )
-                for row in results
-            ]
+            self.has_more = len(results) > self.items_per_page
+            results = results[: self.items_per_page]
+            del self._page_cursors[self.current_page - 1 :]
+            if self.has_more:
+                self._page_cursors.append(transacciones.cursor_of(results[-1]))
+            self.transacciones = [_to_transaccion(row) for row in results]
+            self._row_cursors = [transacciones.cursor_of(row) for row in results]
         except Exception as e:
             logging.exception(f"Error loading transacciones: {e}")
             self.transacciones = []
+            self._row_cursors = []
+            self.has_more = False
             self.total_items = 0
-        finally:
             self.is_loading = False
+            return
+        try:
+            self.total_items = await transacciones.count_day(
+                dispositivo_id=dispositivo_id
+            )
+        except Exception as e:
+            logging.warning(f"Daily transaction counter unavailable: {e}")
+            self.total_items = 0
+        self.total_items = max(
+            self.total_items,
+            (self.current_page - 1) * self.items_per_page
+            + len(self.transacciones)
+            + int(self.has_more),
+        )
+        self.is_loading = False
 
     @rx.event
     def set_device_filter(self, value: str):
         self.selected_dispositivo_id = value
         self.current_page = 1
+        self._page_cursors = []
         return TransaccionesState.load_transacciones
 
+    @rx.event
+    def refresh(self):
+        self.current_page = 1
+        self._page_cursors = []
+        return [TransaccionesState.load_transacciones, TransaccionesState.load_resumen]
+
+    @rx.event
+    async def load_resumen(self):
+        """Today's marks per device and hour, read from the hourly rollup."""
+        try:
+            hora = datetime.datetime.now().hour
+            self.resumen = [
+                _to_resumen(item, hora)
+                for item in await transacciones_resumen.resumen_dia()
+            ]
+        except Exception as e:
+            logging.exception(f"Error loading transaction summary: {e}")
+            self.resumen = []
+
+    @rx.event
+    def toggle_historial(self):
+        self.show_historial = not self.show_historial
+        if self.show_historial and not self.historial_hasta:
+            hoy = datetime.date.today()
+            self.historial_hasta = hoy.isoformat()
+            self.historial_desde = (hoy - datetime.timedelta(days=6)).isoformat()
+            return TransaccionesState.load_historial
+
+    @rx.event
+    def set_historial_desde(self, value: str):
+        self.historial_desde = value
+
+    @rx.event
+    def set_historial_hasta(self, value: str):
+        self.historial_hasta = value
+
+    @rx.event
+    async def load_historial(self):
+        """Daily totals per device for the chosen range, from the daily counter."""
+        try:
+            desde = datetime.date.fromisoformat(self.historial_desde)
+            hasta = datetime.date.fromisoformat(self.historial_hasta)
+        except ValueError:
+            yield rx.toast.error("Seleccione un rango de fechas válido.")
+            return
+        if desde > hasta:
+            desde, hasta = hasta, desde
+        dispositivo_id = (
+            int(self.selected_dispositivo_id) if self.selected_dispositivo_id else None
+        )
+        try:
+            rows = await transacciones_resumen.historial(desde, hasta, dispositivo_id)
+            self.historial = [
+                HistorialFila(
+                    fecha=row["fecha"].isoformat(),
+                    descripcion=row["descripcion"],
+                    total=int(row["total"]),
+                )
+                for row in rows
+            ]
+            self.historial_total = sum(fila["total"] for fila in self.historial)
+        except Exception as e:
+            logging.exception(f"Error loading transaction history: {e}")
+            self.historial = []
+            self.historial_total = 0
+            yield rx.toast.error("Error al cargar el historial de transacciones.")
+
     @rx.event
     def next_page(self):
         if self.has_next:
@@ -132,4 +255,89 @@ class TransaccionesState(DatabaseState):
     def prev_page(self):
         if self.has_prev:
             self.current_page -= 1
-            return TransaccionesState.load_transacciones
\ No newline at end of file
+            return TransaccionesState.load_transacciones
+
+    def _count_live(self, rows: list[dict]):
+        """Add rows pushed by the feed to today's per-device summary."""
+        hoy = datetime.date.today()
+        por_dispositivo = {item["dispositivo_id"]: item for item in self.resumen}
+        for row in rows:
+            fechahora = row["fechahora"]
+            item = por_dispositivo.get(row["dispositivo_id"] or 0)
+            if item is None or fechahora.date() != hoy:
+                continue
+            item["total"] += 1
+            item["por_hora"][fechahora.hour] += 1
+        hora = datetime.datetime.now().hour
+        self.resumen = sorted(
+            (_to_resumen(item, hora) for item in self.resumen),
+            key=lambda item: (-item["total"], item["descripcion"]),
+        )
+
+    def _append_live(self, rows: list[dict]):
+        """Merge rows pushed by the feed (newest first) into the current view."""
+        self._count_live(rows)
+        dispositivo_id = (
+            int(self.selected_dispositivo_id) if self.selected_dispositivo_id else None
+        )
+        matching = [
+            row
+            for row in rows
+            if dispositivo_id is None or row["dispositivo_id"] == dispositivo_id
+        ]
+        if self.current_page != 1:
+            # Later pages are anchored to keyset cursors, which new marks
+            # do not shift; only the total changes.
+            self.total_items += len(matching)
+            return
+        shown = {t["id"] for t in self.transacciones}
+        nuevas = [row for row in matching if row["id"] not in shown]
+        if not nuevas:
+            return
+        self.total_items += len(nuevas)
+        if len(self.transacciones) + len(nuevas) > self.items_per_page:
+            self.has_more = True
+        transacciones_nuevas = [_to_transaccion(row) for row in nuevas]
+        cursores = [transacciones.cursor_of(row) for row in nuevas]
+        self.transacciones = (transacciones_nuevas + self.transacciones)[
+            : self.items_per_page
+        ]
+        self._row_cursors = (cursores + self._row_cursors)[: self.items_per_page]
+        if self.has_more and self._row_cursors:
+            self._page_cursors[:1] = [self._row_cursors[-1]]
+
+    @rx.event(background=True)
+    async def watch_feed(self):
+        """Receive new marks from the worker's LISTEN connection while the page is open.
+
+        Superseded by the next call for the same tab (each one takes a new
+        feed id) and ends with stop_feed or when the tab disconnects.
+        """
+        feed_id = uuid.uuid4().hex
+        async with self:
+            self._feed_id = feed_id
+            self.feed_activo = True
+            token = self.router.session.client_token
+        queue = transaction_feed.subscribe()
+        try:
+            while True:
+                try:
+                    rows = await asyncio.wait_for(queue.get(), FEED_IDLE_CHECK)
+                except asyncio.TimeoutError:
+                    rows = []
+                if not client_connected(token):
+                    break
+                async with self:
+                    if self._feed_id != feed_id:
+                        break
+                    if rows is None:
+                        await self.load_transacciones()
+                    elif rows:
+                        self._append_live(rows)
+        finally:
+            transaction_feed.unsubscribe(queue)
+
+    @rx.event
+    def stop_feed(self):
+        self._feed_id = ""
+        self.feed_activo = False
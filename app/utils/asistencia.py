@@ -0,0 +1,714 @@
+import os
+import time
+import asyncio
+import datetime
+import logging
+from dataclasses import dataclass
+import numpy as np
+from app.utils import db, feriados, horarios, parametros, search
+from app.utils.feriados import feriados_resolver
+from app.utils.parametros import parametros_registry
+from app.utils.transacciones import TRANSACCIONES_DB
+
+ASISTENCIA_DB = TRANSACCIONES_DB
+MINUTOS_DIA = 1440
+# Marks closer than this to the first one are a double press, not an exit.
+REBOTE_MINUTOS = int(os.getenv("NOVALINK_ASISTENCIA_REBOTE", "2"))
+# Missing entry or exit. Below any mark time, which starts at a day's window.
+SIN_MARCA = -2 * MINUTOS_DIA
+
+
+def _minutos(valor: str) -> int:
+    horas, minutos = valor.split(":")
+    return int(horas) * 60 + int(minutos)
+
+
+@dataclass(frozen=True)
+class Jornada:
+    """Tenant-wide default shift, in minutes from midnight.
+
+    Employees whose grupo has no schedule (see `horarios`) work `entrada` to
+    `salida` on `dias_laborables`, weekday numbers (Monday = 0); lateness
+    counts once it exceeds `tolerancia` minutes. The night surcharge window
+    runs from `nocturno_desde` to `nocturno_hasta` across midnight.
+    """
+
+    entrada: int = 8 * 60
+    salida: int = 17 * 60
+    tolerancia: int = 5
+    dias_laborables: tuple[int, ...] = (0, 1, 2, 3, 4)
+    nocturno_desde: int = 19 * 60
+    nocturno_hasta: int = 6 * 60
+
+    def horario(self) -> horarios.Horario:
+        """This shift as a weekly schedule."""
+        return horarios.Horario(
+            codigo=0,
+            ciclo=7,
+            fecha_base=horarios.FECHA_BASE_DEFECTO,
+            entradas=tuple(
+                self.entrada if dia in self.dias_laborables else horarios.SIN_HORARIO
+                for dia in range(7)
+            ),
+            salidas=tuple(
+                self.salida if dia in self.dias_laborables else horarios.SIN_HORARIO
+                for dia in range(7)
+            ),
+            tolerancia=self.tolerancia,
+        )
+
+
+JORNADA_DEFECTO = Jornada(
+    entrada=_minutos(os.getenv("NOVALINK_JORNADA_ENTRADA", "08:00")),
+    salida=_minutos(os.getenv("NOVALINK_JORNADA_SALIDA", "17:00")),
+    tolerancia=int(os.getenv("NOVALINK_JORNADA_TOLERANCIA", "5")),
+    dias_laborables=tuple(
+        int(dia) for dia in os.getenv("NOVALINK_JORNADA_DIAS", "0,1,2,3,4").split(",")
+    ),
+    nocturno_desde=_minutos(os.getenv("NOVALINK_NOCTURNO_DESDE", "19:00")),
+    nocturno_hasta=_minutos(os.getenv("NOVALINK_NOCTURNO_HASTA", "06:00")),
+)
+
+RESULT_COLUMNS = (
+    "empleado_id",
+    "fecha",
+    "entrada",
+    "salida",
+    "marcas",
+    "laborable",
+    "minutos_trabajados",
+    "minutos_atraso",
+    "minutos_salida_anticipada",
+    "minutos_sobretiempo",
+    "minutos_nocturnos",
+    "minutos_dia_libre",
+    "falta",
+    "justificada",
+)
+
+
+# Staging columns of guardar(): day offsets and minutes, fixed-width
+# big-endian types as sent in the binary COPY.
+CARGA_COLUMNS = (
+    ("empleado_id", ">i8"),
+    ("dia", ">i4"),
+    ("entrada", ">i4"),
+    ("salida", ">i4"),
+    ("marcas", ">i2"),
+    ("laborable", "?"),
+    ("minutos_trabajados", ">i4"),
+    ("minutos_atraso", ">i4"),
+    ("minutos_salida_anticipada", ">i4"),
+    ("minutos_sobretiempo", ">i4"),
+    ("minutos_nocturnos", ">i4"),
+    ("minutos_dia_libre", ">i4"),
+    ("falta", "?"),
+    ("justificada", "?"),
+)
+_PG_TYPES = {">i8": "BIGINT", ">i4": "INTEGER", ">i2": "SMALLINT", "?": "BOOLEAN"}
+
+
+def schema_statements() -> tuple[str, ...]:
+    """DDL for per-employee justifications and the daily attendance results."""
+    return (
+        """
+        CREATE TABLE IF NOT EXISTS public.justificaciones (
+            id BIGSERIAL PRIMARY KEY,
+            empleado_id BIGINT NOT NULL,
+            fecha DATE NOT NULL,
+            tipo INTEGER NOT NULL,
+            observacion TEXT DEFAULT '',
+            aprobada BOOLEAN NOT NULL DEFAULT true,
+            usuario BIGINT,
+            fechacreacion TIMESTAMP DEFAULT NOW()
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_justificaciones_fecha
+        ON public.justificaciones (fecha, empleado_id)
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS public.asistencia_diaria (
+            empleado_id BIGINT NOT NULL,
+            fecha DATE NOT NULL,
+            entrada TIME,
+            salida TIME,
+            marcas SMALLINT NOT NULL DEFAULT 0,
+            laborable BOOLEAN NOT NULL DEFAULT true,
+            minutos_trabajados INTEGER NOT NULL DEFAULT 0,
+            minutos_atraso INTEGER NOT NULL DEFAULT 0,
+            minutos_salida_anticipada INTEGER NOT NULL DEFAULT 0,
+            minutos_sobretiempo INTEGER NOT NULL DEFAULT 0,
+            minutos_nocturnos INTEGER NOT NULL DEFAULT 0,
+            minutos_dia_libre INTEGER NOT NULL DEFAULT 0,
+            falta BOOLEAN NOT NULL DEFAULT false,
+            justificada BOOLEAN NOT NULL DEFAULT false,
+            calculado TIMESTAMP NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (empleado_id, fecha)
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_asistencia_diaria_fecha
+        ON public.asistencia_diaria (fecha)
+        """,
+    )
+
+
+@dataclass
+class Periodo:
+    """Inputs of one calculation: E employees by D days from `desde`.
+
+    Marks are parallel arrays: the employee's row index and the minute since
+    `desde` 00:00 (negative for the eve of `desde`). Day matrices are (E, D);
+    `inicio`/`fin` are the scheduled start and end of each day in minutes
+    from its midnight, `fin` past MINUTOS_DIA for overnight shifts. A day
+    takes the marks from its `corte` (minutes from its midnight, default 0)
+    up to the next day's; `tolerancia` is per employee, default the
+    Jornada's.
+    """
+
+    desde: datetime.date
+    dias: int
+    empleados: np.ndarray
+    sobretiempo: np.ndarray
+    nocturno: np.ndarray
+    dia_libre: np.ndarray
+    marca_empleado: np.ndarray
+    marca_minuto: np.ndarray
+    laborable: np.ndarray
+    inicio: np.ndarray
+    fin: np.ndarray
+    falta_justificada: np.ndarray
+    atraso_justificado: np.ndarray
+    corte: np.ndarray | None = None
+    tolerancia: np.ndarray | None = None
+
+
+@dataclass
+class Resultado:
+    """Per employee-day results, (E, D) arrays.
+
+    entrada/salida are minutes from the day's midnight, outside [0,
+    MINUTOS_DIA) when a shift's window crosses it, and SIN_MARCA when missing.
+    """
+
+    desde: datetime.date
+    dias: int
+    empleados: np.ndarray
+    marcas: np.ndarray
+    entrada: np.ndarray
+    salida: np.ndarray
+    laborable: np.ndarray
+    trabajados: np.ndarray
+    atraso: np.ndarray
+    salida_anticipada: np.ndarray
+    sobretiempo: np.ndarray
+    nocturnos: np.ndarray
+    dia_libre: np.ndarray
+    falta: np.ndarray
+    justificada: np.ndarray
+
+    @classmethod
+    def unir(cls, partes: list["Resultado"]) -> "Resultado":
+        """Stack results of the same period computed for disjoint employee sets."""
+        primero = partes[0]
+        return cls(
+            desde=primero.desde,
+            dias=primero.dias,
+            **{
+                campo: np.concatenate([getattr(parte, campo) for parte in partes])
+                for campo in cls.__dataclass_fields__
+                if campo not in ("desde", "dias")
+            },
+        )
+
+    def _guardables(self) -> tuple[np.ndarray, np.ndarray]:
+        """Cells worth storing: days with marks, laborable days and justified days."""
+        return np.nonzero((self.marcas > 0) | self.laborable | self.justificada)
+
+    def copy_binario(self) -> bytes:
+        """The stored cells as a PostgreSQL binary COPY stream for CARGA_COLUMNS.
+
+        Every column has a fixed width, so each row is one record of a
+        structured array and the stream is built without a Python loop.
+        """
+        emp_idx, dia = self._guardables()
+        campos = [("n", ">i2")]
+        for nombre, tipo in CARGA_COLUMNS:
+            campos += [(f"{nombre}_len", ">i4"), (nombre, tipo)]
+        registros = np.empty(len(dia), dtype=np.dtype(campos))
+        registros["n"] = len(CARGA_COLUMNS)
+        valores = {
+            "empleado_id": self.empleados[emp_idx],
+            "dia": dia,
+            "entrada": self.entrada[emp_idx, dia],
+            "salida": self.salida[emp_idx, dia],
+            "marcas": self.marcas[emp_idx, dia],
+            "laborable": self.laborable[emp_idx, dia],
+            "minutos_trabajados": self.trabajados[emp_idx, dia],
+            "minutos_atraso": self.atraso[emp_idx, dia],
+            "minutos_salida_anticipada": self.salida_anticipada[emp_idx, dia],
+            "minutos_sobretiempo": self.sobretiempo[emp_idx, dia],
+            "minutos_nocturnos": self.nocturnos[emp_idx, dia],
+            "minutos_dia_libre": self.dia_libre[emp_idx, dia],
+            "falta": self.falta[emp_idx, dia],
+            "justificada": self.justificada[emp_idx, dia],
+        }
+        for nombre, tipo in CARGA_COLUMNS:
+            registros[f"{nombre}_len"] = np.dtype(tipo).itemsize
+            registros[nombre] = valores[nombre]
+        cabecera = b"PGCOPY\n\xff\r\n\x00" + bytes(8)
+        return cabecera + registros.tobytes() + b"\xff\xff"
+
+
+def _overlap(a: np.ndarray, b: np.ndarray, c, d) -> np.ndarray:
+    """Length of [a, b) ∩ [c, d), elementwise."""
+    return np.maximum(0, np.minimum(b, d) - np.maximum(a, c))
+
+
+def calcular(periodo: Periodo, jornada: Jornada = JORNADA_DEFECTO) -> Resultado:
+    """Turn a period's marks into per employee-day results, without Python loops.
+
+    Each mark belongs to the day whose window (from its `corte` to the next
+    day's) contains it, so the exit of a night shift counts on the day it
+    started. The first mark of a day is the entry and the last one the exit
+    (a single mark, or marks within REBOTE_MINUTOS, leave the exit missing).
+    Worked time is exit - entry. On laborable days lateness counts from the
+    scheduled start when beyond the tolerance, early leave up to the
+    scheduled end, and time worked outside the schedule is overtime for
+    employees with ganasobretiempo. On rest days (weekends, holidays) the
+    whole time worked is rest-day time for employees with
+    ganarecargodialibre, otherwise overtime. Night minutes are the overlap
+    with the night windows for employees with ganarecargonocturno. A
+    laborable day without marks is an absence unless justified.
+    """
+    E, D = len(periodo.empleados), periodo.dias
+    shape = (E, D)
+    minuto = periodo.marca_minuto.astype(np.int64)
+    emp = periodo.marca_empleado.astype(np.int64)
+    dia = np.floor_divide(minuto, MINUTOS_DIA)
+    if periodo.corte is not None and len(minuto):
+        # Windows are less than a day apart at both ends, so a mark is in its
+        # calendar day's window or in one of the neighbours'. Days -1..D+1
+        # are padded with the edge values.
+        corte = np.pad(periodo.corte, ((0, 0), (1, 2)), mode="edge")
+        columna = np.clip(dia + 1, 0, D + 1)
+        hora = minuto - dia * MINUTOS_DIA
+        dia = (
+            dia
+            - (hora < corte[emp, columna])
+            + (hora >= MINUTOS_DIA + corte[emp, columna + 1])
+        )
+    valid = (dia >= 0) & (dia < D)
+    # Times within a cell span [-MINUTOS_DIA, 2 * MINUTOS_DIA) of its midnight.
+    ancho = 3 * MINUTOS_DIA
+    key = (emp[valid] * D + dia[valid]) * ancho + (
+        minuto[valid] - dia[valid] * MINUTOS_DIA + MINUTOS_DIA
+    )
+    key.sort()
+    celda = key // ancho
+    hora = (key % ancho - MINUTOS_DIA).astype(np.int32)
+
+    marcas = np.zeros(E * D, dtype=np.int16)
+    entrada = np.full(E * D, SIN_MARCA, dtype=np.int32)
+    salida = np.full(E * D, SIN_MARCA, dtype=np.int32)
+    if len(key):
+        starts = np.flatnonzero(np.r_[True, celda[1:] != celda[:-1]])
+        ends = np.r_[starts[1:], len(key)] - 1
+        celdas = celda[starts]
+        marcas[celdas] = np.minimum(ends - starts + 1, np.iinfo(np.int16).max)
+        entrada[celdas] = hora[starts]
+        salida[celdas] = np.where(
+            hora[ends] - hora[starts] >= REBOTE_MINUTOS, hora[ends], SIN_MARCA
+        )
+    marcas = marcas.reshape(shape)
+    entrada = entrada.reshape(shape)
+    salida = salida.reshape(shape)
+
+    laborable = periodo.laborable
+    inicio, fin = periodo.inicio, periodo.fin
+    completo = salida != SIN_MARCA
+    a = np.where(completo, entrada, 0)
+    b = np.where(completo, salida, 0)
+    trabajados = b - a
+
+    tolerancia = (
+        jornada.tolerancia if periodo.tolerancia is None else periodo.tolerancia[:, None]
+    )
+    atraso = np.where(
+        laborable & (marcas > 0) & (entrada - inicio > tolerancia),
+        entrada - inicio,
+        0,
+    )
+    atraso = np.where(periodo.atraso_justificado, 0, np.minimum(atraso, fin - inicio))
+    salida_anticipada = np.where(
+        laborable & completo & (salida < fin), fin - np.maximum(salida, inicio), 0
+    )
+    salida_anticipada = np.minimum(salida_anticipada, np.maximum(fin - inicio, 0))
+
+    fuera_horario = trabajados - _overlap(a, b, inicio, fin)
+    sobretiempo_flag = periodo.sobretiempo[:, None]
+    dia_libre_flag = periodo.dia_libre[:, None]
+    sobretiempo = np.where(
+        laborable,
+        np.where(sobretiempo_flag, fuera_horario, 0),
+        np.where(sobretiempo_flag & ~dia_libre_flag, trabajados, 0),
+    )
+    dia_libre = np.where(~laborable & dia_libre_flag, trabajados, 0)
+    # The night window of the eve, the day and the next day: worked time
+    # lies within [-MINUTOS_DIA, 2 * MINUTOS_DIA) of the day's midnight.
+    noche_desde = jornada.nocturno_desde
+    noche_hasta = jornada.nocturno_hasta
+    if noche_hasta <= noche_desde:
+        noche_hasta += MINUTOS_DIA
+    nocturnos = np.where(
+        periodo.nocturno[:, None],
+        sum(
+            _overlap(a, b, noche_desde + k * MINUTOS_DIA, noche_hasta + k * MINUTOS_DIA)
+            for k in (-1, 0, 1)
+        ),
+        0,
+    )
+    justificada = periodo.falta_justificada | periodo.atraso_justificado
+    falta = laborable & (marcas == 0) & ~periodo.falta_justificada
+
+    return Resultado(
+        desde=periodo.desde,
+        dias=D,
+        empleados=periodo.empleados,
+        marcas=marcas,
+        entrada=entrada,
+        salida=salida,
+        laborable=laborable,
+        trabajados=trabajados.astype(np.int32),
+        atraso=atraso.astype(np.int32),
+        salida_anticipada=salida_anticipada.astype(np.int32),
+        sobretiempo=sobretiempo.astype(np.int32),
+        nocturnos=nocturnos.astype(np.int32),
+        dia_libre=dia_libre.astype(np.int32),
+        falta=falta,
+        justificada=justificada,
+    )
+
+
+def _day_index(desde: datetime.date, dias: int, fechas) -> tuple[np.ndarray, np.ndarray]:
+    """Day offsets of `fechas` within the period and the mask of those inside it."""
+    offsets = np.array([(fecha - desde).days for fecha in fechas], dtype=np.int64)
+    return offsets, (offsets >= 0) & (offsets < dias)
+
+
+async def cargar_periodo(
+    desde: datetime.date,
+    hasta: datetime.date,
+    empleado_ids: list[int] | None = None,
+    jornada: Jornada = JORNADA_DEFECTO,
+    db_name: str = ASISTENCIA_DB,
+) -> Periodo:
+    """Read employees, schedules, marks, holidays and justifications of [desde, hasta].
+
+    Active employees by default, or exactly `empleado_ids`. Each employee
+    works the schedule of their grupo, or `jornada` if it has none; marks
+    are read from the eve of `desde` to the day after `hasta` so shifts
+    crossing midnight are complete. Marks come back as two aggregated arrays
+    in a single row; holidays come from the cached yearly calendars of
+    `feriados_resolver`. Raises on database errors.
+    """
+    dias = (hasta - desde).days + 1
+    params = await parametros_registry.get(db_name)
+    por_grupo = await horarios.por_grupo(db_name)
+    nivel = 0
+    if params.activo(parametros.ASOCIAR_CALENDARIO):
+        nivel = params.entero(parametros.NIVEL_ASOCIACION, 4)
+        if nivel not in (1, 2, 3, 4, 5):
+            nivel = 0
+    filtro = (
+        "e.activo = true" if empleado_ids is None else "e.id = ANY(CAST(:ids AS bigint[]))"
+    )
+    query_params: dict[str, object] = {
+        "desde": desde,
+        "hasta": hasta + datetime.timedelta(days=1),
+        "marcas_desde": desde - datetime.timedelta(days=1),
+        "marcas_hasta": hasta + datetime.timedelta(days=2),
+        "ids": list(empleado_ids or []),
+    }
+    async with db.transaction(db_name) as conn:
+        empleados = await conn.execute(
+            f"""
+            SELECT e.id, COALESCE(e.ganasobretiempo, false) AS sobretiempo,
+                   COALESCE(e.ganarecargonocturno, false) AS nocturno,
+                   COALESCE(e.ganarecargodialibre, false) AS dia_libre,
+                   COALESCE(e.grupo, 0) AS grupo,
+                   {f'COALESCE(e.niveladm{nivel}, 0)' if nivel else '0'} AS nivel
+            FROM public.empleados e
+            WHERE {filtro}
+            ORDER BY e.id
+            """,
+            query_params,
+        )
+        filtro_marcas = (
+            ""
+            if empleado_ids is None
+            else "AND empleado_id = ANY(CAST(:ids AS bigint[]))"
+        )
+        marcas = await conn.execute(
+            f"""
+            SELECT COALESCE(array_agg(empleado_id), '{{}}') AS empleados,
+                   COALESCE(array_agg(minuto), '{{}}') AS minutos
+            FROM (
+                SELECT empleado_id,
+                       -- floor, not a rounding cast: 08:05:30 is minute 485.
+                       CAST(floor(
+                           EXTRACT(EPOCH FROM fechahora - CAST(:desde AS timestamp)) / 60
+                       ) AS integer) AS minuto
+                FROM public.transacciones
+                WHERE fechahora >= :marcas_desde AND fechahora < :marcas_hasta
+                AND empleado_id IS NOT NULL {filtro_marcas}
+            ) m
+            """,
+            query_params,
+        )
+        justificaciones = await conn.execute(
+            """
+            SELECT j.empleado_id, j.fecha,
+                   BOOL_OR(COALESCE(d.completafalta, false)) AS falta,
+                   BOOL_OR(COALESCE(d.completaatraso, false)) AS atraso
+            FROM public.justificaciones j
+            JOIN public.detallejustificacion d ON d.codigo = j.tipo
+            WHERE j.aprobada = true AND j.fecha >= :desde AND j.fecha < :hasta
+            GROUP BY j.empleado_id, j.fecha
+            """,
+            query_params,
+        )
+
+    ids = np.array([row["id"] for row in empleados], dtype=np.int64)
+    E = len(ids)
+    niveles = np.array([row["nivel"] or 0 for row in empleados], dtype=np.int64)
+
+    marca_ids = np.asarray(marcas[0]["empleados"] if marcas else [], dtype=np.int64)
+    marca_minuto = np.asarray(marcas[0]["minutos"] if marcas else [], dtype=np.int64)
+    pos = np.searchsorted(ids, marca_ids)
+    conocido = pos < E
+    conocido[conocido] = ids[pos[conocido]] == marca_ids[conocido]
+
+    # Row 0 is the default shift; employees point at their grupo's schedule.
+    turnos = [jornada.horario()]
+    turno_pos: dict[horarios.Horario, int] = {}
+    turno = np.zeros(E, dtype=np.int64)
+    for i, row in enumerate(empleados):
+        horario = por_grupo.get(row["grupo"])
+        if horario is None:
+            continue
+        if horario not in turno_pos:
+            turno_pos[horario] = len(turnos)
+            turnos.append(horario)
+        turno[i] = turno_pos[horario]
+    compilados = [
+        horarios.compilar(h, desde, dias, (jornada.entrada, jornada.salida)) for h in turnos
+    ]
+
+    tipo = await feriados_resolver.tipos(db_name, desde, dias, niveles)
+    descanso = np.isin(tipo, (feriados.DESCANSO, feriados.RECUPERABLE))
+    laborable_turno = np.stack([c.laborable for c in compilados])[turno]
+    laborable = (laborable_turno & ~descanso) | (tipo == feriados.RECUPERACION)
+
+    falta_justificada = np.zeros((E, dias), dtype=bool)
+    atraso_justificado = np.zeros((E, dias), dtype=bool)
+    if justificaciones:
+        j_ids = np.array([row["empleado_id"] for row in justificaciones], dtype=np.int64)
+        j_pos = np.searchsorted(ids, j_ids)
+        j_off, j_dentro = _day_index(desde, dias, [row["fecha"] for row in justificaciones])
+        j_ok = j_dentro & (j_pos < E)
+        j_ok[j_ok] &= ids[j_pos[j_ok]] == j_ids[j_ok]
+        j_falta = np.array([row["falta"] for row in justificaciones], dtype=bool)
+        j_atraso = np.array([row["atraso"] for row in justificaciones], dtype=bool)
+        falta_justificada[j_pos[j_ok], j_off[j_ok]] = j_falta[j_ok]
+        atraso_justificado[j_pos[j_ok], j_off[j_ok]] = j_atraso[j_ok]
+
+    return Periodo(
+        desde=desde,
+        dias=dias,
+        empleados=ids,
+        sobretiempo=np.array([row["sobretiempo"] for row in empleados], dtype=bool),
+        nocturno=np.array([row["nocturno"] for row in empleados], dtype=bool),
+        dia_libre=np.array([row["dia_libre"] for row in empleados], dtype=bool),
+        marca_empleado=pos[conocido].astype(np.int32),
+        marca_minuto=marca_minuto[conocido],
+        laborable=laborable,
+        inicio=np.stack([c.inicio for c in compilados])[turno],
+        fin=np.stack([c.fin for c in compilados])[turno],
+        falta_justificada=falta_justificada,
+        atraso_justificado=atraso_justificado,
+        corte=np.stack([c.corte for c in compilados])[turno],
+        tolerancia=np.array([c.tolerancia for c in compilados], dtype=np.int32)[turno],
+    )
+
+
+async def guardar(resultado: Resultado, db_name: str = ASISTENCIA_DB) -> int:
+    """Store the period's results, writing only cells that changed; returns rows written.
+
+    One transaction on a dedicated connection: a binary COPY of the cells
+    into a temporary table, converted to dates and times, then one DELETE of
+    the stored rows that differ or no longer apply and one INSERT of the rows
+    that are new or differ. A recalculation that changes a few cells writes
+    a few rows, which keeps index maintenance and dead tuples proportional
+    to the changes rather than to the period.
+    """
+    hasta = resultado.desde + datetime.timedelta(days=resultado.dias)
+    valores = RESULT_COLUMNS[2:]
+    params = {
+        "desde": resultado.desde,
+        "hasta": hasta,
+        "ids": resultado.empleados.tolist(),
+    }
+    async with db.direct_connection(db_name) as conn:
+        async with conn.transaction():
+            async with conn.cursor() as cur:
+                columnas = ", ".join(
+                    f"{nombre} {_PG_TYPES[tipo]}" for nombre, tipo in CARGA_COLUMNS
+                )
+                await cur.execute(
+                    f"CREATE TEMP TABLE asistencia_carga ({columnas}) ON COMMIT DROP"
+                )
+                async with cur.copy(
+                    "COPY asistencia_carga FROM STDIN (FORMAT BINARY)"
+                ) as copy:
+                    await copy.write(resultado.copy_binario())
+                await cur.execute(
+                    f"""
+                    CREATE TEMP TABLE asistencia_nueva ON COMMIT DROP AS
+                    SELECT empleado_id, CAST(%(desde)s AS date) + dia AS fecha,
+                           CASE WHEN entrada <> {SIN_MARCA}
+                                THEN make_time(mod(entrada + 2880, 1440) / 60,
+                                               mod(entrada + 2880, 60), 0) END AS entrada,
+                           CASE WHEN salida <> {SIN_MARCA}
+                                THEN make_time(mod(salida + 2880, 1440) / 60,
+                                               mod(salida + 2880, 60), 0) END AS salida,
+                           marcas, laborable, minutos_trabajados, minutos_atraso,
+                           minutos_salida_anticipada, minutos_sobretiempo,
+                           minutos_nocturnos, minutos_dia_libre, falta, justificada
+                    FROM asistencia_carga
+                    """,
+                    params,
+                )
+                await cur.execute("ANALYZE asistencia_nueva")
+                await cur.execute(
+                    f"""
+                    DELETE FROM public.asistencia_diaria a
+                    WHERE a.fecha >= %(desde)s AND a.fecha < %(hasta)s
+                    AND a.empleado_id = ANY(CAST(%(ids)s AS bigint[]))
+                    AND NOT EXISTS (
+                        SELECT 1 FROM asistencia_nueva n
+                        WHERE n.empleado_id = a.empleado_id AND n.fecha = a.fecha
+                        AND ROW({', '.join(f'n.{c}' for c in valores)})
+                            IS NOT DISTINCT FROM ROW({', '.join(f'a.{c}' for c in valores)})
+                    )
+                    """,
+                    params,
+                )
+                await cur.execute(
+                    f"""
+                    INSERT INTO public.asistencia_diaria ({', '.join(RESULT_COLUMNS)})
+                    SELECT {', '.join(f'n.{c}' for c in RESULT_COLUMNS)}
+                    FROM asistencia_nueva n
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM public.asistencia_diaria a
+                        WHERE a.empleado_id = n.empleado_id AND a.fecha = n.fecha
+                    )
+                    """
+                )
+                return cur.rowcount
+
+
+async def calcular_periodo(
+    desde: datetime.date,
+    hasta: datetime.date,
+    empleado_ids: list[int] | None = None,
+    db_name: str = ASISTENCIA_DB,
+) -> int:
+    """Load, compute (in a thread) and store [desde, hasta]; returns rows written."""
+    start = time.perf_counter()
+    periodo = await cargar_periodo(desde, hasta, empleado_ids, db_name=db_name)
+    loaded = time.perf_counter()
+    resultado = await asyncio.to_thread(calcular, periodo)
+    computed = time.perf_counter()
+    filas = await guardar(resultado, db_name)
+    logging.info(
+        f"🧮 Attendance {desde}..{hasta}: {len(periodo.empleados)} employees, "
+        f"{len(periodo.marca_minuto)} marks, {filas} rows written "
+        f"(load {loaded - start:.2f}s, compute {computed - loaded:.2f}s, "
+        f"save {time.perf_counter() - computed:.2f}s)"
+    )
+    return filas
+
+
+async def resumen_periodo(
+    desde: datetime.date,
+    hasta: datetime.date,
+    termino: str = "",
+    limit: int = 50,
+    offset: int = 0,
+    db_name: str = ASISTENCIA_DB,
+) -> list[dict[str, object]]:
+    """Per-employee totals of the stored results of [desde, hasta].
+
+    `termino` filters by surname, name or cédula, accent-insensitively.
+    Raises on database errors.
+    """
+    condiciones = ["a.fecha >= :desde", "a.fecha <= :hasta"]
+    params: dict[str, object] = {
+        "desde": desde,
+        "hasta": hasta,
+        "limit": limit,
+        "offset": offset,
+    }
+    normalizado = search.normalize_term(termino)
+    if normalizado:
+        columnas = ("e.apellidos", "e.nombres", "e.cedula")
+        condiciones.append(
+            "("
+            + " OR ".join(
+                f"{search.NORMALIZE_FUNCTION}({c}) LIKE :contains" for c in columnas
+            )
+            + ")"
+        )
+        params["contains"] = f"%{search.escape_like(normalizado)}%"
+    async with db.transaction(db_name) as conn:
+        return await conn.execute(
+            f"""
+            SELECT e.id, e.cedula, e.apellidos, e.nombres,
+                   COUNT(*) FILTER (WHERE a.marcas > 0) AS dias_asistidos,
+                   COUNT(*) FILTER (WHERE a.falta) AS faltas,
+                   COUNT(*) FILTER (WHERE a.minutos_atraso > 0) AS atrasos,
+                   SUM(a.minutos_trabajados) AS minutos_trabajados,
+                   SUM(a.minutos_atraso) AS minutos_atraso,
+                   SUM(a.minutos_salida_anticipada) AS minutos_salida_anticipada,
+                   SUM(a.minutos_sobretiempo) AS minutos_sobretiempo,
+                   SUM(a.minutos_nocturnos) AS minutos_nocturnos,
+                   SUM(a.minutos_dia_libre) AS minutos_dia_libre
+            FROM public.asistencia_diaria a
+            JOIN public.empleados e ON e.id = a.empleado_id
+            WHERE {' AND '.join(condiciones)}
+            GROUP BY e.id, e.cedula, e.apellidos, e.nombres
+            ORDER BY e.apellidos, e.nombres, e.id
+            LIMIT :limit OFFSET :offset
+            """,
+            params,
+        )
+
+
+async def detalle_empleado(
+    empleado_id: int,
+    desde: datetime.date,
+    hasta: datetime.date,
+    db_name: str = ASISTENCIA_DB,
+) -> list[dict[str, object]]:
+    """Stored daily results of one employee in [desde, hasta], by date."""
+    async with db.transaction(db_name) as conn:
+        return await conn.execute(
+            f"""
+            SELECT {', '.join(RESULT_COLUMNS)} FROM public.asistencia_diaria
+            WHERE empleado_id = :empleado_id AND fecha >= :desde AND fecha <= :hasta
+            ORDER BY fecha
+            """,
+            {"empleado_id": empleado_id, "desde": desde, "hasta": hasta},
+        )
@@ -0,0 +1,176 @@
+import os
+import time
+import asyncio
+import logging
+import datetime
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator
+from app.utils import asistencia, db
+from app.utils.asistencia import ASISTENCIA_DB, Resultado
+
+CIERRE_PROCESOS = int(os.getenv("NOVALINK_ASISTENCIA_PROCESOS", str(os.cpu_count() or 1)))
+# Employees per shard; niveladm1 shards are packed or split to about this size.
+CIERRE_BLOQUE = int(os.getenv("NOVALINK_ASISTENCIA_BLOQUE", "5000"))
+POR_RANGO = "rango"
+POR_NIVEL = "nivel"
+
+ETAPA_CALCULANDO = "calculando"
+ETAPA_GUARDANDO = "guardando"
+ETAPA_TERMINADO = "terminado"
+
+
+@dataclass
+class ProgresoCierre:
+    etapa: str
+    bloques: int
+    completados: int = 0
+    empleados: int = 0
+    marcas: int = 0
+    filas: int = 0
+    segundos: float = 0.0
+
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def _pool() -> ProcessPoolExecutor:
+    """Worker processes for `asistencia.calcular`, started on first use.
+
+    Spawned rather than forked: the backend has an event loop, engine pools
+    and threads that a forked child must not inherit.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=CIERRE_PROCESOS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def _discard_pool():
+    """Forget a pool whose worker died, so the next close starts a new one."""
+    global _executor
+    _executor = None
+
+
+@asynccontextmanager
+async def cierre_lifespan():
+    """Lifespan task: stop the worker processes when the backend stops."""
+    try:
+        yield
+    finally:
+        global _executor
+        executor, _executor = _executor, None
+        if executor is not None:
+            await asyncio.to_thread(executor.shutdown, cancel_futures=True)
+
+
+def _empaquetar(grupos: list[list[int]], bloque: int) -> list[list[int]]:
+    """Pack small groups together and split large ones into shards of ~`bloque`."""
+    shards: list[list[int]] = []
+    actual: list[int] = []
+    for ids in grupos:
+        for i in range(0, len(ids), bloque):
+            parte = ids[i : i + bloque]
+            if actual and len(actual) + len(parte) > bloque:
+                shards.append(actual)
+                actual = []
+            actual = actual + parte
+    if actual:
+        shards.append(actual)
+    return shards
+
+
+async def bloques(
+    por: str = POR_RANGO, bloque: int = CIERRE_BLOQUE, db_name: str = ASISTENCIA_DB
+) -> list[list[int]]:
+    """Active employee ids split in shards, by id range or by niveladm1."""
+    if por == POR_NIVEL:
+        rows = await db.fetch_all(
+            """
+            SELECT array_agg(id ORDER BY id) AS ids FROM public.empleados
+            WHERE activo = true
+            GROUP BY COALESCE(niveladm1, 0)
+            ORDER BY COALESCE(niveladm1, 0)
+            """,
+            None,
+            db_name,
+        )
+        return _empaquetar([list(row["ids"]) for row in rows], bloque)
+    rows = await db.fetch_all(
+        "SELECT id FROM public.empleados WHERE activo = true ORDER BY id", None, db_name
+    )
+    return _empaquetar([[row["id"] for row in rows]], bloque)
+
+
+async def cerrar_periodo(
+    desde: datetime.date,
+    hasta: datetime.date,
+    por: str = POR_RANGO,
+    db_name: str = ASISTENCIA_DB,
+) -> AsyncIterator[ProgresoCierre]:
+    """Compute [desde, hasta] for every active employee, yielding progress.
+
+    Shards are loaded concurrently (at most CIERRE_PROCESOS at a time) and
+    computed in the process pool, so neither the event loop nor the GIL of
+    the backend carries the work. With a single shard or CIERRE_PROCESOS <= 1
+    a pool cannot help and only adds pickling, so shards are computed in a
+    thread like `asistencia.calcular_periodo` does. Once all shards are done the results are
+    merged and written with a single `asistencia.guardar` transaction;
+    nothing is written if any shard fails. Closing the iterator early
+    cancels the pending shards.
+    """
+    start = time.perf_counter()
+    shards = await bloques(por, db_name=db_name)
+    progreso = ProgresoCierre(ETAPA_CALCULANDO, len(shards))
+    yield progreso
+    loop = asyncio.get_running_loop()
+    cargas = asyncio.Semaphore(max(1, CIERRE_PROCESOS))
+    en_proceso = CIERRE_PROCESOS <= 1 or len(shards) <= 1
+
+    async def procesar(ids: list[int]) -> tuple[int, Resultado]:
+        async with cargas:
+            periodo = await asistencia.cargar_periodo(desde, hasta, ids, db_name=db_name)
+        if en_proceso:
+            resultado = await asyncio.to_thread(asistencia.calcular, periodo)
+        else:
+            resultado = await loop.run_in_executor(_pool(), asistencia.calcular, periodo)
+        return len(periodo.marca_minuto), resultado
+
+    tasks = [asyncio.create_task(procesar(ids)) for ids in shards]
+    partes: list[Resultado] = []
+    try:
+        for finished in asyncio.as_completed(tasks):
+            marcas, resultado = await finished
+            partes.append(resultado)
+            progreso.completados += 1
+            progreso.empleados += len(resultado.empleados)
+            progreso.marcas += marcas
+            progreso.segundos = time.perf_counter() - start
+            yield progreso
+    except BrokenProcessPool:
+        _discard_pool()
+        raise
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    calculado = time.perf_counter()
+    if partes:
+        progreso.etapa = ETAPA_GUARDANDO
+        yield progreso
+        progreso.filas = await asistencia.guardar(Resultado.unir(partes), db_name)
+    progreso.etapa = ETAPA_TERMINADO
+    progreso.segundos = time.perf_counter() - start
+    logging.info(
+        f"🧮 Attendance close {desde}..{hasta}: {progreso.empleados} employees in "
+        f"{len(shards)} shards by {por}, {progreso.marcas} marks, {progreso.filas} rows "
+        f"written (load+compute {calculado - start:.2f}s, "
+        f"save {time.perf_counter() - calculado:.2f}s)"
+    )
+    yield progreso
@@ -0,0 +1,376 @@
+import os
+import time
+import logging
+import datetime
+from app.utils import asistencia, db, horarios
+from app.utils.asistencia import ASISTENCIA_DB
+
+RECALCULO_INTERVALO = float(os.getenv("NOVALINK_ASISTENCIA_RECALCULO_INTERVAL", "5"))
+# Cells taken per run; a larger backlog drains over the following runs.
+RECALCULO_LOTE = int(os.getenv("NOVALINK_ASISTENCIA_RECALCULO_LOTE", "50000"))
+# Days recomputed for an employee whose attendance settings changed.
+RECALCULO_DIAS = int(os.getenv("NOVALINK_ASISTENCIA_RECALCULO_DIAS", "31"))
+CIERRE_INTERVALO = float(os.getenv("NOVALINK_ASISTENCIA_CIERRE_INTERVAL", "21600"))
+
+# Employee columns the engine reads; other edits leave results untouched.
+EMPLEADO_CAMPOS = (
+    "activo",
+    "ganasobretiempo",
+    "ganarecargonocturno",
+    "ganarecargodialibre",
+    "grupo",
+    "niveladm1",
+    "niveladm2",
+    "niveladm3",
+    "niveladm4",
+    "niveladm5",
+)
+
+
+def _triggers(tabla: str, funcion: str, sufijo: str) -> tuple[str, ...]:
+    """Statement-level INSERT/UPDATE/DELETE triggers with transition tables."""
+    return (
+        f"DROP TRIGGER IF EXISTS tr_{sufijo}_ins ON public.{tabla}",
+        f"DROP TRIGGER IF EXISTS tr_{sufijo}_upd ON public.{tabla}",
+        f"DROP TRIGGER IF EXISTS tr_{sufijo}_del ON public.{tabla}",
+        f"""
+        CREATE TRIGGER tr_{sufijo}_ins
+        AFTER INSERT ON public.{tabla}
+        REFERENCING NEW TABLE AS nuevas
+        FOR EACH STATEMENT EXECUTE FUNCTION public.{funcion}()
+        """,
+        f"""
+        CREATE TRIGGER tr_{sufijo}_upd
+        AFTER UPDATE ON public.{tabla}
+        REFERENCING OLD TABLE AS anteriores NEW TABLE AS nuevas
+        FOR EACH STATEMENT EXECUTE FUNCTION public.{funcion}()
+        """,
+        f"""
+        CREATE TRIGGER tr_{sufijo}_del
+        AFTER DELETE ON public.{tabla}
+        REFERENCING OLD TABLE AS anteriores
+        FOR EACH STATEMENT EXECUTE FUNCTION public.{funcion}()
+        """,
+    )
+
+
+def _celdas_function(nombre: str, *fechas: str) -> str:
+    """Trigger function marking the (empleado_id, date) cells of changed rows.
+
+    Each of `fechas` is a date expression over the row; NULL marks nothing.
+    """
+    valores = ", ".join(f"({fecha})" for fecha in fechas)
+    upsert = f"""
+                INSERT INTO public.asistencia_pendientes (empleado_id, fecha)
+                SELECT DISTINCT t.empleado_id, f.fecha
+                FROM {{0}} t CROSS JOIN LATERAL (VALUES {valores}) AS f(fecha)
+                WHERE t.empleado_id IS NOT NULL AND f.fecha IS NOT NULL
+                ORDER BY 1, 2
+                ON CONFLICT (empleado_id, fecha) DO UPDATE SET marcado = EXCLUDED.marcado;"""
+    return f"""
+        CREATE OR REPLACE FUNCTION public.{nombre}() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('DELETE', 'UPDATE') THEN{upsert.format('anteriores')}
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN{upsert.format('nuevas')}
+            END IF;
+            RETURN NULL;
+        END $$
+        """
+
+
+def marcas_statements() -> tuple[str, ...]:
+    """DDL marking, for each mark, every day whose window can contain it.
+
+    A day's marks run from its `corte` (horarios.compilar) to the next
+    day's, and cortes lie in [-MARGEN_ENTRADA, MINUTOS_DIA - MARGEN_ENTRADA):
+    a mark before MINUTOS_DIA - MARGEN_ENTRADA may belong to the previous
+    day, a later one to the next day. The margin is read when the migration
+    runs.
+    """
+    limite = horarios.MINUTOS_DIA - horarios.MARGEN_ENTRADA
+    hora = f"time '{limite // 60:02d}:{limite % 60:02d}'"
+    return (
+        _celdas_function(
+            "fn_asistencia_marcas",
+            "fechahora::date",
+            f"CASE WHEN fechahora::time < {hora} THEN fechahora::date - 1 END",
+            f"CASE WHEN fechahora::time >= {hora} THEN fechahora::date + 1 END",
+        ),
+    )
+
+
+def _empleados_function() -> str:
+    """Trigger function marking new active employees and edits of EMPLEADO_CAMPOS."""
+    cambios = " OR ".join(
+        f"o.{campo} IS DISTINCT FROM n.{campo}" for campo in EMPLEADO_CAMPOS
+    )
+    return f"""
+        CREATE OR REPLACE FUNCTION public.fn_asistencia_empleados() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO public.asistencia_pendientes_empleados (empleado_id)
+                SELECT id FROM nuevas WHERE activo = true ORDER BY 1
+                ON CONFLICT (empleado_id) DO UPDATE SET marcado = EXCLUDED.marcado;
+            ELSIF TG_OP = 'UPDATE' THEN
+                INSERT INTO public.asistencia_pendientes_empleados (empleado_id)
+                SELECT n.id FROM nuevas n JOIN anteriores o ON o.id = n.id
+                WHERE {cambios}
+                ORDER BY 1
+                ON CONFLICT (empleado_id) DO UPDATE SET marcado = EXCLUDED.marcado;
+            END IF;
+            RETURN NULL;
+        END $$
+        """
+
+
+def _guarded_triggers(tabla: str, funcion: str, sufijo: str) -> str:
+    """`_triggers` in a block that does nothing when `tabla` does not exist."""
+    return f"""
+        DO $$
+        BEGIN
+            IF to_regclass('public.{tabla}') IS NOT NULL THEN
+                {';'.join(_triggers(tabla, funcion, sufijo))};
+            END IF;
+        END $$
+        """
+
+
+def schema_statements() -> tuple[str, ...]:
+    """DDL for the set of attendance cells waiting to be recomputed.
+
+    Statement-level triggers record what each write affects, whoever makes
+    it (device ingestion, the admin pages, other tools):
+    marks and justifications mark their (employee, date) cells; edits of
+    the EMPLEADO_CAMPOS of an employee mark the employee (expanded to the
+    last RECALCULO_DIAS days by the worker); holiday changes mark the date
+    for every active employee. A cell marked again while being recomputed
+    gets a new `marcado` and is kept for the next run.
+    """
+    return (
+        """
+        CREATE TABLE IF NOT EXISTS public.asistencia_pendientes (
+            empleado_id BIGINT NOT NULL,
+            fecha DATE NOT NULL,
+            marcado TIMESTAMP NOT NULL DEFAULT clock_timestamp(),
+            PRIMARY KEY (empleado_id, fecha)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS public.asistencia_pendientes_empleados (
+            empleado_id BIGINT PRIMARY KEY,
+            marcado TIMESTAMP NOT NULL DEFAULT clock_timestamp()
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS public.asistencia_pendientes_fechas (
+            fecha DATE PRIMARY KEY,
+            marcado TIMESTAMP NOT NULL DEFAULT clock_timestamp()
+        )
+        """,
+        _celdas_function("fn_asistencia_marcas", "fechahora::date"),
+        *_triggers("transacciones", "fn_asistencia_marcas", "asistencia_marcas"),
+        _celdas_function("fn_asistencia_justificaciones", "fecha"),
+        *_triggers(
+            "justificaciones", "fn_asistencia_justificaciones", "asistencia_justificaciones"
+        ),
+        _empleados_function(),
+        """
+        CREATE OR REPLACE FUNCTION public.fn_asistencia_feriados() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                INSERT INTO public.asistencia_pendientes_fechas (fecha)
+                SELECT DISTINCT fecha FROM anteriores
+                WHERE fecha <= CURRENT_DATE ORDER BY 1
+                ON CONFLICT (fecha) DO UPDATE SET marcado = EXCLUDED.marcado;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO public.asistencia_pendientes_fechas (fecha)
+                SELECT DISTINCT fecha FROM nuevas
+                WHERE fecha <= CURRENT_DATE ORDER BY 1
+                ON CONFLICT (fecha) DO UPDATE SET marcado = EXCLUDED.marcado;
+            END IF;
+            RETURN NULL;
+        END $$
+        """,
+        _guarded_triggers("empleados", "fn_asistencia_empleados", "asistencia_empleados"),
+        _guarded_triggers("feriados", "fn_asistencia_feriados", "asistencia_feriados"),
+    )
+
+
+def _empleados_de(condicion: str) -> str:
+    """Mark the active employees of the grupos matching `condicion` (on g)."""
+    return f"""
+                INSERT INTO public.asistencia_pendientes_empleados (empleado_id)
+                SELECT e.id FROM public.empleados e
+                JOIN public.grupos g ON g.codigo = e.grupo
+                WHERE e.activo = true AND {condicion}
+                ORDER BY 1
+                ON CONFLICT (empleado_id) DO UPDATE SET marcado = EXCLUDED.marcado;"""
+
+
+def horario_statements() -> tuple[str, ...]:
+    """DDL marking employees whose work schedule changes.
+
+    Editing a schedule marks the employees of the grupos that use it;
+    assigning a grupo another schedule marks the grupo's employees; moving
+    an employee to another grupo is an EMPLEADO_CAMPOS edit.
+    """
+    return (
+        _empleados_function(),
+        f"""
+        CREATE OR REPLACE FUNCTION public.fn_asistencia_horarios() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('DELETE', 'UPDATE') THEN{
+                _empleados_de("g.horario IN (SELECT codigo FROM anteriores)")}
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN{
+                _empleados_de("g.horario IN (SELECT codigo FROM nuevas)")}
+            END IF;
+            RETURN NULL;
+        END $$
+        """,
+        f"""
+        CREATE OR REPLACE FUNCTION public.fn_asistencia_grupos() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' THEN{
+                _empleados_de(
+                    "g.codigo IN (SELECT n.codigo FROM nuevas n JOIN anteriores o "
+                    "ON o.codigo = n.codigo WHERE o.horario IS DISTINCT FROM n.horario)"
+                )}
+            END IF;
+            RETURN NULL;
+        END $$
+        """,
+        *_triggers("horarios", "fn_asistencia_horarios", "asistencia_horarios"),
+        _guarded_triggers("grupos", "fn_asistencia_grupos", "asistencia_grupos"),
+    )
+
+
+async def _expand(conn) -> None:
+    """Turn marked employees and dates into cells."""
+    await conn.execute(
+        """
+        WITH f AS (DELETE FROM public.asistencia_pendientes_fechas RETURNING fecha)
+        INSERT INTO public.asistencia_pendientes (empleado_id, fecha)
+        SELECT e.id, f.fecha FROM f CROSS JOIN public.empleados e
+        WHERE e.activo = true
+        ORDER BY 2, 1
+        ON CONFLICT (empleado_id, fecha) DO UPDATE SET marcado = EXCLUDED.marcado
+        """
+    )
+    await conn.execute(
+        """
+        WITH p AS (
+            DELETE FROM public.asistencia_pendientes_empleados RETURNING empleado_id
+        )
+        INSERT INTO public.asistencia_pendientes (empleado_id, fecha)
+        SELECT p.empleado_id, d.fecha
+        FROM p CROSS JOIN LATERAL (
+            SELECT CAST(g AS date) AS fecha
+            FROM generate_series(
+                CURRENT_DATE - CAST(:dias AS integer), CURRENT_DATE - 1, interval '1 day'
+            ) g
+        ) d
+        ORDER BY 2, 1
+        ON CONFLICT (empleado_id, fecha) DO UPDATE SET marcado = EXCLUDED.marcado
+        """,
+        {"dias": RECALCULO_DIAS},
+    )
+
+
+def _groups(
+    rows: list[dict],
+) -> list[tuple[datetime.date, datetime.date, list[int]]]:
+    """Split cells into (desde, hasta, empleado_ids) rectangles.
+
+    Cells are grouped by date and consecutive dates with the same employees
+    are merged, so a day of marks, one employee's window or a holiday each
+    become a single calculation covering exactly the marked cells.
+    """
+    por_fecha: dict[datetime.date, list[int]] = {}
+    for row in rows:
+        por_fecha.setdefault(row["fecha"], []).append(row["empleado_id"])
+    grupos: list[tuple[datetime.date, datetime.date, list[int]]] = []
+    for fecha in sorted(por_fecha):
+        ids = sorted(por_fecha[fecha])
+        if grupos:
+            desde, hasta, anteriores = grupos[-1]
+            if anteriores == ids and (fecha - hasta).days == 1:
+                grupos[-1] = (desde, fecha, ids)
+                continue
+        grupos.append((fecha, fecha, ids))
+    return grupos
+
+
+async def recalcular(
+    limite: int = RECALCULO_LOTE, db_name: str = ASISTENCIA_DB
+) -> int:
+    """Recompute up to `limite` pending cells and store them; returns cells done.
+
+    Cells after today (a late mark also marks the next day) wait for their
+    day. A cell is only cleared if it was not marked again while it was being
+    recomputed. On failure the cells stay pending for the next run.
+    """
+    async with db.transaction(db_name) as conn:
+        await _expand(conn)
+        # Days that have not started stay pending: computing them would
+        # store absences for every workday without marks yet.
+        rows = await conn.execute(
+            """
+            SELECT empleado_id, fecha, marcado FROM public.asistencia_pendientes
+            WHERE fecha <= CURRENT_DATE
+            ORDER BY fecha, empleado_id
+            LIMIT :limite
+            """,
+            {"limite": limite},
+        )
+    if not rows:
+        return 0
+    start = time.perf_counter()
+    grupos = _groups(rows)
+    for desde, hasta, ids in grupos:
+        await asistencia.calcular_periodo(desde, hasta, ids, db_name=db_name)
+    async with db.transaction(db_name) as conn:
+        await conn.execute(
+            """
+            DELETE FROM public.asistencia_pendientes p
+            USING unnest(
+                CAST(:ids AS bigint[]), CAST(:fechas AS date[]), CAST(:marcados AS timestamp[])
+            ) AS t(empleado_id, fecha, marcado)
+            WHERE p.empleado_id = t.empleado_id AND p.fecha = t.fecha
+            AND p.marcado = t.marcado
+            """,
+            {
+                "ids": [row["empleado_id"] for row in rows],
+                "fechas": [row["fecha"] for row in rows],
+                "marcados": [row["marcado"] for row in rows],
+            },
+        )
+    logging.info(
+        f"🧮 Recomputed {len(rows)} pending attendance cells in {len(grupos)} groups "
+        f"({time.perf_counter() - start:.2f}s)"
+    )
+    return len(rows)
+
+
+async def cerrar_dia(db_name: str = ASISTENCIA_DB) -> None:
+    """Mark yesterday for every active employee, so absences get recorded.
+
+    Days without marks produce no change events; this closes them.
+    Repeated runs are cheap since unchanged results are not rewritten.
+    """
+    await db.execute(
+        """
+        INSERT INTO public.asistencia_pendientes_fechas (fecha)
+        VALUES (CURRENT_DATE - 1)
+        ON CONFLICT (fecha) DO UPDATE SET marcado = EXCLUDED.marcado
+        """,
+        None,
+        db_name,
+    )
@@ -0,0 +1,265 @@
+import os
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from app.utils import db
+
+EMPLOYEE_CATALOG_TABLES = (
+    "niveladm1",
+    "niveladm2",
+    "niveladm3",
+    "niveladm4",
+    "niveladm5",
+    "cargos",
+    "grupos",
+    "tipoempleado",
+    "atributotabularemp",
+)
+# Tables versioned by migration 10; do not extend. Catalogs added later
+# (horarios, feriados) install the same trigger in their own migration.
+CACHED_CATALOG_TABLES = EMPLOYEE_CATALOG_TABLES
+
+
+def version_trigger_statements() -> tuple[str, ...]:
+    """DDL for public.catalogos_version and the statement triggers that bump it.
+
+    Any write to a cached catalog, from any worker or from other applications
+    sharing the database, increments the table's version so caches can detect
+    it with one cheap query.
+    """
+    return (
+        """
+        CREATE TABLE IF NOT EXISTS public.catalogos_version (
+            tabla VARCHAR(63) PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0,
+            modificado TIMESTAMP DEFAULT NOW()
+        )
+        """,
+        """
+        CREATE OR REPLACE FUNCTION public.fn_catalogos_version() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO public.catalogos_version (tabla, version, modificado)
+            VALUES (TG_TABLE_NAME, 1, NOW())
+            ON CONFLICT (tabla) DO UPDATE
+            SET version = public.catalogos_version.version + 1, modificado = NOW();
+            RETURN NULL;
+        END $$
+        """,
+        *(
+            f"""
+            DO $$
+            BEGIN
+                IF to_regclass('public.{table}') IS NOT NULL THEN
+                    DROP TRIGGER IF EXISTS tr_catalogos_version ON public.{table};
+                    CREATE TRIGGER tr_catalogos_version
+                    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.{table}
+                    FOR EACH STATEMENT EXECUTE FUNCTION public.fn_catalogos_version();
+                    INSERT INTO public.catalogos_version (tabla) VALUES ('{table}')
+                    ON CONFLICT (tabla) DO NOTHING;
+                END IF;
+            END $$
+            """
+            for table in CACHED_CATALOG_TABLES
+        ),
+    )
+
+
+def _single_query(table: str) -> str:
+    return f"SELECT to_jsonb(t) AS fila FROM public.{table} t ORDER BY t.descripcion"
+
+
+def _union_query(tables: tuple[str, ...]) -> str:
+    parts = [
+        f"SELECT '{table}' AS catalogo, to_jsonb(t) AS fila FROM public.{table} t"
+        for table in tables
+    ]
+    return f"""
+        SELECT catalogo, fila FROM ({' UNION ALL '.join(parts)}) c
+        ORDER BY catalogo, fila->>'descripcion'
+    """
+
+
+def format_timestamp(value) -> str:
+    """'YYYY-MM-DD HH24:MI' from a cached (JSON, ISO 8601) timestamp."""
+    return str(value)[:16].replace("T", " ") if value else ""
+
+
+@dataclass
+class _CachedCatalog:
+    rows: list[dict[str, object]]
+    version: int | None
+    loaded_at: float
+
+
+class CatalogCache:
+    """Process-wide, per-tenant cache of catalog tables.
+
+    Rows are stored whole (as JSON objects) and shared by every session, so
+    callers must not mutate them. Freshness is checked against
+    public.catalogos_version at most every `check_interval` seconds per
+    tenant; tables without a version row (no trigger installed) expire after
+    `ttl` seconds instead, as do tables missing on a tenant (cached empty).
+    Saves in this process call `invalidate()`.
+    """
+
+    def __init__(self, check_interval: float = 5.0, ttl: float = 60.0):
+        self.check_interval = check_interval
+        self.ttl = ttl
+        self._entries: dict[tuple[str, str], _CachedCatalog] = {}
+        self._versions: dict[str, dict[str, int] | None] = {}
+        self._checked_at: dict[str, float] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self.hits = 0
+        self.loads = 0
+
+    async def _current_versions(self, db_name: str) -> dict[str, int] | None:
+        now = time.monotonic()
+        if now - self._checked_at.get(db_name, 0.0) < self.check_interval:
+            return self._versions.get(db_name)
+        try:
+            async with db.transaction(db_name) as conn:
+                rows = await conn.execute(
+                    "SELECT tabla, version FROM public.catalogos_version"
+                )
+            versions = {row["tabla"]: row["version"] for row in rows}
+        except Exception as e:
+            logging.warning(f"Catalog versions unavailable on {db_name}: {e}")
+            versions = None
+        self._versions[db_name] = versions
+        self._checked_at[db_name] = now
+        return versions
+
+    def _is_fresh(self, entry: _CachedCatalog | None, version: int | None) -> bool:
+        if entry is None:
+            return False
+        if version is None or entry.version is None:
+            return time.monotonic() - entry.loaded_at < self.ttl
+        return entry.version == version
+
+    async def _load_one(self, db_name: str, table: str) -> list[dict[str, object]] | None:
+        """Rows of one table; None if the table does not exist on this tenant."""
+        try:
+            async with db.transaction(db_name) as conn:
+                rows = await conn.execute(_single_query(table))
+        except Exception as e:
+            orig = getattr(e, "orig", None)
+            if (getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)) == "42P01":
+                return None
+            raise
+        return [row["fila"] for row in rows]
+
+    async def _load(
+        self, db_name: str, tables: tuple[str, ...]
+    ) -> tuple[dict[str, list[dict[str, object]]], set[str], set[str]]:
+        """Read `tables` in one UNION ALL; per table (concurrently) if that fails.
+
+        Also returns the tables missing on this tenant, which read as empty
+        and are cached for `ttl` like unversioned tables, and the tables that
+        failed for any other reason, which read as empty and are not cached.
+        """
+        start = time.perf_counter()
+        loaded: dict[str, list[dict[str, object]]] = {table: [] for table in tables}
+        missing: set[str] = set()
+        failed: set[str] = set()
+        try:
+            async with db.transaction(db_name) as conn:
+                rows = await conn.execute(_union_query(tables))
+            for row in rows:
+                loaded[row["catalogo"]].append(row["fila"])
+            round_trips = 1
+        except Exception as e:
+            logging.warning(
+                f"Batched catalog query failed on {db_name}, loading per table: {e}"
+            )
+            results = await asyncio.gather(
+                *(self._load_one(db_name, t) for t in tables), return_exceptions=True
+            )
+            for table, result in zip(tables, results):
+                if isinstance(result, BaseException):
+                    logging.error(f"Catalog {table} failed to load on {db_name}: {result}")
+                    failed.add(table)
+                elif result is None:
+                    missing.add(table)
+                else:
+                    loaded[table] = result
+            if missing:
+                logging.warning(
+                    f"Catalogs missing on {db_name}, cached as empty: {sorted(missing)}"
+                )
+            round_trips = len(tables)
+        logging.info(
+            f"⏱️ {len(tables)} catalogs loaded from {db_name} in "
+            f"{(time.perf_counter() - start) * 1000:.1f} ms ({round_trips} round trips)"
+        )
+        return loaded, missing, failed
+
+    async def get_many(
+        self, db_name: str, tables: tuple[str, ...]
+    ) -> dict[str, list[dict[str, object]]]:
+        """Rows of each table ordered by descripcion, reloading only stale tables."""
+        lock = self._locks.setdefault(db_name, asyncio.Lock())
+        async with lock:
+            versions = await self._current_versions(db_name)
+            stale = tuple(
+                t
+                for t in tables
+                if not self._is_fresh(
+                    self._entries.get((db_name, t)),
+                    None if versions is None else versions.get(t),
+                )
+            )
+            loaded: dict[str, list[dict[str, object]]] = {}
+            if stale:
+                loaded, missing, failed = await self._load(db_name, stale)
+                self.loads += len(stale)
+                now = time.monotonic()
+                for table, rows in loaded.items():
+                    if table in failed:
+                        continue
+                    version = None
+                    if versions is not None and table not in missing:
+                        version = versions.get(table)
+                    self._entries[(db_name, table)] = _CachedCatalog(rows, version, now)
+            self.hits += len(tables) - len(stale)
+            return {
+                t: loaded[t] if t in loaded else self._entries[(db_name, t)].rows
+                for t in tables
+            }
+
+    async def get(self, db_name: str, table: str) -> list[dict[str, object]]:
+        return (await self.get_many(db_name, (table,)))[table]
+
+    async def version(self, db_name: str, table: str) -> int | None:
+        """Current catalogos_version of `table`, for caches built on other tables."""
+        versions = await self._current_versions(db_name)
+        return None if versions is None else versions.get(table)
+
+    def invalidate(self, db_name: str, table: str | None = None):
+        """Drop cached rows after a local write; forces a version re-check too."""
+        for key in [k for k in self._entries if k[0] == db_name]:
+            if table is None or key[1] == table:
+                del self._entries[key]
+        self._checked_at.pop(db_name, None)
+
+
+catalog_cache = CatalogCache(
+    check_interval=float(os.getenv("NOVALINK_CATALOG_CHECK_INTERVAL", "5")),
+    ttl=float(os.getenv("NOVALINK_CATALOG_TTL", "60")),
+)
+
+
+async def fetch_catalogs(
+    db_name: str, tables: tuple[str, ...] = EMPLOYEE_CATALOG_TABLES
+) -> dict[str, list[dict[str, object]]]:
+    """Active items (codigo > 0) of several catalogs as codigo/descripcion dicts."""
+    catalogs = await catalog_cache.get_many(db_name, tables)
+    return {
+        table: [
+            {"codigo": row["codigo"], "descripcion": row["descripcion"]}
+            for row in rows
+            if (row.get("codigo") or 0) > 0 and row.get("activo") is True
+        ]
+        for table, rows in catalogs.items()
+    }
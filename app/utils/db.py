@@ -0,0 +1,325 @@
+import os
+import logging
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse, urlunparse, quote_plus
+import psycopg
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import ProgrammingError, OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.utils.engine_registry import TenantEngineRegistry, PoolSizing
+
+CLOUD_DB_HOST = "86.48.22.167"
+CLOUD_DB_PORT = "5432"
+CLOUD_DB_USER = "novalink"
+CLOUD_DB_PASS = "Novalink04"
+CLOUD_BASE_URL = f"postgresql://{CLOUD_DB_USER}:{quote_plus(CLOUD_DB_PASS)}@{CLOUD_DB_HOST}:{CLOUD_DB_PORT}/serviciosdev"
+
+DB_MODE_SYNC = "sync"
+DB_MODE_ASYNC = "async"
+CONNECT_ARGS = {
+    "connect_timeout": 10,
+    "keepalives": 1,
+    "keepalives_idle": 30,
+    "keepalives_interval": 10,
+    "keepalives_count": 5,
+}
+
+engine_registry = TenantEngineRegistry.from_env()
+_db_mode_override: str | None = None
+
+
+def get_db_mode() -> str:
+    """Return the active driver mode: 'async' (psycopg3 AsyncEngine) or 'sync' (psycopg2).
+
+    Controlled by the NOVALINK_DB_MODE environment variable; defaults to async.
+    """
+    if _db_mode_override:
+        return _db_mode_override
+    mode = os.getenv("NOVALINK_DB_MODE", DB_MODE_ASYNC).strip().lower()
+    if mode not in (DB_MODE_SYNC, DB_MODE_ASYNC):
+        logging.warning(f"Unknown NOVALINK_DB_MODE '{mode}', using '{DB_MODE_ASYNC}'")
+        return DB_MODE_ASYNC
+    return mode
+
+
+def set_db_mode(mode: str | None):
+    """Force the driver mode for this process (None restores the environment setting)."""
+    global _db_mode_override
+    if mode is not None and mode not in (DB_MODE_SYNC, DB_MODE_ASYNC):
+        raise ValueError(f"Invalid database mode: {mode}")
+    _db_mode_override = mode
+
+
+def get_base_url() -> str:
+    """Get the base database URL, prioritizing local environment variables."""
+    local_url = os.getenv("REFLEX_DB_URL")
+    if local_url:
+        return local_url
+    return CLOUD_BASE_URL
+
+
+def construct_db_url(base_url: str, target_db_name: str) -> str:
+    """Construct a database URL for a specific database based on a base URL."""
+    try:
+        parsed = urlparse(base_url)
+        new_path = f"/{target_db_name}"
+        new_url = parsed._replace(path=new_path)
+        return urlunparse(new_url)
+    except Exception as e:
+        logging.exception(f"Error constructing DB URL for {target_db_name}: {e}")
+        if "/" in base_url.split("://")[1]:
+            base_parts = base_url.rsplit("/", 1)
+            return f"{base_parts[0]}/{target_db_name}"
+        return f"{base_url}/{target_db_name}"
+
+
+def resolve_db_url(db_name: str) -> str:
+    """Resolve the connection URL for a database name."""
+    base_url = get_base_url()
+    is_local = "localhost" in base_url or "127.0.0.1" in base_url
+    if is_local:
+        logging.info(
+            f"Ἶ Conectando a base de datos LOCAL ({db_name}): {urlparse(base_url).hostname}"
+        )
+    else:
+        logging.info(
+            f"☁️ Conectando a base de datos EN LA NUBE ({db_name}): {urlparse(base_url).hostname}"
+        )
+    if db_name == "novalink":
+        env_novalink = os.getenv("NOVALINK_DB_URL")
+        if env_novalink:
+            logging.info("⚡ Using explicit NOVALINK_DB_URL from environment")
+            return env_novalink
+    return construct_db_url(base_url, db_name)
+
+
+def to_async_url(url: str) -> str:
+    """Rewrite a postgres URL so SQLAlchemy uses the psycopg3 async driver."""
+    parsed = urlparse(url)
+    scheme = parsed.scheme.split("+", 1)[0]
+    if scheme in ("postgres", "postgresql"):
+        return urlunparse(parsed._replace(scheme="postgresql+psycopg"))
+    return url
+
+
+def libpq_url(db_name: str) -> str:
+    """Plain postgresql:// URL of `db_name` for direct psycopg connections."""
+    parsed = urlparse(resolve_db_url(db_name))
+    return urlunparse(parsed._replace(scheme=parsed.scheme.split("+", 1)[0]))
+
+
+async def connect_direct(db_name: str, **kwargs) -> psycopg.AsyncConnection:
+    """Open a dedicated psycopg connection counted in the connection budget.
+
+    For what a pooled session cannot do (COPY, LISTEN, session temp tables).
+    Raises when a tenant does not fit the budget; close it with close_direct().
+    """
+    if not engine_registry.reserve_direct(db_name):
+        raise Exception(f"No connection to database {db_name}")
+    try:
+        return await psycopg.AsyncConnection.connect(libpq_url(db_name), **kwargs)
+    except BaseException:
+        engine_registry.release_direct(db_name)
+        raise
+
+
+async def close_direct(db_name: str, conn: psycopg.AsyncConnection):
+    """Close a connect_direct() connection and return it to the budget."""
+    try:
+        await conn.close()
+    finally:
+        engine_registry.release_direct(db_name)
+
+
+@asynccontextmanager
+async def direct_connection(db_name: str, **kwargs):
+    """connect_direct() as a context manager."""
+    conn = await connect_direct(db_name, **kwargs)
+    try:
+        yield conn
+    finally:
+        await close_direct(db_name, conn)
+
+
+def _create_sync_engine(db_name: str, sizing: PoolSizing):
+    url = resolve_db_url(db_name)
+    if not url:
+        logging.error(f"No connection URL constructed for database: {db_name}")
+        return None
+    try:
+        logging.debug(
+            f"Creating new database engine for: {db_name} -> {url.split('@')[-1]}"
+        )
+        engine = create_engine(
+            url,
+            pool_pre_ping=True,
+            pool_size=sizing.pool_size,
+            max_overflow=sizing.max_overflow,
+            pool_recycle=1800,
+            connect_args=CONNECT_ARGS,
+        )
+        logging.info(
+            f"✅ Engine created for {db_name} (pool_size={sizing.pool_size}, max_overflow={sizing.max_overflow})"
+        )
+        return engine
+    except Exception as e:
+        logging.exception(f"Error creating database engine for {db_name}: {e}")
+        return None
+
+
+def _create_async_engine(db_name: str, sizing: PoolSizing):
+    url = resolve_db_url(db_name)
+    if not url:
+        logging.error(f"No connection URL constructed for database: {db_name}")
+        return None
+    try:
+        engine = create_async_engine(
+            to_async_url(url),
+            pool_pre_ping=True,
+            pool_size=sizing.pool_size,
+            max_overflow=sizing.max_overflow,
+            pool_recycle=1800,
+            connect_args=CONNECT_ARGS,
+        )
+        logging.info(
+            f"✅ Async engine created for {db_name} (pool_size={sizing.pool_size}, max_overflow={sizing.max_overflow})"
+        )
+        return engine
+    except Exception as e:
+        logging.exception(f"Error creating async database engine for {db_name}: {e}")
+        return None
+
+
+def get_engine(db_name: str):
+    """Get or create a synchronous engine for the specified database."""
+    return engine_registry.get(db_name or "novalink", DB_MODE_SYNC, _create_sync_engine)
+
+
+def get_async_engine(db_name: str):
+    """Get or create an AsyncEngine (psycopg3) for the specified database."""
+    return engine_registry.get(
+        db_name or "novalink", DB_MODE_ASYNC, _create_async_engine
+    )
+
+
+def invalidate_engine(db_name: str):
+    """Dispose cached engines for a database so the next call reconnects."""
+    engine_registry.invalidate(db_name)
+
+
+def engine_stats() -> dict[str, dict[str, object]]:
+    """Open, idle and checked-out connections per tenant engine, plus direct ones."""
+    return engine_registry.stats()
+
+
+def _rows(result) -> list[dict[str, object]]:
+    if not result.returns_rows:
+        return []
+    columns = result.keys()
+    return [dict(zip(columns, row)) for row in result.fetchall()]
+
+
+class DbConnection:
+    """Driver-agnostic connection handle used inside `transaction()` blocks."""
+
+    def __init__(self, conn, is_async: bool):
+        self._conn = conn
+        self.is_async = is_async
+
+    async def execute(
+        self, query: str, params: dict | list[dict] | None = None
+    ) -> list[dict[str, object]]:
+        """Execute a statement (or executemany with a list of params) and return rows."""
+        if self.is_async:
+            result = await self._conn.execute(text(query), params or {})
+        else:
+            result = self._conn.execute(text(query), params or {})
+        return _rows(result)
+
+    @asynccontextmanager
+    async def savepoint(self):
+        """Run the block in a SAVEPOINT; an exception rolls back only the block."""
+        if self.is_async:
+            async with self._conn.begin_nested():
+                yield self
+        else:
+            with self._conn.begin_nested():
+                yield self
+
+
+@asynccontextmanager
+async def transaction(db_name: str):
+    """Open a transaction on `db_name` using the active driver mode."""
+    if get_db_mode() == DB_MODE_ASYNC:
+        engine = get_async_engine(db_name)
+        if not engine:
+            raise Exception(f"No connection to database {db_name}")
+        async with engine.begin() as conn:
+            yield DbConnection(conn, True)
+    else:
+        engine = get_engine(db_name)
+        if not engine:
+            raise Exception(f"No connection to database {db_name}")
+        with engine.begin() as conn:
+            yield DbConnection(conn, False)
+
+
+async def fetch_all(
+    query: str, params: dict = None, db_name: str = "novalink"
+) -> list[dict[str, object]]:
+    """Run a read query and return rows as dicts; errors are logged and yield []."""
+    try:
+        logging.debug(f"Executing query on {db_name}")
+        if get_db_mode() == DB_MODE_ASYNC:
+            engine = get_async_engine(db_name)
+            if not engine:
+                logging.error(f"Failed to get engine for database: {db_name}")
+                return []
+            async with engine.connect() as conn:
+                result = await conn.execute(text(query), params or {})
+                return _rows(result)
+        engine = get_engine(db_name)
+        if not engine:
+            logging.error(f"Failed to get engine for database: {db_name}")
+            return []
+        with engine.connect() as conn:
+            result = conn.execute(text(query), params or {})
+            return _rows(result)
+    except ProgrammingError as e:
+        if "relation" in str(e) and "does not exist" in str(e):
+            logging.warning(f"Table not found in database {db_name}: {e}")
+        else:
+            logging.exception(f"Database programming error in {db_name}: {e}")
+        return []
+    except OperationalError as e:
+        logging.exception(f"Database operational error in {db_name}: {e}")
+        invalidate_engine(db_name)
+        return []
+    except Exception as e:
+        logging.exception(f"Error executing query in {db_name}: {e}")
+        return []
+
+
+async def execute(query: str, params: dict = None, db_name: str = "novalink"):
+    """Run a write statement in its own transaction; errors are logged and re-raised."""
+    try:
+        async with transaction(db_name) as conn:
+            await conn.execute(query, params)
+    except OperationalError as e:
+        logging.exception(f"Write operation connection error in {db_name}: {e}")
+        invalidate_engine(db_name)
+        raise e
+    except Exception as e:
+        logging.exception(f"Error executing write in {db_name}: {e}")
+        raise e
+
+
+async def ping(db_name: str) -> bool:
+    """Verify that a connection to the specified database can be established."""
+    try:
+        async with transaction(db_name) as conn:
+            await conn.execute("SELECT 1")
+        return True
+    except Exception as e:
+        logging.exception(f"Connection verification failed for {db_name}: {e}")
+        return False
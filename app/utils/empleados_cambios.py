@@ -0,0 +1,205 @@
+import os
+import logging
+from app.utils import db
+
+ROSTER_DB = "novalink"
+ROSTER_CAMPOS = ("id", "cedula", "nombres", "apellidos", "offline")
+RETENCION_BAJAS_DIAS = int(os.getenv("NOVALINK_ROSTER_RETENCION_DIAS", "90"))
+# A delta touching more employees than this is sent as a full snapshot.
+MAX_DELTA = int(os.getenv("NOVALINK_ROSTER_MAX_DELTA", "5000"))
+
+
+def schema_statements() -> tuple[str, ...]:
+    """DDL for the roster change log of public.empleados.
+
+    A row trigger appends (version, empleado_id) whenever a roster field
+    (ROSTER_CAMPOS or activo) changes, from this app or any other writer.
+    Versions come from the single row of empleados_roster_version, whose row
+    lock is held until commit, so versions are gapless and committed in order:
+    a device that has seen version N has seen every change up to N.
+    `podada` is the highest version whose log rows were deleted; devices
+    behind it get a snapshot.
+    """
+    campos = ", ".join(f"{{0}}.{campo}" for campo in (*ROSTER_CAMPOS, "activo"))
+    return (
+        """
+        CREATE TABLE IF NOT EXISTS public.empleados_roster_version (
+            id BOOLEAN PRIMARY KEY DEFAULT true CHECK (id),
+            version BIGINT NOT NULL DEFAULT 0,
+            podada BIGINT NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        INSERT INTO public.empleados_roster_version (id, version, podada) VALUES (true, 1, 1)
+        ON CONFLICT DO NOTHING
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS public.empleados_cambios (
+            version BIGINT PRIMARY KEY,
+            empleado_id INTEGER NOT NULL,
+            fecha TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+        """,
+        f"""
+        CREATE OR REPLACE FUNCTION public.fn_empleados_cambios() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            v BIGINT;
+        BEGIN
+            IF TG_OP = 'TRUNCATE' THEN
+                UPDATE public.empleados_roster_version
+                SET version = version + 1, podada = version + 1;
+                DELETE FROM public.empleados_cambios;
+                RETURN NULL;
+            END IF;
+            IF TG_OP = 'UPDATE'
+               AND ROW({campos.format('OLD')}) IS NOT DISTINCT FROM ROW({campos.format('NEW')}) THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND OLD.id <> NEW.id) THEN
+                UPDATE public.empleados_roster_version SET version = version + 1
+                RETURNING version INTO v;
+                INSERT INTO public.empleados_cambios (version, empleado_id) VALUES (v, OLD.id);
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                UPDATE public.empleados_roster_version SET version = version + 1
+                RETURNING version INTO v;
+                INSERT INTO public.empleados_cambios (version, empleado_id) VALUES (v, NEW.id);
+            END IF;
+            RETURN NULL;
+        END $$
+        """,
+        """
+        DO $$
+        BEGIN
+            IF to_regclass('public.empleados') IS NOT NULL THEN
+                DROP TRIGGER IF EXISTS tr_empleados_cambios ON public.empleados;
+                CREATE TRIGGER tr_empleados_cambios
+                AFTER INSERT OR UPDATE OR DELETE ON public.empleados
+                FOR EACH ROW EXECUTE FUNCTION public.fn_empleados_cambios();
+                DROP TRIGGER IF EXISTS tr_empleados_cambios_trunc ON public.empleados;
+                CREATE TRIGGER tr_empleados_cambios_trunc
+                AFTER TRUNCATE ON public.empleados
+                FOR EACH STATEMENT EXECUTE FUNCTION public.fn_empleados_cambios();
+            END IF;
+        END $$
+        """,
+    )
+
+
+def _fila(row: dict) -> list:
+    return [row[campo] for campo in ROSTER_CAMPOS]
+
+
+async def _snapshot(conn, version: int) -> dict[str, object]:
+    rows = await conn.execute(
+        f"""
+        SELECT {', '.join(ROSTER_CAMPOS)} FROM public.empleados
+        WHERE activo = true ORDER BY id
+        """
+    )
+    return {
+        "version": version,
+        "completo": True,
+        "campos": list(ROSTER_CAMPOS),
+        "altas": [_fila(row) for row in rows],
+        "bajas": [],
+    }
+
+
+async def changes_since(desde: int, db_name: str = ROSTER_DB) -> dict[str, object]:
+    """Roster changes after version `desde`, as a delta or a full snapshot.
+
+    A delta lists the current values of each employee changed since `desde`
+    (altas, as rows of `campos`) and the ids that left the active roster or
+    were deleted (bajas); several changes to one employee collapse into one
+    entry. A snapshot (completo=True) lists every active employee and
+    replaces what the device has; it is sent when `desde` is 0, older than the
+    pruned log, ahead of the server (restored database) or when the delta
+    would touch more than MAX_DELTA employees. Raises on database errors.
+    """
+    async with db.transaction(db_name) as conn:
+        rows = await conn.execute(
+            "SELECT version, podada FROM public.empleados_roster_version"
+        )
+        version = rows[0]["version"] if rows else 0
+        podada = rows[0]["podada"] if rows else 0
+        if desde <= 0 or desde < podada or desde > version:
+            return await _snapshot(conn, version)
+        if desde == version:
+            return {
+                "version": version,
+                "completo": False,
+                "campos": list(ROSTER_CAMPOS),
+                "altas": [],
+                "bajas": [],
+            }
+        cambios = await conn.execute(
+            f"""
+            SELECT c.empleado_id, e.activo,
+                   {', '.join(f'e.{campo} AS {campo}' for campo in ROSTER_CAMPOS)}
+            FROM (
+                SELECT DISTINCT empleado_id FROM public.empleados_cambios
+                WHERE version > :desde AND version <= :version
+            ) c
+            LEFT JOIN public.empleados e ON e.id = c.empleado_id
+            ORDER BY c.empleado_id
+            LIMIT :limite
+            """,
+            {"desde": desde, "version": version, "limite": MAX_DELTA + 1},
+        )
+        if len(cambios) > MAX_DELTA:
+            return await _snapshot(conn, version)
+    return {
+        "version": version,
+        "completo": False,
+        "campos": list(ROSTER_CAMPOS),
+        "altas": [_fila(row) for row in cambios if row["activo"]],
+        "bajas": [row["empleado_id"] for row in cambios if not row["activo"]],
+    }
+
+
+async def compact(db_name: str = ROSTER_DB) -> int:
+    """Shrink the change log; returns the rows deleted.
+
+    Entries superseded by a later change of the same employee are dropped
+    without affecting any delta. Entries of employees outside the active
+    roster older than RETENCION_BAJAS_DIAS are dropped too, and `podada`
+    advances past them so devices that far behind get a snapshot.
+    """
+    async with db.transaction(db_name) as conn:
+        superseded = await conn.execute(
+            """
+            DELETE FROM public.empleados_cambios c
+            USING (
+                SELECT empleado_id, MAX(version) AS ultima
+                FROM public.empleados_cambios GROUP BY empleado_id
+            ) u
+            WHERE c.empleado_id = u.empleado_id AND c.version < u.ultima
+            RETURNING c.version
+            """
+        )
+        bajas = await conn.execute(
+            """
+            DELETE FROM public.empleados_cambios c
+            WHERE c.fecha < NOW() - make_interval(days => CAST(:dias AS integer))
+            AND NOT EXISTS (
+                SELECT 1 FROM public.empleados e
+                WHERE e.id = c.empleado_id AND e.activo = true
+            )
+            RETURNING c.version
+            """,
+            {"dias": RETENCION_BAJAS_DIAS},
+        )
+        if bajas:
+            await conn.execute(
+                """
+                UPDATE public.empleados_roster_version
+                SET podada = GREATEST(podada, :podada)
+                """,
+                {"podada": max(row["version"] for row in bajas)},
+            )
+    deleted = len(superseded) + len(bajas)
+    if deleted:
+        logging.info(f"🗜️ Compacted employee roster log ({deleted} rows)")
+    return deleted
@@ -0,0 +1,283 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable
+
+CENTRAL_DATABASES = ("novalink", "serviciosdev")
+
+
+@dataclass(frozen=True)
+class PoolSizing:
+    pool_size: int
+    max_overflow: int
+
+    @property
+    def max_connections(self) -> int:
+        return self.pool_size + self.max_overflow
+
+
+@dataclass
+class _EngineEntry:
+    db_name: str
+    mode: str
+    engine: object
+    sizing: PoolSizing
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        logging.warning(f"Invalid integer for {name}, using {default}")
+        return default
+
+
+def _parse_overrides(raw: str) -> dict[str, PoolSizing]:
+    """Parse 'db_a=5:10,db_b=2' into per-database pool sizes."""
+    overrides = {}
+    for item in filter(None, (part.strip() for part in raw.split(","))):
+        try:
+            name, sizes = item.split("=", 1)
+            pool, _, overflow = sizes.partition(":")
+            overrides[name.strip()] = PoolSizing(int(pool), int(overflow or 0))
+        except ValueError:
+            logging.warning(f"Ignoring invalid pool override '{item}'")
+    return overrides
+
+
+def _pool_of(engine):
+    sync_engine = getattr(engine, "sync_engine", engine)
+    return sync_engine.pool
+
+
+def _checked_out(engine) -> int:
+    try:
+        return _pool_of(engine).checkedout()
+    except Exception:
+        return 0
+
+
+class TenantEngineRegistry:
+    """LRU registry of per-tenant engines sharing a process-wide connection budget.
+
+    Every engine reserves `pool_size + max_overflow` connections from the budget.
+    When a new tenant does not fit, least recently used tenant engines without
+    checked-out connections are disposed. Central databases are never evicted.
+    """
+
+    def __init__(
+        self,
+        max_connections: int,
+        idle_timeout: float,
+        tenant_sizing: PoolSizing,
+        central_sizing: dict[str, PoolSizing] | None = None,
+        overrides: dict[str, PoolSizing] | None = None,
+    ):
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.tenant_sizing = tenant_sizing
+        self.central_sizing = central_sizing or {}
+        self.overrides = overrides or {}
+        self._entries: OrderedDict[tuple[str, str], _EngineEntry] = OrderedDict()
+        self._direct: dict[str, int] = {}
+        self._lock = threading.RLock()
+        self._pending_disposals: set[asyncio.Task] = set()
+        self._last_idle_sweep = time.monotonic()
+
+    @classmethod
+    def from_env(cls) -> "TenantEngineRegistry":
+        return cls(
+            # Pooled engines and direct connections (ingestion, LISTEN, COPY
+            # saves, partition archiving) all count against it.
+            max_connections=_env_int("NOVALINK_DB_MAX_CONNECTIONS", 60),
+            idle_timeout=_env_int("NOVALINK_DB_IDLE_TIMEOUT", 600),
+            tenant_sizing=PoolSizing(
+                _env_int("NOVALINK_DB_TENANT_POOL_SIZE", 2),
+                _env_int("NOVALINK_DB_TENANT_MAX_OVERFLOW", 3),
+            ),
+            central_sizing={
+                "novalink": PoolSizing(10, 20),
+                "serviciosdev": PoolSizing(2, 3),
+            },
+            overrides=_parse_overrides(os.getenv("NOVALINK_DB_POOL_OVERRIDES", "")),
+        )
+
+    def sizing_for(self, db_name: str) -> PoolSizing:
+        if db_name in self.overrides:
+            return self.overrides[db_name]
+        return self.central_sizing.get(db_name, self.tenant_sizing)
+
+    def reserved_connections(self) -> int:
+        with self._lock:
+            return sum(e.sizing.max_connections for e in self._entries.values()) + sum(
+                self._direct.values()
+            )
+
+    def reserve_direct(self, db_name: str) -> bool:
+        """Count one direct (non-pooled) connection to `db_name` in the budget.
+
+        Makes room like a new engine would; False when a tenant does not fit.
+        Every successful call must be paired with release_direct().
+        """
+        with self._lock:
+            if self._fit_budget(db_name, PoolSizing(1, 0)) is None:
+                return False
+            self._direct[db_name] = self._direct.get(db_name, 0) + 1
+            return True
+
+    def release_direct(self, db_name: str):
+        with self._lock:
+            remaining = self._direct.get(db_name, 0) - 1
+            if remaining > 0:
+                self._direct[db_name] = remaining
+            else:
+                self._direct.pop(db_name, None)
+
+    def get(
+        self, db_name: str, mode: str, factory: Callable[[str, PoolSizing], object]
+    ):
+        """Return the engine for (db_name, mode), creating it with `factory` if needed."""
+        with self._lock:
+            key = (db_name, mode)
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.last_used = time.monotonic()
+                self._entries.move_to_end(key)
+                return entry.engine
+            if time.monotonic() - self._last_idle_sweep > 60:
+                self.evict_idle()
+            sizing = self._fit_budget(db_name, self.sizing_for(db_name))
+            if sizing is None:
+                return None
+            engine = factory(db_name, sizing)
+            if engine is None:
+                return None
+            self._entries[key] = _EngineEntry(db_name, mode, engine, sizing)
+            return engine
+
+    def _fit_budget(self, db_name: str, sizing: PoolSizing) -> PoolSizing | None:
+        """Evict LRU tenants until `sizing` fits; shrink it if the budget is still short.
+
+        None when not even one connection is left: the tenant is refused
+        (callers see no engine) rather than exceeding the budget. Central
+        databases are never refused; their overshoot is logged as an error.
+        """
+        used = self.reserved_connections()
+        for key, entry in list(self._entries.items()):
+            if used + sizing.max_connections <= self.max_connections:
+                break
+            if entry.db_name in CENTRAL_DATABASES or _checked_out(entry.engine) > 0:
+                continue
+            logging.info(
+                f"♻️ Evicting engine for {entry.db_name} ({entry.mode}) to respect connection budget"
+            )
+            self._dispose(self._entries.pop(key))
+            used -= entry.sizing.max_connections
+        available = self.max_connections - used
+        if sizing.max_connections <= available:
+            return sizing
+        if available <= 0:
+            if db_name not in CENTRAL_DATABASES:
+                logging.error(
+                    f"Connection budget exhausted ({used}/{self.max_connections}); "
+                    f"refusing an engine for {db_name}"
+                )
+                return None
+            logging.error(
+                f"Connection budget exhausted ({used}/{self.max_connections}); "
+                f"central database {db_name} exceeds it with pool_size=1"
+            )
+            return PoolSizing(1, 0)
+        pool_size = max(1, min(sizing.pool_size, available))
+        max_overflow = max(0, available - pool_size)
+        logging.warning(
+            f"Connection budget exhausted ({used}/{self.max_connections}); "
+            f"{db_name} limited to pool_size={pool_size}, max_overflow={max_overflow}"
+        )
+        return PoolSizing(pool_size, max_overflow)
+
+    def invalidate(self, db_name: str):
+        """Dispose every engine registered for `db_name`."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == db_name]:
+                logging.info(f"Invalidating engine cache for {db_name} ({key[1]})")
+                self._dispose(self._entries.pop(key))
+
+    def evict_idle(self) -> list[str]:
+        """Dispose tenant engines unused for longer than `idle_timeout` seconds."""
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            self._last_idle_sweep = now
+            for key, entry in list(self._entries.items()):
+                if entry.db_name in CENTRAL_DATABASES:
+                    continue
+                if now - entry.last_used < self.idle_timeout:
+                    continue
+                if _checked_out(entry.engine) > 0:
+                    continue
+                self._dispose(self._entries.pop(key))
+                evicted.append(entry.db_name)
+        if evicted:
+            logging.info(f"💤 Disposed idle tenant engines: {', '.join(evicted)}")
+        return evicted
+
+    def dispose_all(self):
+        with self._lock:
+            while self._entries:
+                _, entry = self._entries.popitem()
+                self._dispose(entry)
+
+    def _dispose(self, entry: _EngineEntry):
+        engine = entry.engine
+        try:
+            if hasattr(engine, "sync_engine"):
+                try:
+                    loop = asyncio.get_running_loop()
+                except RuntimeError:
+                    engine.sync_engine.dispose(close=False)
+                    return
+                task = loop.create_task(engine.dispose())
+                self._pending_disposals.add(task)
+                task.add_done_callback(self._pending_disposals.discard)
+            else:
+                engine.dispose()
+        except Exception as e:
+            logging.exception(f"Error disposing engine for {entry.db_name}: {e}")
+
+    def stats(self) -> dict[str, dict[str, object]]:
+        """Per-engine pool statistics keyed by 'db_name/mode'."""
+        now = time.monotonic()
+        result = {}
+        with self._lock:
+            for entry in self._entries.values():
+                try:
+                    pool = _pool_of(entry.engine)
+                    checked_out = pool.checkedout()
+                    idle = pool.checkedin()
+                except Exception:
+                    checked_out = idle = 0
+                result[f"{entry.db_name}/{entry.mode}"] = {
+                    "pool_size": entry.sizing.pool_size,
+                    "max_overflow": entry.sizing.max_overflow,
+                    "open": checked_out + idle,
+                    "idle": idle,
+                    "checked_out": checked_out,
+                    "idle_seconds": round(now - entry.last_used, 1),
+                }
+            for db_name, count in self._direct.items():
+                result[f"{db_name}/direct"] = {
+                    "pool_size": 0,
+                    "max_overflow": 0,
+                    "open": count,
+                    "idle": 0,
+                    "checked_out": count,
+                    "idle_seconds": 0.0,
+                }
+        return result
@@ -0,0 +1,217 @@
+import time
+import asyncio
+import logging
+import datetime
+from dataclasses import dataclass
+import numpy as np
+from app.utils import db
+from app.utils.catalogs import catalog_cache
+
+DESCANSO = 1
+RECUPERABLE = 2
+RECUPERACION = 3
+TIPOS = (DESCANSO, RECUPERABLE, RECUPERACION)
+# codigoniveladm of the tenant-wide calendar.
+NIVEL_TODOS = -1
+# Holidays live next to the attendance engine's data (ASISTENCIA_DB), where
+# migrations 19 and 21 install their triggers; the holidays page edits them here.
+FERIADOS_DB = "novalink"
+
+
+def schema_statements() -> tuple[str, ...]:
+    """DDL versioning feriados in catalogos_version, so cached calendars notice edits.
+
+    Does nothing where feriados does not exist; calendars are then empty.
+    """
+    return (
+        """
+        DO $$
+        BEGIN
+            IF to_regclass('public.feriados') IS NOT NULL THEN
+                DROP TRIGGER IF EXISTS tr_catalogos_version ON public.feriados;
+                CREATE TRIGGER tr_catalogos_version
+                AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.feriados
+                FOR EACH STATEMENT EXECUTE FUNCTION public.fn_catalogos_version();
+                INSERT INTO public.catalogos_version (tabla) VALUES ('feriados')
+                ON CONFLICT (tabla) DO NOTHING;
+                CREATE INDEX IF NOT EXISTS idx_feriados_fecha ON public.feriados (fecha);
+            END IF;
+        END $$
+        """,
+    )
+
+
+@dataclass(frozen=True)
+class CalendarioAnual:
+    """Effective holiday types of one year, by level and day of year.
+
+    Row 0 of `tipos` is the tenant-wide calendar; row i + 1 is level
+    `codigos[i]` with its own days over the tenant-wide ones. Types are 0
+    (none), DESCANSO, RECUPERABLE or RECUPERACION; day d of the year
+    (January 1st = 0) is column d. Arrays are shared and must not be
+    modified.
+    """
+
+    anio: int
+    codigos: np.ndarray
+    tipos: np.ndarray
+
+    def filas(self, niveles: np.ndarray) -> np.ndarray:
+        """Row of each level; levels without a calendar of their own use row 0."""
+        pos = np.searchsorted(self.codigos, niveles)
+        propio = pos < len(self.codigos)
+        propio[propio] = self.codigos[pos[propio]] == niveles[propio]
+        return np.where(propio, pos + 1, 0)
+
+    def tipo(self, fecha: datetime.date, nivel: int = NIVEL_TODOS) -> int:
+        """Holiday type of `fecha` for an employee of `nivel`, 0 for a regular day."""
+        fila = self.filas(np.array([nivel], dtype=np.int64))[0]
+        return int(self.tipos[fila, fecha.timetuple().tm_yday - 1])
+
+    def es_feriado(self, fecha: datetime.date, nivel: int = NIVEL_TODOS) -> bool:
+        """Whether `fecha` is a rest day (not a recovery workday) for `nivel`."""
+        return self.tipo(fecha, nivel) in (DESCANSO, RECUPERABLE)
+
+
+def _compilar(anio: int, rows: list[dict]) -> CalendarioAnual:
+    codigos = np.array(
+        sorted(
+            {
+                row["codigoniveladm"]
+                for row in rows
+                if row["codigoniveladm"] not in (None, NIVEL_TODOS)
+            }
+        ),
+        dtype=np.int64,
+    )
+    tipos = np.zeros((len(codigos) + 1, 366), dtype=np.int8)
+    if rows:
+        niveles = np.array(
+            [
+                NIVEL_TODOS if row["codigoniveladm"] is None else row["codigoniveladm"]
+                for row in rows
+            ],
+            dtype=np.int64,
+        )
+        dia = np.array([row["fecha"].timetuple().tm_yday - 1 for row in rows])
+        tipo = np.array([row["tipo"] for row in rows], dtype=np.int8)
+        fila = np.where(niveles == NIVEL_TODOS, 0, np.searchsorted(codigos, niveles) + 1)
+        tipos[fila, dia] = tipo
+        tipos[1:] = np.where(tipos[1:] > 0, tipos[1:], tipos[0])
+    tipos.flags.writeable = False
+    return CalendarioAnual(anio, codigos, tipos)
+
+
+@dataclass
+class _CachedCalendario:
+    calendario: CalendarioAnual
+    version: int | None
+    loaded_at: float
+
+
+class FeriadosResolver:
+    """Process-wide, per-tenant cache of compiled holiday calendars.
+
+    Each year is read once and compiled into a CalendarioAnual; lookups are
+    array indexing. Calendars are checked against the `feriados` version in
+    public.catalogos_version (through catalog_cache, at most every
+    check_interval) or expire after `ttl` seconds where feriados is not
+    versioned. Saves in this process call `invalidate()`.
+    """
+
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        self._entries: dict[tuple[str, int], _CachedCalendario] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def _is_fresh(self, entry: _CachedCalendario | None, version: int | None) -> bool:
+        if entry is None:
+            return False
+        if version is None or entry.version is None:
+            return time.monotonic() - entry.loaded_at < self.ttl
+        return entry.version == version
+
+    async def calendarios(
+        self, db_name: str, anios: list[int]
+    ) -> dict[int, CalendarioAnual]:
+        """Calendars of `anios`, reading the stale years in one query. Raises on errors.
+
+        Without a feriados table every calendar is empty.
+        """
+        lock = self._locks.setdefault(db_name, asyncio.Lock())
+        async with lock:
+            version = await catalog_cache.version(db_name, "feriados")
+            stale = sorted(
+                anio
+                for anio in set(anios)
+                if not self._is_fresh(self._entries.get((db_name, anio)), version)
+            )
+            if stale:
+                start = time.perf_counter()
+                async with db.transaction(db_name) as conn:
+                    existe = await conn.execute(
+                        "SELECT to_regclass('public.feriados') IS NOT NULL AS existe"
+                    )
+                    rows = []
+                    if existe[0]["existe"]:
+                        rows = await conn.execute(
+                            """
+                            SELECT fecha, tipo, codigoniveladm FROM public.feriados
+                            WHERE fecha >= :desde AND fecha < :hasta
+                            AND tipo IN (1, 2, 3)
+                            """,
+                            {
+                                "desde": datetime.date(stale[0], 1, 1),
+                                "hasta": datetime.date(stale[-1] + 1, 1, 1),
+                            },
+                        )
+                por_anio: dict[int, list[dict]] = {anio: [] for anio in stale}
+                for row in rows:
+                    if row["fecha"].year in por_anio:
+                        por_anio[row["fecha"].year].append(row)
+                now = time.monotonic()
+                for anio, filas in por_anio.items():
+                    self._entries[(db_name, anio)] = _CachedCalendario(
+                        _compilar(anio, filas), version, now
+                    )
+                logging.info(
+                    f"⏱️ Holiday calendars {stale} loaded from {db_name} in "
+                    f"{(time.perf_counter() - start) * 1000:.1f} ms"
+                )
+            return {anio: self._entries[(db_name, anio)].calendario for anio in anios}
+
+    async def calendario(self, db_name: str, anio: int) -> CalendarioAnual:
+        return (await self.calendarios(db_name, [anio]))[anio]
+
+    async def tipos(
+        self,
+        db_name: str,
+        desde: datetime.date,
+        dias: int,
+        niveles: np.ndarray,
+    ) -> np.ndarray:
+        """(E, dias) holiday types from `desde` for employees of `niveles`."""
+        hasta = desde + datetime.timedelta(days=dias - 1)
+        calendarios = await self.calendarios(
+            db_name, list(range(desde.year, hasta.year + 1))
+        )
+        niveles = np.asarray(niveles, dtype=np.int64)
+        partes = []
+        inicio = desde
+        while inicio <= hasta:
+            fin = min(hasta, datetime.date(inicio.year, 12, 31))
+            calendario = calendarios[inicio.year]
+            primero = inicio.timetuple().tm_yday - 1
+            columnas = np.arange(primero, primero + (fin - inicio).days + 1)
+            partes.append(calendario.tipos[calendario.filas(niveles)[:, None], columnas])
+            inicio = fin + datetime.timedelta(days=1)
+        return np.concatenate(partes, axis=1)
+
+    def invalidate(self, db_name: str, anio: int | None = None):
+        """Drop cached calendars of `db_name` (one year or all) after a local write."""
+        for key in [k for k in self._entries if k[0] == db_name]:
+            if anio is None or key[1] == anio:
+                del self._entries[key]
+
+
+feriados_resolver = FeriadosResolver(ttl=catalog_cache.ttl)
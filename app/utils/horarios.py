@@ -0,0 +1,155 @@
+import os
+import datetime
+import functools
+from collections import Counter
+from dataclasses import dataclass
+import numpy as np
+from app.utils.catalogs import catalog_cache
+
+MINUTOS_DIA = 1440
+SIN_HORARIO = -1
+# A day's marks are taken from this many minutes before its scheduled start
+# up to the start of the next day's window, so overnight exits and early
+# entries land on the right day.
+MARGEN_ENTRADA = int(os.getenv("NOVALINK_HORARIO_MARGEN", "240"))
+# horarios only exists next to the attendance engine's data (migration 20).
+HORARIOS_DB = "novalink"
+# Any Monday: weekly schedules anchored here start their cycle on Monday.
+FECHA_BASE_DEFECTO = datetime.date(2024, 1, 1)
+
+
+def schema_statements() -> tuple[str, ...]:
+    """DDL for work schedules (horarios) and their assignment to grupos.
+
+    A schedule is a cycle of `ciclo` days starting at `fecha_base`; day i of
+    the cycle works from entradas[i] to salidas[i] (minutes from midnight,
+    -1 on rest days; a salida at or before the entrada ends the next day).
+    A weekly schedule is a cycle of 7 anchored on a Monday; rotations (4x4,
+    6x2, 3 shifts...) use other lengths and anchors. horarios is versioned
+    like the other catalogs, so cached compilations notice edits.
+    """
+    return (
+        """
+        CREATE TABLE IF NOT EXISTS public.horarios (
+            codigo INTEGER PRIMARY KEY,
+            descripcion TEXT NOT NULL,
+            ciclo SMALLINT NOT NULL DEFAULT 7 CHECK (ciclo BETWEEN 1 AND 366),
+            fecha_base DATE NOT NULL DEFAULT DATE '2024-01-01',
+            entradas INTEGER[] NOT NULL,
+            salidas INTEGER[] NOT NULL,
+            tolerancia INTEGER NOT NULL DEFAULT 5,
+            activo BOOLEAN DEFAULT true,
+            usuario TEXT,
+            fechacreacion TIMESTAMP DEFAULT NOW(),
+            fechamodificacion TIMESTAMP,
+            CHECK (cardinality(entradas) = ciclo AND cardinality(salidas) = ciclo)
+        )
+        """,
+        "ALTER TABLE public.grupos ADD COLUMN IF NOT EXISTS horario INTEGER",
+        """
+        DROP TRIGGER IF EXISTS tr_catalogos_version ON public.horarios
+        """,
+        """
+        CREATE TRIGGER tr_catalogos_version
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.horarios
+        FOR EACH STATEMENT EXECUTE FUNCTION public.fn_catalogos_version()
+        """,
+        """
+        INSERT INTO public.catalogos_version (tabla) VALUES ('horarios')
+        ON CONFLICT (tabla) DO NOTHING
+        """,
+    )
+
+
+@dataclass(frozen=True)
+class Horario:
+    codigo: int
+    ciclo: int
+    fecha_base: datetime.date
+    entradas: tuple[int, ...]
+    salidas: tuple[int, ...]
+    tolerancia: int
+
+    @classmethod
+    def from_row(cls, row: dict) -> "Horario":
+        """From a horarios row, as read from the database or the catalog cache."""
+        fecha_base = row.get("fecha_base") or FECHA_BASE_DEFECTO
+        if isinstance(fecha_base, str):
+            fecha_base = datetime.date.fromisoformat(fecha_base[:10])
+        return cls(
+            codigo=row["codigo"],
+            ciclo=row["ciclo"],
+            fecha_base=fecha_base,
+            entradas=tuple(SIN_HORARIO if v is None else v for v in row["entradas"]),
+            salidas=tuple(SIN_HORARIO if v is None else v for v in row["salidas"]),
+            tolerancia=row.get("tolerancia") or 0,
+        )
+
+
+@dataclass(frozen=True)
+class HorarioCompilado:
+    """A schedule laid over D days: (D,) arrays of minutes from each day's midnight.
+
+    `fin` exceeds MINUTOS_DIA for overnight shifts. Rest days carry the
+    schedule's usual hours, used when a holiday turns one into a workday.
+    `corte` is where each day's window of marks starts.
+    """
+
+    laborable: np.ndarray
+    inicio: np.ndarray
+    fin: np.ndarray
+    corte: np.ndarray
+    tolerancia: int
+
+
+def _habitual(horario: Horario, defecto: tuple[int, int]) -> tuple[int, int]:
+    """Most frequent (entrada, salida) of the cycle's workdays."""
+    turnos = Counter(
+        (e, s) for e, s in zip(horario.entradas, horario.salidas) if e != SIN_HORARIO
+    )
+    return turnos.most_common(1)[0][0] if turnos else defecto
+
+
+@functools.lru_cache(maxsize=256)
+def compilar(
+    horario: Horario,
+    desde: datetime.date,
+    dias: int,
+    defecto: tuple[int, int] = (8 * 60, 17 * 60),
+) -> HorarioCompilado:
+    """Expand `horario` over `dias` days from `desde`; cached per schedule and period.
+
+    The cycle position of every day is computed at once; Horario is frozen,
+    so an edited schedule is a different cache key. Returned arrays are
+    shared between callers and must not be modified.
+    """
+    habitual_e, habitual_s = _habitual(horario, defecto)
+    entradas = np.array(horario.entradas, dtype=np.int32)
+    salidas = np.array(horario.salidas, dtype=np.int32)
+    posicion = ((desde - horario.fecha_base).days + np.arange(dias)) % horario.ciclo
+    entrada = entradas[posicion]
+    salida = salidas[posicion]
+    laborable = entrada != SIN_HORARIO
+    inicio = np.where(laborable, entrada, habitual_e).astype(np.int32)
+    fin = np.where(laborable, salida, habitual_s).astype(np.int32)
+    fin = np.where(fin <= inicio, fin + MINUTOS_DIA, fin).astype(np.int32)
+    for array in (laborable, inicio, fin):
+        array.flags.writeable = False
+    corte = np.clip(inicio - MARGEN_ENTRADA, -MARGEN_ENTRADA, MINUTOS_DIA - 1 - MARGEN_ENTRADA)
+    corte.flags.writeable = False
+    return HorarioCompilado(laborable, inicio, fin, corte.astype(np.int32), horario.tolerancia)
+
+
+async def por_grupo(db_name: str) -> dict[int, Horario]:
+    """Active schedule of each grupo that has one, from the catalog cache."""
+    catalogos = await catalog_cache.get_many(db_name, ("grupos", "horarios"))
+    horarios = {
+        row["codigo"]: Horario.from_row(row)
+        for row in catalogos["horarios"]
+        if row.get("activo") is not False
+    }
+    return {
+        row["codigo"]: horarios[row["horario"]]
+        for row in catalogos["grupos"]
+        if row.get("horario") in horarios
+    }
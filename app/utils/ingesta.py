@@ -0,0 +1,283 @@
+import os
+import time
+import asyncio
+import datetime
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+import psycopg
+from app.utils import db
+from app.utils.transacciones import TRANSACCIONES_DB
+
+MAX_CLAVE = 64
+COLUMNS = ("dispositivo_id", "empleado_id", "fechahora", "mensaje", "clave")
+
+
+def schema_statements() -> tuple[str, ...]:
+    """Columns for ingested marks and the index that makes retries idempotent.
+
+    A mark's `clave` is chosen by the device (e.g. its local sequence number)
+    and is unique per device and instant; marks without clave are never
+    deduplicated. The index includes fechahora because unique indexes on a
+    partitioned table must contain the partition key.
+    """
+    return (
+        "ALTER TABLE public.transacciones ADD COLUMN IF NOT EXISTS empleado_id INTEGER",
+        f"ALTER TABLE public.transacciones ADD COLUMN IF NOT EXISTS clave VARCHAR({MAX_CLAVE})",
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_transacciones_clave
+        ON public.transacciones (dispositivo_id, clave, fechahora)
+        """,
+    )
+
+
+class IngestaSaturada(Exception):
+    """The buffer is full; the client should retry later."""
+
+
+@dataclass
+class Marca:
+    dispositivo_id: int
+    empleado_id: int | None
+    fechahora: datetime.datetime
+    mensaje: str
+    clave: str | None
+
+    def as_row(self) -> tuple:
+        return (
+            self.dispositivo_id,
+            self.empleado_id,
+            self.fechahora,
+            self.mensaje,
+            self.clave,
+        )
+
+
+@dataclass
+class _Lote:
+    marcas: list[Marca]
+    future: asyncio.Future = field(
+        default_factory=lambda: asyncio.get_running_loop().create_future()
+    )
+
+
+@dataclass
+class IngestaMetrics:
+    lotes: int = 0
+    flushes: int = 0
+    recibidas: int = 0
+    insertadas: int = 0
+    duplicadas: int = 0
+    rechazadas: int = 0
+    fallidas: int = 0
+    last_flush_ms: float = 0.0
+    max_flush_ms: float = 0.0
+
+
+class IngestBuffer:
+    """Per-worker group commit of device marks into public.transacciones.
+
+    `submit()` queues a request's marks and waits until they are committed:
+    the flusher writes everything pending when `batch_rows` marks have
+    accumulated or `flush_interval` seconds have passed, with one COPY into
+    a temporary table and one INSERT ... ON CONFLICT DO NOTHING, on a
+    dedicated connection. Requests are therefore acknowledged only once
+    durable, yet thousands of marks share a round trip. Once `max_pending`
+    marks are waiting, new requests are refused with IngestaSaturada.
+    """
+
+    def __init__(
+        self,
+        batch_rows: int = 2000,
+        flush_interval: float = 0.1,
+        max_pending: int = 50000,
+        device_ttl: float = 60.0,
+    ):
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.device_ttl = device_ttl
+        self.metrics = IngestaMetrics()
+        self._pending: list[_Lote] = []
+        self._pending_rows = 0
+        self._in_flight = 0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        self._conn: psycopg.AsyncConnection | None = None
+        self._devices: set[int] = set()
+        self._devices_loaded_at = 0.0
+        self._devices_lock = asyncio.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending_rows + self._in_flight
+
+    async def known_device(self, codigo: int) -> bool:
+        """Whether dispositivos.codigo exists.
+
+        The codes are reloaded every `device_ttl` seconds, or sooner (at most
+        every 5 s) when an unknown code shows up, so new devices are accepted
+        quickly without letting bad codes hit the database on every request.
+        """
+        loaded_at = self._devices_loaded_at
+        age = time.monotonic() - loaded_at
+        if age > self.device_ttl or (codigo not in self._devices and age > 5.0):
+            async with self._devices_lock:
+                if self._devices_loaded_at == loaded_at:
+                    rows = await db.fetch_all(
+                        "SELECT codigo FROM public.dispositivos",
+                        db_name=TRANSACCIONES_DB,
+                    )
+                    if rows:
+                        self._devices = {row["codigo"] for row in rows}
+                    self._devices_loaded_at = time.monotonic()
+        return codigo in self._devices
+
+    async def submit(self, marcas: list[Marca]) -> dict[str, int]:
+        """Queue `marcas` and wait for their commit; counts inserted/duplicated."""
+        if not marcas:
+            return {"recibidas": 0, "insertadas": 0, "duplicadas": 0}
+        if self._closing or self.pending + len(marcas) > self.max_pending:
+            self.metrics.rechazadas += len(marcas)
+            raise IngestaSaturada()
+        self.start()
+        lote = _Lote(marcas)
+        self._pending.append(lote)
+        self._pending_rows += len(marcas)
+        self.metrics.lotes += 1
+        self.metrics.recibidas += len(marcas)
+        if self._pending_rows >= self.batch_rows:
+            self._wakeup.set()
+        return await lote.future
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _disconnect(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            await db.close_direct(TRANSACCIONES_DB, conn)
+
+    async def _connection(self) -> psycopg.AsyncConnection:
+        if self._conn is None or self._conn.closed:
+            await self._disconnect()
+            self._conn = await db.connect_direct(TRANSACCIONES_DB)
+            await self._conn.execute(
+                """
+                CREATE TEMP TABLE IF NOT EXISTS ingesta_marcas (
+                    dispositivo_id BIGINT,
+                    empleado_id BIGINT,
+                    fechahora TIMESTAMP,
+                    mensaje TEXT,
+                    clave VARCHAR(64)
+                ) ON COMMIT DELETE ROWS
+                """
+            )
+            await self._conn.commit()
+        return self._conn
+
+    async def _write(self, marcas: list[Marca]) -> set[tuple[int, str, datetime.datetime]]:
+        """COPY + INSERT in one transaction; keys of the rows actually inserted."""
+        conn = await self._connection()
+        async with conn.transaction():
+            async with conn.cursor() as cur:
+                async with cur.copy(
+                    f"COPY ingesta_marcas ({', '.join(COLUMNS)}) FROM STDIN"
+                ) as copy:
+                    for marca in marcas:
+                        await copy.write_row(marca.as_row())
+                await cur.execute(
+                    f"""
+                    INSERT INTO public.transacciones ({', '.join(COLUMNS)})
+                    SELECT {', '.join(COLUMNS)} FROM ingesta_marcas
+                    ORDER BY fechahora
+                    ON CONFLICT DO NOTHING
+                    RETURNING dispositivo_id, clave, fechahora
+                    """
+                )
+                return {
+                    row for row in await cur.fetchall() if row[1] is not None
+                }
+
+    async def flush(self):
+        """Write every pending mark now and resolve the waiting requests."""
+        if not self._pending:
+            return
+        lotes, self._pending = self._pending, []
+        self._in_flight, self._pending_rows = self._pending_rows, 0
+        marcas = [marca for lote in lotes for marca in lote.marcas]
+        start = time.perf_counter()
+        try:
+            inserted_keys = await self._write(marcas)
+        except Exception as e:
+            logging.exception(f"Error flushing {len(marcas)} ingested marks: {e}")
+            self.metrics.fallidas += len(marcas)
+            await self._disconnect()
+            for lote in lotes:
+                if not lote.future.done():
+                    lote.future.set_exception(e)
+            return
+        finally:
+            self._in_flight = 0
+        elapsed = (time.perf_counter() - start) * 1000
+        self.metrics.flushes += 1
+        self.metrics.last_flush_ms = elapsed
+        self.metrics.max_flush_ms = max(self.metrics.max_flush_ms, elapsed)
+        # Each inserted key is credited to its first copy in the flush; later
+        # copies of the same key, in any batch, are duplicates.
+        for lote in lotes:
+            duplicadas = 0
+            for m in lote.marcas:
+                if m.clave is None:
+                    continue
+                key = (m.dispositivo_id, m.clave, m.fechahora)
+                if key in inserted_keys:
+                    inserted_keys.discard(key)
+                else:
+                    duplicadas += 1
+            result = {
+                "recibidas": len(lote.marcas),
+                "insertadas": len(lote.marcas) - duplicadas,
+                "duplicadas": duplicadas,
+            }
+            self.metrics.insertadas += result["insertadas"]
+            self.metrics.duplicadas += duplicadas
+            if not lote.future.done():
+                lote.future.set_result(result)
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def close(self):
+        """Stop the flusher after writing what is pending."""
+        self._closing = True
+        self._wakeup.set()
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+        await self._disconnect()
+
+
+ingest_buffer = IngestBuffer(
+    batch_rows=int(os.getenv("NOVALINK_INGESTA_LOTE", "2000")),
+    flush_interval=float(os.getenv("NOVALINK_INGESTA_INTERVALO", "0.1")),
+    max_pending=int(os.getenv("NOVALINK_INGESTA_MAX_PENDIENTES", "50000")),
+)
+
+
+@asynccontextmanager
+async def ingesta_lifespan():
+    """Lifespan task: flush buffered marks before the backend stops."""
+    try:
+        yield
+    finally:
+        await ingest_buffer.close()
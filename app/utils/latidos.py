@@ -0,0 +1,178 @@
+import os
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from app.utils import db
+
+LATIDOS_DB = "novalink"
+
+
+def schema_statements() -> tuple[str, ...]:
+    """DDL for the last heartbeat heard by any worker, which decides offline."""
+    return (
+        "ALTER TABLE public.dispositivos ADD COLUMN IF NOT EXISTS ultimolatido TIMESTAMP",
+        # Devices online before the upgrade get a full timeout.
+        """
+        UPDATE public.dispositivos SET ultimolatido = NOW()
+        WHERE enlinea = true AND ultimolatido IS NULL
+        """,
+    )
+
+
+@dataclass
+class EstadoDispositivo:
+    last_seen: float
+    beats: int = 0
+    en_linea: bool = False
+    pendiente: bool = True
+
+
+class LivenessTracker:
+    """Derives dispositivos.enlinea from device heartbeats.
+
+    `beat()` only records the instant a device was heard from (a heartbeat or
+    an ingested batch) and costs no query. Going online uses hysteresis so a
+    device on a flaky link does not flap: it needs `online_beats` heartbeats
+    without a gap longer than `offline_after` seconds. `sweep()`, run by the
+    scheduler every `sweep_interval` seconds, writes the devices heard since
+    the previous sweep in one UPDATE (dispositivos.ultimolatido, and enlinea
+    once they are online here), then turns offline the devices no worker has
+    heard for `offline_after` seconds. Offline is thus decided from the
+    shared last heartbeat, so devices may beat to any backend worker.
+    """
+
+    def __init__(
+        self,
+        db_name: str = LATIDOS_DB,
+        offline_after: float = 90.0,
+        online_beats: int = 2,
+        sweep_interval: float = 5.0,
+    ):
+        self.db_name = db_name
+        self.offline_after = offline_after
+        self.online_beats = online_beats
+        self.sweep_interval = sweep_interval
+        self._estados: dict[int, EstadoDispositivo] = {}
+        self._sweeping = False
+        self._lectura = asyncio.Lock()
+        self._leidos: dict[int, dict[str, object]] = {}
+        self._leido_at = 0.0
+
+    def beat(self, codigo: int, now: float | None = None):
+        """Record that device `codigo` is alive."""
+        now = time.monotonic() if now is None else now
+        estado = self._estados.get(codigo)
+        if estado is None:
+            estado = self._estados[codigo] = EstadoDispositivo(last_seen=now)
+        elif now - estado.last_seen > self.offline_after:
+            estado.beats = 0
+        estado.beats += 1
+        estado.last_seen = now
+        estado.pendiente = True
+        if not estado.en_linea and estado.beats >= self.online_beats:
+            estado.en_linea = True
+            logging.info(f"📶 Device {codigo} is online")
+
+    async def estados(self) -> dict[int, dict[str, object]]:
+        """Shared status and seconds since any worker last heard each device.
+
+        Read from dispositivos at most once per `sweep_interval` for the
+        whole process, however many pages ask; on errors the last reading
+        is kept.
+        """
+        async with self._lectura:
+            if time.monotonic() - self._leido_at < self.sweep_interval:
+                return self._leidos
+            try:
+                async with db.transaction(self.db_name) as conn:
+                    rows = await conn.execute(
+                        """
+                        SELECT codigo, enlinea,
+                               CAST(EXTRACT(EPOCH FROM NOW() - ultimolatido) AS integer)
+                                   AS segundos
+                        FROM public.dispositivos WHERE codigo > 0
+                        """
+                    )
+            except Exception as e:
+                logging.warning(f"Device status unavailable: {e}")
+                return self._leidos
+            self._leidos = {
+                row["codigo"]: {
+                    "en_linea": bool(row["enlinea"]),
+                    "segundos": None
+                    if row["segundos"] is None
+                    else max(0, row["segundos"]),
+                }
+                for row in rows
+            }
+            self._leido_at = time.monotonic()
+            return self._leidos
+
+    async def sweep(self) -> int:
+        """Persist heartbeats heard here and time out silent devices; returns rows written."""
+        if self._sweeping:
+            return 0
+        self._sweeping = True
+        try:
+            now = time.monotonic()
+            for estado in self._estados.values():
+                if estado.en_linea and now - estado.last_seen > self.offline_after:
+                    estado.en_linea = False
+                    estado.beats = 0
+            oidos = {
+                codigo: estado
+                for codigo, estado in self._estados.items()
+                if estado.pendiente
+            }
+            try:
+                async with db.transaction(self.db_name) as conn:
+                    if oidos:
+                        await conn.execute(
+                            """
+                            UPDATE public.dispositivos d
+                            SET ultimolatido = GREATEST(
+                                    d.ultimolatido, NOW() - make_interval(secs => v.edad)
+                                ),
+                                enlinea = d.enlinea OR v.enlinea
+                            FROM unnest(
+                                CAST(:codigos AS bigint[]),
+                                CAST(:edades AS float8[]),
+                                CAST(:estados AS boolean[])
+                            ) AS v(codigo, edad, enlinea)
+                            WHERE d.codigo = v.codigo
+                            """,
+                            {
+                                "codigos": list(oidos),
+                                "edades": [now - e.last_seen for e in oidos.values()],
+                                "estados": [e.en_linea for e in oidos.values()],
+                            },
+                        )
+                    caidos = await conn.execute(
+                        """
+                        UPDATE public.dispositivos SET enlinea = false
+                        WHERE enlinea = true AND (
+                            ultimolatido IS NULL
+                            OR ultimolatido < NOW() - make_interval(secs => :timeout)
+                        )
+                        RETURNING codigo
+                        """,
+                        {"timeout": self.offline_after},
+                    )
+            except Exception as e:
+                logging.exception(f"Error writing device status: {e}")
+                return 0
+            for estado in oidos.values():
+                estado.pendiente = False
+            for row in caidos:
+                logging.info(f"📴 Device {row['codigo']} is offline")
+            return len(oidos) + len(caidos)
+        finally:
+            self._sweeping = False
+
+
+liveness_tracker = LivenessTracker(
+    offline_after=float(os.getenv("NOVALINK_LATIDO_TIMEOUT", "90")),
+    online_beats=int(os.getenv("NOVALINK_LATIDOS_EN_LINEA", "2")),
+    sweep_interval=float(os.getenv("NOVALINK_LATIDOS_INTERVAL", "5")),
+)
@@ -0,0 +1,491 @@
+import os
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from app.utils import (
+    db,
+    asistencia,
+    asistencia_pendientes,
+    empleados_cambios,
+    feriados,
+    horarios,
+    ingesta,
+    latidos,
+    search,
+    sondeo,
+    catalogs,
+    transacciones,
+    transacciones_feed,
+    transacciones_particiones,
+    transacciones_resumen,
+)
+
+CENTRAL_DATABASE = "novalink"
+SCOPE_CENTRAL = "central"
+SCOPE_TENANT = "tenant"
+# Seconds before migrating a database is retried after a failed run.
+REINTENTO_MIGRACIONES = float(os.getenv("NOVALINK_MIGRACIONES_REINTENTO", "300"))
+
+
+@dataclass(frozen=True)
+class Migration:
+    """A versioned schema change.
+
+    `scope` selects where it runs: SCOPE_CENTRAL only on the central `novalink`
+    database, SCOPE_TENANT on every company database (novalink included).
+    When `tolerant` is set each statement runs in its own savepoint and
+    failures (e.g. a trigger or table that does not exist) are only logged.
+    """
+
+    version: int
+    description: str
+    statements: tuple[str, ...]
+    scope: str = SCOPE_CENTRAL
+    tolerant: bool = False
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(
+        1,
+        "Tabla de sesiones",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS public.sesiones (
+                id SERIAL PRIMARY KEY,
+                token VARCHAR(255) UNIQUE NOT NULL,
+                usuario_id INTEGER NOT NULL,
+                database_name VARCHAR(50) NOT NULL,
+                fecha_inicio TIMESTAMP DEFAULT NOW(),
+                fecha_ultimo_acceso TIMESTAMP DEFAULT NOW(),
+                fecha_expiracion TIMESTAMP,
+                ip_address VARCHAR(50),
+                user_agent TEXT,
+                activa BOOLEAN DEFAULT true
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_sesiones_token ON public.sesiones(token)",
+        ),
+    ),
+    Migration(
+        2,
+        "Tabla de empleados",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS public.empleados (
+                id BIGINT PRIMARY KEY,
+                cedula VARCHAR(20),
+                apellidos VARCHAR(50),
+                nombres VARCHAR(50),
+                correoelectronico VARCHAR(50),
+                telefono VARCHAR(50) DEFAULT '',
+                direccion VARCHAR(200) DEFAULT '',
+                fechanacimiento DATE DEFAULT NOW(),
+                solotarjeta BOOLEAN DEFAULT false,
+                ganarecargonocturno BOOLEAN DEFAULT false,
+                ganasobretiempo BOOLEAN DEFAULT false,
+                stconautorizacion BOOLEAN DEFAULT false,
+                ganarecargodialibre BOOLEAN DEFAULT false,
+                offline BOOLEAN DEFAULT false,
+                niveladm1 BIGINT DEFAULT 0,
+                niveladm2 BIGINT DEFAULT 0,
+                niveladm3 BIGINT DEFAULT 0,
+                niveladm4 BIGINT DEFAULT 0,
+                niveladm5 BIGINT DEFAULT 0,
+                cargo BIGINT DEFAULT 0,
+                tipo BIGINT DEFAULT 0,
+                grupo BIGINT DEFAULT 0,
+                atributotabular BIGINT DEFAULT 0,
+                atributotexto VARCHAR(10),
+                accesoweb BOOLEAN DEFAULT false,
+                pwd TEXT,
+                activo BOOLEAN DEFAULT true,
+                fechacreacion TIMESTAMP DEFAULT NOW(),
+                usuario BIGINT DEFAULT 1,
+                usuariocrea BIGINT DEFAULT 1,
+                fechamodificacion TIMESTAMP,
+                usuariomodifica BIGINT,
+                nivelautorizacion SMALLINT DEFAULT 0
+            )
+            """,
+            "ALTER TABLE public.empleados DISABLE TRIGGER tr_log_empleados",
+            "ALTER TABLE public.empleados ADD COLUMN IF NOT EXISTS usuario BIGINT DEFAULT 1",
+            "ALTER TABLE public.empleados ADD COLUMN IF NOT EXISTS grupo BIGINT DEFAULT 0",
+            "ALTER TABLE public.empleados ADD COLUMN IF NOT EXISTS telefono VARCHAR(50) DEFAULT ''",
+            "ALTER TABLE public.empleados ALTER COLUMN telefono TYPE VARCHAR(50), ALTER COLUMN telefono SET DEFAULT ''",
+            "UPDATE public.empleados SET telefono = '' WHERE telefono IS NULL",
+            "ALTER TABLE public.empleados ADD COLUMN IF NOT EXISTS direccion VARCHAR(200) DEFAULT ''",
+            "ALTER TABLE public.empleados ALTER COLUMN direccion TYPE VARCHAR(200), ALTER COLUMN direccion SET DEFAULT ''",
+            "UPDATE public.empleados SET direccion = '' WHERE direccion IS NULL",
+            "ALTER TABLE public.empleados ADD COLUMN IF NOT EXISTS fechanacimiento DATE DEFAULT NOW()",
+            "ALTER TABLE public.empleados ADD COLUMN IF NOT EXISTS solotarjeta BOOLEAN DEFAULT false",
+            "UPDATE public.empleados SET solotarjeta = false WHERE solotarjeta IS NULL",
+            "ALTER TABLE public.empleados ADD COLUMN IF NOT EXISTS nivelautorizacion SMALLINT DEFAULT 0",
+            "UPDATE public.empleados SET nivelautorizacion = 0 WHERE nivelautorizacion IS NULL",
+            "ALTER TABLE public.empleados ALTER COLUMN nivelautorizacion SET DEFAULT 0",
+            "ALTER TABLE public.empleados ENABLE TRIGGER tr_log_empleados",
+        ),
+        tolerant=True,
+    ),
+    Migration(
+        3,
+        "Tabla de jerarquías",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS public.jerarquias (
+                id SERIAL PRIMARY KEY,
+                superior BIGINT,
+                subalterno BIGINT,
+                fechacreacion TIMESTAMP DEFAULT NOW(),
+                usuariocrea BIGINT
+            )
+            """,
+            "ALTER TABLE public.jerarquias DROP COLUMN IF EXISTS empleado_superior",
+            "ALTER TABLE public.jerarquias DROP COLUMN IF EXISTS empleado_subordinado",
+            "ALTER TABLE public.jerarquias DROP COLUMN IF EXISTS usuario",
+            "ALTER TABLE public.jerarquias DROP COLUMN IF EXISTS subordinado",
+            "ALTER TABLE public.jerarquias ADD COLUMN IF NOT EXISTS superior BIGINT",
+            "ALTER TABLE public.jerarquias ADD COLUMN IF NOT EXISTS subalterno BIGINT",
+            "ALTER TABLE public.jerarquias ADD COLUMN IF NOT EXISTS fechacreacion TIMESTAMP DEFAULT NOW()",
+            "ALTER TABLE public.jerarquias ADD COLUMN IF NOT EXISTS usuariocrea BIGINT",
+        ),
+        tolerant=True,
+    ),
+    Migration(
+        4,
+        "Eliminar llaves foráneas de empleados (permite valores 0 por defecto)",
+        (
+            """
+            DO $$
+            DECLARE r record;
+            BEGIN
+                FOR r IN
+                    SELECT constraint_name
+                    FROM information_schema.table_constraints
+                    WHERE table_name = 'empleados'
+                    AND constraint_type = 'FOREIGN KEY'
+                    AND table_schema = 'public'
+                LOOP
+                    EXECUTE format('ALTER TABLE public.empleados DROP CONSTRAINT %I', r.constraint_name);
+                END LOOP;
+            END $$
+            """,
+        ),
+    ),
+    Migration(
+        5,
+        "Tabla de transacciones",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS public.transacciones (
+                id SERIAL PRIMARY KEY,
+                dispositivo_id BIGINT,
+                fechahora TIMESTAMP DEFAULT NOW(),
+                mensaje TEXT
+            )
+            """,
+        ),
+    ),
+    Migration(
+        6,
+        "Columna activo en catálogos, atributotabularemp y tipoempleado",
+        (
+            *(
+                f"ALTER TABLE public.niveladm{i} ADD COLUMN IF NOT EXISTS activo BOOLEAN DEFAULT true"
+                for i in range(1, 6)
+            ),
+            "ALTER TABLE public.cargos ADD COLUMN IF NOT EXISTS activo BOOLEAN DEFAULT true",
+            "ALTER TABLE public.grupos ADD COLUMN IF NOT EXISTS activo BOOLEAN DEFAULT true",
+            """
+            CREATE TABLE IF NOT EXISTS public.atributotabularemp (
+                codigo INTEGER PRIMARY KEY,
+                descripcion TEXT,
+                niveladm1 INTEGER,
+                fechacreacion TIMESTAMP,
+                usuario TEXT,
+                activo BOOLEAN DEFAULT true
+            )
+            """,
+            "ALTER TABLE public.atributotabularemp ADD COLUMN IF NOT EXISTS niveladm1 INTEGER",
+            "ALTER TABLE public.atributotabularemp ADD COLUMN IF NOT EXISTS activo BOOLEAN DEFAULT true",
+            """
+            CREATE TABLE IF NOT EXISTS public.tipoempleado (
+                codigo INTEGER PRIMARY KEY,
+                descripcion TEXT,
+                fechacreacion TIMESTAMP,
+                usuario TEXT,
+                activo BOOLEAN DEFAULT true
+            )
+            """,
+            "ALTER TABLE public.tipoempleado ADD COLUMN IF NOT EXISTS activo BOOLEAN DEFAULT true",
+        ),
+        scope=SCOPE_TENANT,
+        tolerant=True,
+    ),
+    Migration(
+        7,
+        "Registro de ejecución de tareas programadas",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS public.tareas_programadas (
+                nombre VARCHAR(100) PRIMARY KEY,
+                ultima_ejecucion TIMESTAMP NOT NULL DEFAULT NOW(),
+                duracion_ms INTEGER DEFAULT 0,
+                exitosa BOOLEAN DEFAULT true,
+                worker VARCHAR(100)
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_sesiones_expiracion_activa
+            ON public.sesiones(fecha_expiracion) WHERE activa = true
+            """,
+        ),
+    ),
+    Migration(
+        8,
+        "Índices de búsqueda y paginación de empleados",
+        (
+            """
+            CREATE INDEX IF NOT EXISTS idx_empleados_orden
+            ON public.empleados ((COALESCE(apellidos, '')), (COALESCE(nombres, '')), id)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_empleados_cedula
+            ON public.empleados (cedula text_pattern_ops)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_empleados_reciente
+            ON public.empleados ((GREATEST(fechacreacion, fechamodificacion)))
+            """,
+        ),
+        tolerant=True,
+    ),
+    Migration(
+        9,
+        "Búsqueda sin acentos con índices trigram (pg_trgm/unaccent)",
+        (
+            *search.schema_statements(),
+            "DROP INDEX IF EXISTS public.idx_empleados_orden",
+        ),
+        scope=SCOPE_TENANT,
+        tolerant=True,
+    ),
+    Migration(
+        10,
+        "Versiones de catálogos para invalidar cachés",
+        catalogs.version_trigger_statements(),
+        scope=SCOPE_TENANT,
+        tolerant=True,
+    ),
+    Migration(
+        11,
+        "Índices por fecha y contador diario de transacciones",
+        transacciones.schema_statements(),
+    ),
+    Migration(
+        12,
+        "Notificación de transacciones nuevas (LISTEN/NOTIFY)",
+        transacciones_feed.notify_statements(),
+    ),
+    Migration(
+        13,
+        "Particionado mensual de transacciones",
+        (
+            *transacciones_particiones.partition_statements(),
+            *transacciones.counter_statements(),
+            *transacciones_feed.notify_statements(),
+        ),
+    ),
+    Migration(
+        14,
+        "Empleado y clave de idempotencia en transacciones ingeridas",
+        ingesta.schema_statements(),
+    ),
+    Migration(
+        15,
+        "Resumen de transacciones por hora y dispositivo",
+        transacciones_resumen.rollup_statements(),
+    ),
+    Migration(
+        16,
+        "Dirección de red de los dispositivos",
+        sondeo.schema_statements(),
+    ),
+    Migration(
+        17,
+        "Registro versionado de cambios del padrón de empleados",
+        empleados_cambios.schema_statements(),
+        scope=SCOPE_TENANT,
+        tolerant=True,
+    ),
+    Migration(
+        18,
+        "Justificaciones y resultados diarios de asistencia",
+        asistencia.schema_statements(),
+    ),
+    Migration(
+        19,
+        "Celdas de asistencia pendientes de recálculo",
+        asistencia_pendientes.schema_statements(),
+    ),
+    Migration(
+        20,
+        "Horarios de trabajo por grupo",
+        (*horarios.schema_statements(), *asistencia_pendientes.horario_statements()),
+    ),
+    Migration(
+        21,
+        "Versión de los calendarios de feriados",
+        feriados.schema_statements(),
+    ),
+    Migration(
+        22,
+        "Último latido de los dispositivos",
+        latidos.schema_statements(),
+    ),
+    Migration(
+        23,
+        "Marcas pendientes en los días cuya jornada las contiene",
+        asistencia_pendientes.marcas_statements(),
+    ),
+    # 24 and 25 rewrite the whole table (every transacciones partition)
+    # under an ACCESS EXCLUSIVE lock, blocking ingestion meanwhile; on large
+    # databases schedule the upgrade that brings them in a maintenance window.
+    Migration(
+        24,
+        "Empleado de las transacciones como BIGINT, como empleados.id",
+        ("ALTER TABLE public.transacciones ALTER COLUMN empleado_id TYPE BIGINT",),
+    ),
+    Migration(
+        25,
+        "Empleado del registro de cambios del padrón como BIGINT",
+        (
+            "ALTER TABLE IF EXISTS public.empleados_cambios "
+            "ALTER COLUMN empleado_id TYPE BIGINT",
+        ),
+        scope=SCOPE_TENANT,
+    ),
+    Migration(
+        26,
+        "Quitar el índice de orden por nombre que la búsqueda ya no usa",
+        ("DROP INDEX IF EXISTS public.idx_empleados_orden",),
+        scope=SCOPE_TENANT,
+    ),
+)
+
+_migrated_databases: set[str] = set()
+_retry_at: dict[str, float] = {}
+_locks: dict[str, asyncio.Lock] = {}
+
+
+def migrations_for(db_name: str) -> list[Migration]:
+    """Migrations that apply to `db_name`, in version order."""
+    return sorted(
+        (
+            m
+            for m in MIGRATIONS
+            if m.scope == SCOPE_TENANT or db_name == CENTRAL_DATABASE
+        ),
+        key=lambda m: m.version,
+    )
+
+
+async def _applied_versions(conn) -> set[int]:
+    exists = await conn.execute(
+        "SELECT to_regclass('public.schema_migrations') IS NOT NULL AS existe"
+    )
+    if not exists or not exists[0]["existe"]:
+        await conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS public.schema_migrations (
+                version INTEGER PRIMARY KEY,
+                descripcion TEXT,
+                aplicada TIMESTAMP DEFAULT NOW()
+            )
+            """
+        )
+        return set()
+    rows = await conn.execute("SELECT version FROM public.schema_migrations")
+    return {row["version"] for row in rows}
+
+
+async def _apply(conn, migration: Migration):
+    """Run `migration` and record it as applied.
+
+    Statements of a tolerant migration that fail (optional triggers, tables
+    or extensions a database does not have) are skipped and logged; the
+    migration is recorded anyway, so it never runs again.
+    """
+    skipped = 0
+    for statement in migration.statements:
+        if not migration.tolerant:
+            await conn.execute(statement)
+            continue
+        try:
+            async with conn.savepoint():
+                await conn.execute(statement)
+        except Exception as e:
+            skipped += 1
+            logging.warning(
+                f"Migration {migration.version}: statement skipped ({str(e).splitlines()[0]})"
+            )
+    if skipped:
+        logging.warning(
+            f"Migration {migration.version}: recorded with {skipped} of "
+            f"{len(migration.statements)} statements skipped"
+        )
+    await conn.execute(
+        "INSERT INTO public.schema_migrations (version, descripcion) VALUES (:version, :descripcion)",
+        {"version": migration.version, "descripcion": migration.description},
+    )
+
+
+async def _run(db_name: str) -> bool:
+    for migration in migrations_for(db_name):
+        async with db.transaction(db_name) as conn:
+            await conn.execute(
+                "SELECT pg_advisory_xact_lock(hashtext('public.schema_migrations'))"
+            )
+            if migration.version in await _applied_versions(conn):
+                continue
+            logging.info(
+                f"🛠️ Applying migration {migration.version} on {db_name}: {migration.description}"
+            )
+            await _apply(conn, migration)
+    return True
+
+
+async def ensure_schema(db_name: str) -> bool:
+    """Bring `db_name` up to date once per process; later calls issue no queries.
+
+    After a failed run the database is retried no sooner than
+    REINTENTO_MIGRACIONES seconds later; calls in between return False.
+    """
+    db_name = db_name or CENTRAL_DATABASE
+    if db_name in _migrated_databases:
+        return True
+    if time.monotonic() < _retry_at.get(db_name, 0.0):
+        return False
+    lock = _locks.setdefault(db_name, asyncio.Lock())
+    async with lock:
+        if db_name in _migrated_databases:
+            return True
+        if time.monotonic() < _retry_at.get(db_name, 0.0):
+            return False
+        try:
+            async with db.transaction(db_name) as conn:
+                applied = await _applied_versions(conn)
+            if any(m.version not in applied for m in migrations_for(db_name)):
+                await _run(db_name)
+            _migrated_databases.add(db_name)
+            _retry_at.pop(db_name, None)
+            return True
+        except Exception as e:
+            logging.exception(f"Error applying migrations on {db_name}: {e}")
+            _retry_at[db_name] = time.monotonic() + REINTENTO_MIGRACIONES
+            return False
+
+
+async def migrate_on_startup():
+    """Lifespan task: migrate the central database when the backend starts."""
+    await ensure_schema(CENTRAL_DATABASE)
@@ -0,0 +1,97 @@
+import os
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from app.utils import db
+
+NIVELES_HABILITADOS = 4
+ETIQUETAS_NIVEL = {1: 5, 2: 8, 3: 11, 4: 14, 5: 17}
+ASOCIAR_CALENDARIO = 20
+NIVEL_ASOCIACION = 21
+ATRIBUTO_TABULAR = 35
+ETIQUETA_ATRIBUTO_TABULAR = 36
+ATRIBUTO_TEXTO = 39
+ETIQUETA_ATRIBUTO_TEXTO = 40
+VIGENCIA_PASSWORD = 80
+
+
+@dataclass(frozen=True)
+class Parametros:
+    """Typed read-only view over the rows of public.parametros of one tenant."""
+
+    valores: dict[int, str] = field(default_factory=dict)
+
+    def texto(self, codigo: int, default: str = "") -> str:
+        return self.valores.get(codigo, default)
+
+    def entero(self, codigo: int, default: int = 0) -> int:
+        try:
+            return int(self.valores[codigo])
+        except (KeyError, TypeError, ValueError):
+            return default
+
+    def activo(self, codigo: int, default: bool = False) -> bool:
+        """Flags are stored as '1' / '0'."""
+        if codigo not in self.valores:
+            return default
+        return self.valores[codigo] == "1"
+
+    def etiqueta_nivel(self, nivel: int, default: str | None = None) -> str:
+        return self.texto(
+            ETIQUETAS_NIVEL[nivel], f"Nivel {nivel}" if default is None else default
+        )
+
+    def niveles_habilitados(self, default: int = 5) -> int:
+        return self.entero(NIVELES_HABILITADOS, default)
+
+
+class ParameterRegistry:
+    """Process-wide cache of public.parametros, loaded whole per tenant.
+
+    Entries live for `ttl` seconds so edits made by other workers show up;
+    saves in this process call `invalidate()`. A failed load is not cached
+    and yields empty parameters, so every accessor returns its default.
+    """
+
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        self._entries: dict[str, tuple[Parametros, float]] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    async def get(self, db_name: str = "novalink") -> Parametros:
+        entry = self._entries.get(db_name)
+        if entry and time.monotonic() - entry[1] < self.ttl:
+            return entry[0]
+        lock = self._locks.setdefault(db_name, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(db_name)
+            if entry and time.monotonic() - entry[1] < self.ttl:
+                return entry[0]
+            try:
+                async with db.transaction(db_name) as conn:
+                    rows = await conn.execute(
+                        "SELECT codigo, valor FROM public.parametros"
+                    )
+            except Exception as e:
+                logging.exception(f"Error loading parameters from {db_name}: {e}")
+                return Parametros()
+            parametros = Parametros(
+                {
+                    int(row["codigo"]): "" if row["valor"] is None else str(row["valor"])
+                    for row in rows
+                }
+            )
+            self._entries[db_name] = (parametros, time.monotonic())
+            return parametros
+
+    def invalidate(self, db_name: str | None = None):
+        if db_name is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(db_name, None)
+
+
+parametros_registry = ParameterRegistry(
+    ttl=float(os.getenv("NOVALINK_PARAMETROS_TTL", "60"))
+)
@@ -0,0 +1,314 @@
+import time
+import random
+import asyncio
+import logging
+import socket
+import os
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+from app.utils import db, migrations
+
+SCHEDULER_DB = "novalink"
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+# Seconds after which an unfinished claim is considered abandoned.
+EN_CURSO_MAX = int(os.getenv("NOVALINK_TAREAS_EN_CURSO_MAX", "900"))
+
+
+@dataclass
+class JobMetrics:
+    runs: int = 0
+    failures: int = 0
+    skipped: int = 0
+    last_duration: float = 0.0
+    max_duration: float = 0.0
+    total_duration: float = 0.0
+    last_started: float = 0.0
+    last_error: str = ""
+
+    @property
+    def avg_duration(self) -> float:
+        return self.total_duration / self.runs if self.runs else 0.0
+
+
+@dataclass
+class Job:
+    """A periodic job.
+
+    `exclusive` jobs run at most once per interval across every worker: each
+    run is claimed and then recorded in public.tareas_programadas, in two short
+    transactions, so a worker that wakes up while another one is running the
+    job, or right after it ran, skips it. Non exclusive jobs (in-process buffers,
+    local engine pools) run in every worker.
+    """
+
+    name: str
+    interval: float
+    func: Callable[[], Awaitable[object]]
+    jitter: float = 0.1
+    exclusive: bool = False
+    run_on_shutdown: bool = False
+    next_run: float = 0.0
+    running: bool = False
+    metrics: JobMetrics = field(default_factory=JobMetrics)
+
+    def schedule_next(self, now: float):
+        spread = self.interval * self.jitter
+        self.next_run = now + self.interval + random.uniform(-spread, spread)
+
+
+class Scheduler:
+    """In-process asyncio scheduler started with the app lifespan."""
+
+    def __init__(self, tick: float = 1.0):
+        self.tick = tick
+        self.jobs: dict[str, Job] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def add_job(
+        self,
+        name: str,
+        interval: float,
+        func: Callable[[], Awaitable[object]],
+        jitter: float = 0.1,
+        exclusive: bool = False,
+        run_on_shutdown: bool = False,
+    ) -> Job:
+        """Register `func` to run every `interval` seconds (± `jitter` fraction)."""
+        job = Job(name, interval, func, jitter, exclusive, run_on_shutdown)
+        job.next_run = time.monotonic() + random.uniform(0, interval * max(jitter, 0.1))
+        self.jobs[name] = job
+        return job
+
+    async def _claim(self, job: Job) -> bool:
+        """Mark `job` as started unless another worker ran it or is running it.
+
+        The advisory lock only serializes this short transaction; the running
+        job is recognised by `exitosa IS NULL` until `_record` stores its result,
+        so no connection stays idle in transaction while the job runs. A claim
+        older than EN_CURSO_MAX (a worker that died mid-run) no longer blocks.
+        """
+        async with db.transaction(SCHEDULER_DB) as conn:
+            locked = await conn.execute(
+                "SELECT pg_try_advisory_xact_lock(hashtext(:key)) AS locked",
+                {"key": f"tareas_programadas:{job.name}"},
+            )
+            if not locked or not locked[0]["locked"]:
+                return False
+            busy = await conn.execute(
+                """
+                SELECT 1 FROM public.tareas_programadas
+                WHERE nombre = :nombre
+                AND (
+                    ultima_ejecucion > NOW() - make_interval(secs => :margen)
+                    OR (exitosa IS NULL
+                        AND ultima_ejecucion > NOW() - make_interval(secs => :en_curso))
+                )
+                """,
+                {
+                    "nombre": job.name,
+                    "margen": job.interval * (1 - job.jitter),
+                    "en_curso": max(EN_CURSO_MAX, job.interval),
+                },
+            )
+            if busy:
+                return False
+            await conn.execute(
+                """
+                INSERT INTO public.tareas_programadas
+                    (nombre, ultima_ejecucion, duracion_ms, exitosa, worker)
+                VALUES (:nombre, NOW(), 0, NULL, :worker)
+                ON CONFLICT (nombre) DO UPDATE SET
+                    ultima_ejecucion = EXCLUDED.ultima_ejecucion,
+                    exitosa = NULL,
+                    worker = EXCLUDED.worker
+                """,
+                {"nombre": job.name, "worker": WORKER_ID},
+            )
+            return True
+
+    async def _record(self, job: Job, ok: bool):
+        async with db.transaction(SCHEDULER_DB) as conn:
+            await conn.execute(
+                """
+                UPDATE public.tareas_programadas
+                SET duracion_ms = :duracion, exitosa = :exitosa
+                WHERE nombre = :nombre AND worker = :worker
+                """,
+                {
+                    "nombre": job.name,
+                    "duracion": int(job.metrics.last_duration * 1000),
+                    "exitosa": ok,
+                    "worker": WORKER_ID,
+                },
+            )
+
+    async def _execute(self, job: Job) -> bool:
+        metrics = job.metrics
+        metrics.last_started = time.monotonic()
+        try:
+            await job.func()
+            return True
+        except Exception as e:
+            metrics.failures += 1
+            metrics.last_error = str(e)
+            logging.exception(f"Scheduled job {job.name} failed: {e}")
+            return False
+        finally:
+            duration = time.monotonic() - metrics.last_started
+            metrics.runs += 1
+            metrics.last_duration = duration
+            metrics.total_duration += duration
+            metrics.max_duration = max(metrics.max_duration, duration)
+            logging.debug(f"⏱️ Job {job.name} finished in {duration * 1000:.0f} ms")
+
+    async def run_job(self, job: Job):
+        """Run one job now, honouring the cross-worker guard for exclusive jobs."""
+        if job.running:
+            job.metrics.skipped += 1
+            return
+        job.running = True
+        try:
+            if not job.exclusive:
+                await self._execute(job)
+                return
+            await migrations.ensure_schema(SCHEDULER_DB)
+            if not await self._claim(job):
+                job.metrics.skipped += 1
+                return
+            ok = False
+            try:
+                ok = await self._execute(job)
+            finally:
+                # Also on cancellation, so the claim does not block other workers.
+                await self._record(job, ok)
+        except Exception as e:
+            job.metrics.failures += 1
+            job.metrics.last_error = str(e)
+            logging.exception(f"Could not run scheduled job {job.name}: {e}")
+        finally:
+            job.running = False
+
+    async def run(self):
+        """Main loop: start every due job as its own task."""
+        while True:
+            now = time.monotonic()
+            for job in self.jobs.values():
+                if job.next_run <= now and not job.running:
+                    job.schedule_next(now)
+                    task = asyncio.create_task(self.run_job(job))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+            next_due = min((j.next_run for j in self.jobs.values()), default=now + self.tick)
+            await asyncio.sleep(max(0.05, min(self.tick, next_due - time.monotonic())))
+
+    async def shutdown(self):
+        """Cancel in-flight jobs and give `run_on_shutdown` jobs a last run."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for job in self.jobs.values():
+            if job.run_on_shutdown:
+                await self._execute(job)
+
+    def stats(self) -> dict[str, dict[str, object]]:
+        """Run-time metrics per job."""
+        now = time.monotonic()
+        return {
+            name: {
+                "interval": job.interval,
+                "exclusive": job.exclusive,
+                "running": job.running,
+                "runs": job.metrics.runs,
+                "failures": job.metrics.failures,
+                "skipped": job.metrics.skipped,
+                "last_ms": round(job.metrics.last_duration * 1000, 1),
+                "avg_ms": round(job.metrics.avg_duration * 1000, 1),
+                "max_ms": round(job.metrics.max_duration * 1000, 1),
+                "next_in": round(max(0.0, job.next_run - now), 1),
+                "last_error": job.metrics.last_error,
+            }
+            for name, job in self.jobs.items()
+        }
+
+
+scheduler = Scheduler()
+
+
+def _register_default_jobs():
+    from app.utils.sessions import session_service
+    from app.utils import (
+        asistencia_pendientes,
+        empleados_cambios,
+        transacciones_particiones,
+        transacciones_resumen,
+    )
+    from app.utils.latidos import liveness_tracker
+
+    async def evict_idle_engines():
+        db.engine_registry.evict_idle()
+
+    scheduler.add_job(
+        "sesiones_expiradas",
+        float(os.getenv("NOVALINK_SESSION_REAP_INTERVAL", "300")),
+        session_service.reap_expired,
+        exclusive=True,
+    )
+    scheduler.add_job(
+        "sesiones_ultimo_acceso",
+        session_service.flush_interval,
+        session_service.flush,
+        run_on_shutdown=True,
+    )
+    scheduler.add_job("conexiones_inactivas", 60, evict_idle_engines)
+    scheduler.add_job(
+        "particiones_transacciones",
+        float(os.getenv("NOVALINK_PARTICIONES_INTERVAL", "21600")),
+        transacciones_particiones.maintain,
+        exclusive=True,
+    )
+    scheduler.add_job(
+        "resumen_transacciones",
+        float(os.getenv("NOVALINK_RESUMEN_INTERVAL", "86400")),
+        transacciones_resumen.reconcile,
+        exclusive=True,
+    )
+    scheduler.add_job(
+        "dispositivos_en_linea",
+        liveness_tracker.sweep_interval,
+        liveness_tracker.sweep,
+    )
+    scheduler.add_job(
+        "padron_empleados",
+        float(os.getenv("NOVALINK_ROSTER_COMPACT_INTERVAL", "86400")),
+        empleados_cambios.compact,
+        exclusive=True,
+    )
+    scheduler.add_job(
+        "asistencia_pendiente",
+        asistencia_pendientes.RECALCULO_INTERVALO,
+        asistencia_pendientes.recalcular,
+        exclusive=True,
+    )
+    scheduler.add_job(
+        "asistencia_cierre_dia",
+        asistencia_pendientes.CIERRE_INTERVALO,
+        asistencia_pendientes.cerrar_dia,
+        exclusive=True,
+    )
+
+
+_register_default_jobs()
+
+
+@asynccontextmanager
+async def scheduler_lifespan():
+    """Lifespan task: run the scheduler for as long as the backend is up."""
+    loop_task = asyncio.create_task(scheduler.run())
+    logging.info(f"⏰ Scheduler started with jobs: {', '.join(scheduler.jobs)}")
+    try:
+        yield
+    finally:
+        loop_task.cancel()
+        await asyncio.gather(loop_task, return_exceptions=True)
+        await scheduler.shutdown()
@@ -0,0 +1,181 @@
+import logging
+import unicodedata
+from app.utils import db
+
+NORMALIZE_FUNCTION = "public.normalizar_busqueda"
+TRIGRAM_THRESHOLD = 0.3
+SEARCH_INDEXES: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("empleados", ("apellidos", "nombres", "cedula")),
+    ("niveladm1", ("descripcion",)),
+    ("niveladm2", ("descripcion",)),
+    ("niveladm3", ("descripcion",)),
+    ("niveladm4", ("descripcion",)),
+    ("niveladm5", ("descripcion",)),
+    ("cargos", ("descripcion",)),
+    ("grupos", ("descripcion",)),
+    ("tipoempleado", ("descripcion",)),
+    ("atributotabularemp", ("descripcion",)),
+)
+
+ACCENTED = "áàäâãéèëêíìïîóòöôõúùüûñçÁÀÄÂÃÉÈËÊÍÌÏÎÓÒÖÔÕÚÙÜÛÑÇ"
+PLAIN = "aaaaaeeeeiiiiooooouuuunc" * 2
+
+_trigram_support: dict[str, bool] = {}
+
+
+def schema_statements() -> tuple[str, ...]:
+    """DDL for the search subsystem, run by the schema migrations.
+
+    `normalizar_busqueda` lowercases and strips accents (through unaccent when
+    the extension is available, otherwise with translate(), which also maps
+    upper-case accents since lower() ignores them under the C collation) and
+    is IMMUTABLE so it can back expression indexes. Trigram GIN indexes are only created
+    when pg_trgm could be installed.
+    """
+    return (
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE EXTENSION IF NOT EXISTS unaccent",
+        f"""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'unaccent') THEN
+                EXECUTE $f$
+                    CREATE OR REPLACE FUNCTION {NORMALIZE_FUNCTION}(value text)
+                    RETURNS text LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS
+                    'SELECT lower(public.unaccent(''public.unaccent''::regdictionary, value))'
+                $f$;
+            ELSE
+                EXECUTE $f$
+                    CREATE OR REPLACE FUNCTION {NORMALIZE_FUNCTION}(value text)
+                    RETURNS text LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS
+                    'SELECT translate(lower(value), ''{ACCENTED}'', ''{PLAIN}'')'
+                $f$;
+            END IF;
+        END $$
+        """,
+        *(
+            f"""
+            DO $$
+            BEGIN
+                IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')
+                AND to_regclass('public.{table}') IS NOT NULL THEN
+                    EXECUTE 'CREATE INDEX IF NOT EXISTS idx_{table}_{column}_trgm
+                        ON public.{table} USING gin ({NORMALIZE_FUNCTION}({column}) gin_trgm_ops)';
+                END IF;
+            END $$
+            """
+            for table, columns in SEARCH_INDEXES
+            for column in columns
+        ),
+    )
+
+
+async def has_trigram(db_name: str) -> bool:
+    """Whether pg_trgm is installed on `db_name` (cached per process)."""
+    if db_name not in _trigram_support:
+        rows = await db.fetch_all(
+            "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') AS existe",
+            db_name=db_name,
+        )
+        if not rows:
+            return False
+        _trigram_support[db_name] = bool(rows[0]["existe"])
+    return _trigram_support[db_name]
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards so user input matches literally."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def normalize_term(term: str) -> str:
+    """Lowercase and strip accents the same way `normalizar_busqueda` does."""
+    decomposed = unicodedata.normalize("NFKD", term.strip().lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _rank_expression(columns: tuple[str, ...], trigram: bool) -> str:
+    normalized = [f"{NORMALIZE_FUNCTION}(COALESCE({c}, ''))" for c in columns]
+    if trigram:
+        parts = [f"word_similarity(:q, {n})" for n in normalized]
+    else:
+        parts = [
+            f"CASE WHEN {n} LIKE :prefix THEN 1.0 WHEN {n} LIKE :contains THEN 0.5 ELSE 0 END"
+            for n in normalized
+        ]
+    parts += [f"CASE WHEN {n} LIKE :prefix THEN 1.0 ELSE 0 END" for n in normalized]
+    return f"(GREATEST({', '.join(parts)}))::float8"
+
+
+def _match_condition(columns: tuple[str, ...], trigram: bool) -> str:
+    normalized = [f"{NORMALIZE_FUNCTION}({c})" for c in columns]
+    parts = [f"{n} LIKE :contains" for n in normalized]
+    if trigram:
+        parts += [f":q <% {n}" for n in normalized]
+    return f"({' OR '.join(parts)})"
+
+
+def cursor_of(row: dict) -> dict:
+    """Keyset cursor to pass as `after` for the page following `row`."""
+    return {"rank": row["_rank"], "orden": row["_orden"], "key": row["_key"]}
+
+
+async def search(
+    db_name: str,
+    table: str,
+    columns: tuple[str, ...],
+    term: str,
+    select: str = "*",
+    key: str = "id",
+    filters: tuple[str, ...] = (),
+    params: dict | None = None,
+    limit: int = 20,
+    after: dict | None = None,
+) -> list[dict[str, object]]:
+    """Accent-insensitive ranked search over `columns` of `table`.
+
+    With pg_trgm the match is a substring or word-similarity hit served by
+    the GIN indexes and ranked by similarity; without it, a normalized
+    substring match ranked prefix-first. Ties fall back to the first column
+    and then `key`. Each row carries `_rank`, `_orden` and `_key` so that
+    `cursor_of(row)` can request the next page.
+    """
+    normalized_term = normalize_term(term)
+    if not normalized_term:
+        return []
+    trigram = await has_trigram(db_name)
+    rank = _rank_expression(columns, trigram)
+    orden = f"{NORMALIZE_FUNCTION}(COALESCE({columns[0]}, ''))"
+    conditions = [_match_condition(columns, trigram), *filters]
+    query_params = dict(params or {})
+    query_params.update(
+        q=normalized_term,
+        prefix=f"{escape_like(normalized_term)}%",
+        contains=f"%{escape_like(normalized_term)}%",
+        limit=limit,
+    )
+    if after:
+        conditions.append(
+            f"(-({rank}), {orden}, {key}) > (-CAST(:after_rank AS float8), :after_orden, :after_key)"
+        )
+        query_params.update(
+            after_rank=after["rank"], after_orden=after["orden"], after_key=after["key"]
+        )
+    query = f"""
+        SELECT {select}, {rank} AS _rank, {orden} AS _orden, {key} AS _key
+        FROM public.{table}
+        WHERE {' AND '.join(conditions)}
+        ORDER BY _rank DESC, _orden, _key
+        LIMIT :limit
+    """
+    try:
+        if trigram:
+            async with db.transaction(db_name) as conn:
+                await conn.execute(
+                    f"SET LOCAL pg_trgm.word_similarity_threshold = {TRIGRAM_THRESHOLD}"
+                )
+                return await conn.execute(query, query_params)
+        return await db.fetch_all(query, query_params, db_name)
+    except Exception as e:
+        logging.exception(f"Error searching {table} in {db_name}: {e}")
+        return []
@@ -0,0 +1,175 @@
+import os
+import time
+import secrets
+import logging
+from dataclasses import dataclass
+from app.utils import db
+
+SESSION_DB = "novalink"
+SESSION_MINUTES = 30
+
+
+@dataclass
+class CachedSession:
+    token: str
+    usuario_id: int
+    database_name: str
+    validated_at: float
+
+
+class SessionService:
+    """Validates and renews sessions in one round trip, with a short in-process cache.
+
+    A cache hit costs no query: the access time is buffered and written back for
+    all touched tokens in a single UPDATE by `flush()`, which the background
+    scheduler runs every `flush_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        db_name: str = SESSION_DB,
+        cache_ttl: float = 30.0,
+        flush_interval: float = 60.0,
+    ):
+        self.db_name = db_name
+        self.cache_ttl = cache_ttl
+        self.flush_interval = flush_interval
+        self._cache: dict[str, CachedSession] = {}
+        self._pending_touches: dict[str, float] = {}
+        self._flushing = False
+
+    async def create(
+        self,
+        user_id: int,
+        database_name: str,
+        ip_address: str = "",
+        user_agent: str = "",
+    ) -> str:
+        """Insert a new session row and return its token."""
+        token = secrets.token_urlsafe(32)
+        insert_query = f"""
+            INSERT INTO public.sesiones (
+                token, usuario_id, database_name,
+                fecha_inicio, fecha_ultimo_acceso, fecha_expiracion,
+                ip_address, user_agent, activa
+            ) VALUES (
+                :token, :uid, :db_name,
+                NOW(), NOW(), NOW() + INTERVAL '{SESSION_MINUTES} minutes',
+                :ip, :ua, true
+            )
+        """
+        params = {
+            "token": token,
+            "uid": user_id,
+            "db_name": database_name,
+            "ip": ip_address,
+            "ua": user_agent,
+        }
+        await db.execute(insert_query, params, self.db_name)
+        self._cache[token] = CachedSession(
+            token, user_id, database_name, time.monotonic()
+        )
+        return token
+
+    async def validate(self, token: str) -> CachedSession | None:
+        """Return the live session for `token`, renewing its expiration, or None."""
+        if not token:
+            return None
+        now = time.monotonic()
+        cached = self._cache.get(token)
+        if cached and now - cached.validated_at < self.cache_ttl:
+            self._pending_touches[token] = now
+            return cached
+        rows = []
+        async with db.transaction(self.db_name) as conn:
+            rows = await conn.execute(
+                f"""
+                UPDATE public.sesiones
+                SET
+                    fecha_ultimo_acceso = NOW(),
+                    fecha_expiracion = NOW() + INTERVAL '{SESSION_MINUTES} minutes'
+                WHERE token = :token AND activa = true AND fecha_expiracion > NOW()
+                RETURNING usuario_id, database_name
+                """,
+                {"token": token},
+            )
+        self._pending_touches.pop(token, None)
+        if not rows:
+            self._cache.pop(token, None)
+            return None
+        session = CachedSession(
+            token, rows[0]["usuario_id"], rows[0]["database_name"], now
+        )
+        self._cache[token] = session
+        return session
+
+    async def close(self, token: str):
+        """Deactivate a session and drop it from the cache."""
+        self._cache.pop(token, None)
+        self._pending_touches.pop(token, None)
+        await db.execute(
+            "UPDATE public.sesiones SET activa = false WHERE token = :token",
+            {"token": token},
+            self.db_name,
+        )
+
+    async def flush(self) -> int:
+        """Write buffered access times back in a single statement; returns rows touched."""
+        if self._flushing:
+            return 0
+        if not self._pending_touches:
+            self._prune_cache(time.monotonic())
+            return 0
+        self._flushing = True
+        pending, self._pending_touches = self._pending_touches, {}
+        now = time.monotonic()
+        tokens = list(pending)
+        ages = [max(0.0, now - pending[t]) for t in tokens]
+        try:
+            await db.execute(
+                f"""
+                UPDATE public.sesiones s
+                SET
+                    fecha_ultimo_acceso = NOW() - make_interval(secs => v.edad),
+                    fecha_expiracion = GREATEST(
+                        s.fecha_expiracion,
+                        NOW() - make_interval(secs => v.edad) + INTERVAL '{SESSION_MINUTES} minutes'
+                    )
+                FROM unnest(CAST(:tokens AS text[]), CAST(:edades AS float8[])) AS v(token, edad)
+                WHERE s.token = v.token AND s.activa = true
+                """,
+                {"tokens": tokens, "edades": ages},
+                self.db_name,
+            )
+            return len(tokens)
+        except Exception as e:
+            logging.exception(f"Error flushing session access times: {e}")
+            for token, seen in pending.items():
+                self._pending_touches.setdefault(token, seen)
+            return 0
+        finally:
+            self._flushing = False
+            self._prune_cache(time.monotonic())
+
+    async def reap_expired(self):
+        """Mark expired sessions as inactive."""
+        await db.execute(
+            """
+            UPDATE public.sesiones
+            SET activa = false
+            WHERE fecha_expiracion < NOW() AND activa = true
+            """,
+            db_name=self.db_name,
+        )
+
+    def _prune_cache(self, now: float):
+        stale = [t for t, s in self._cache.items() if now - s.validated_at >= self.cache_ttl]
+        for token in stale:
+            if token not in self._pending_touches:
+                del self._cache[token]
+
+
+session_service = SessionService(
+    cache_ttl=float(os.getenv("NOVALINK_SESSION_CACHE_TTL", "30")),
+    flush_interval=float(os.getenv("NOVALINK_SESSION_FLUSH_INTERVAL", "60")),
+)
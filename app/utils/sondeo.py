@@ -0,0 +1,85 @@
+import os
+import time
+import socket
+import asyncio
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterable
+
+PUERTO_DEFECTO = int(os.getenv("NOVALINK_DISPOSITIVO_PUERTO", "4370"))
+SONDEO_CONCURRENCIA = int(os.getenv("NOVALINK_SONDEO_CONCURRENCIA", "200"))
+SONDEO_TIMEOUT = float(os.getenv("NOVALINK_SONDEO_TIMEOUT", "2"))
+
+
+def schema_statements() -> tuple[str, ...]:
+    """Network address of each device; a NULL puerto means PUERTO_DEFECTO."""
+    return (
+        "ALTER TABLE public.dispositivos ADD COLUMN IF NOT EXISTS host VARCHAR(255)",
+        "ALTER TABLE public.dispositivos ADD COLUMN IF NOT EXISTS puerto INTEGER",
+    )
+
+
+@dataclass
+class ResultadoSondeo:
+    codigo: int
+    host: str
+    puerto: int
+    alcanzable: bool
+    latencia_ms: float
+    error: str = ""
+
+
+def _describe(error: OSError) -> str:
+    if isinstance(error, ConnectionRefusedError):
+        return "Rechazada"
+    if isinstance(error, socket.gaierror):
+        return "Host desconocido"
+    return "Inalcanzable"
+
+
+async def probe(
+    codigo: int, host: str, puerto: int, timeout: float = SONDEO_TIMEOUT
+) -> ResultadoSondeo:
+    """TCP-connect to host:puerto and close; latency is the handshake time."""
+    start = time.perf_counter()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, puerto), timeout)
+    except asyncio.TimeoutError:
+        return ResultadoSondeo(codigo, host, puerto, False, timeout * 1000, "Tiempo agotado")
+    except OSError as e:
+        elapsed = (time.perf_counter() - start) * 1000
+        return ResultadoSondeo(codigo, host, puerto, False, elapsed, _describe(e))
+    elapsed = (time.perf_counter() - start) * 1000
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return ResultadoSondeo(codigo, host, puerto, True, elapsed)
+
+
+async def probe_all(
+    targets: Iterable[tuple[int, str, int]],
+    concurrency: int = SONDEO_CONCURRENCIA,
+    timeout: float = SONDEO_TIMEOUT,
+) -> AsyncIterator[ResultadoSondeo]:
+    """Probe (codigo, host, puerto) targets, yielding results as they complete.
+
+    At most `concurrency` connections are in flight, so a scan takes about
+    len(targets) / concurrency * timeout seconds in the worst case (every
+    device down) and a fraction of that otherwise. Closing the iterator
+    early cancels the probes still running.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(codigo: int, host: str, puerto: int) -> ResultadoSondeo:
+        async with semaphore:
+            return await probe(codigo, host, puerto, timeout)
+
+    tasks = [asyncio.create_task(bounded(*target)) for target in targets]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
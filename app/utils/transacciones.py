@@ -0,0 +1,176 @@
+import datetime
+from app.utils import db
+
+TRANSACCIONES_DB = "novalink"
+# The requested day, or the database's CURRENT_DATE (which defines "today").
+_DAY = "COALESCE(CAST(:fecha AS date), CURRENT_DATE)"
+
+
+def schema_statements() -> tuple[str, ...]:
+    """Indexes and the per-day counter of public.transacciones."""
+    return (
+        """
+        CREATE INDEX IF NOT EXISTS idx_transacciones_fechahora
+        ON public.transacciones (fechahora DESC, id DESC)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_transacciones_dispositivo_fechahora
+        ON public.transacciones (dispositivo_id, fechahora DESC, id DESC)
+        """,
+        *counter_statements(),
+    )
+
+
+def counter_statements() -> tuple[str, ...]:
+    """DDL for `transacciones_diarias` and its triggers, seeded from the table.
+
+    It holds one row per day and device (0 for marks without device), kept
+    up to date by statement-level triggers that read the transition tables,
+    so a bulk insert costs one upsert per day/device instead of one per row.
+    """
+    return (
+        """
+        CREATE TABLE IF NOT EXISTS public.transacciones_diarias (
+            fecha DATE NOT NULL,
+            dispositivo_id BIGINT NOT NULL DEFAULT 0,
+            total BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (fecha, dispositivo_id)
+        )
+        """,
+        """
+        CREATE OR REPLACE FUNCTION public.fn_transacciones_diarias() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'TRUNCATE' THEN
+                DELETE FROM public.transacciones_diarias;
+                RETURN NULL;
+            END IF;
+            IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                UPDATE public.transacciones_diarias d
+                SET total = d.total - o.total
+                FROM (
+                    SELECT fechahora::date AS fecha,
+                           COALESCE(dispositivo_id, 0) AS dispositivo_id,
+                           COUNT(*) AS total
+                    FROM anteriores
+                    WHERE fechahora IS NOT NULL
+                    GROUP BY 1, 2
+                ) o
+                WHERE d.fecha = o.fecha AND d.dispositivo_id = o.dispositivo_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO public.transacciones_diarias AS d (fecha, dispositivo_id, total)
+                SELECT fechahora::date, COALESCE(dispositivo_id, 0), COUNT(*)
+                FROM nuevas
+                WHERE fechahora IS NOT NULL
+                GROUP BY 1, 2
+                ORDER BY 1, 2
+                ON CONFLICT (fecha, dispositivo_id)
+                DO UPDATE SET total = d.total + EXCLUDED.total;
+            END IF;
+            RETURN NULL;
+        END $$
+        """,
+        "DROP TRIGGER IF EXISTS tr_transacciones_diarias_ins ON public.transacciones",
+        "DROP TRIGGER IF EXISTS tr_transacciones_diarias_upd ON public.transacciones",
+        "DROP TRIGGER IF EXISTS tr_transacciones_diarias_del ON public.transacciones",
+        "DROP TRIGGER IF EXISTS tr_transacciones_diarias_trunc ON public.transacciones",
+        """
+        CREATE TRIGGER tr_transacciones_diarias_ins
+        AFTER INSERT ON public.transacciones
+        REFERENCING NEW TABLE AS nuevas
+        FOR EACH STATEMENT EXECUTE FUNCTION public.fn_transacciones_diarias()
+        """,
+        """
+        CREATE TRIGGER tr_transacciones_diarias_upd
+        AFTER UPDATE ON public.transacciones
+        REFERENCING OLD TABLE AS anteriores NEW TABLE AS nuevas
+        FOR EACH STATEMENT EXECUTE FUNCTION public.fn_transacciones_diarias()
+        """,
+        """
+        CREATE TRIGGER tr_transacciones_diarias_del
+        AFTER DELETE ON public.transacciones
+        REFERENCING OLD TABLE AS anteriores
+        FOR EACH STATEMENT EXECUTE FUNCTION public.fn_transacciones_diarias()
+        """,
+        """
+        CREATE TRIGGER tr_transacciones_diarias_trunc
+        AFTER TRUNCATE ON public.transacciones
+        FOR EACH STATEMENT EXECUTE FUNCTION public.fn_transacciones_diarias()
+        """,
+        """
+        INSERT INTO public.transacciones_diarias (fecha, dispositivo_id, total)
+        SELECT fechahora::date, COALESCE(dispositivo_id, 0), COUNT(*)
+        FROM public.transacciones
+        WHERE fechahora IS NOT NULL
+        GROUP BY 1, 2
+        ON CONFLICT (fecha, dispositivo_id) DO UPDATE SET total = EXCLUDED.total
+        """,
+    )
+
+
+def cursor_of(row: dict) -> dict:
+    """Keyset cursor to pass as `after` for the page following `row`."""
+    return {"fechahora": row["fechahora"].isoformat(), "id": row["id"]}
+
+
+async def fetch_day(
+    fecha: datetime.date | None = None,
+    dispositivo_id: int | None = None,
+    limit: int = 15,
+    after: dict | None = None,
+    db_name: str = TRANSACCIONES_DB,
+) -> list[dict[str, object]]:
+    """Marks of one day (today by default), newest first.
+
+    The day is a half-open range on fechahora and pages continue from the
+    (fechahora, id) of the previous page's last row, so every page is an
+    index range scan whatever its depth. Raises on database errors.
+    """
+    conditions = [
+        f"t.fechahora >= {_DAY}",
+        f"t.fechahora < {_DAY} + 1",
+    ]
+    params: dict[str, object] = {"fecha": fecha, "limit": limit}
+    if dispositivo_id is not None:
+        conditions.append("t.dispositivo_id = :dev_id")
+        params["dev_id"] = dispositivo_id
+    if after:
+        conditions.append(
+            "(t.fechahora, t.id) < (CAST(:after_fechahora AS timestamp), :after_id)"
+        )
+        params.update(after_fechahora=after["fechahora"], after_id=after["id"])
+    query = f"""
+        SELECT t.id, d.descripcion AS dispositivo_desc, t.fechahora, t.mensaje
+        FROM public.transacciones t
+        LEFT JOIN public.dispositivos d ON t.dispositivo_id = d.codigo
+        WHERE {' AND '.join(conditions)}
+        ORDER BY t.fechahora DESC, t.id DESC
+        LIMIT :limit
+    """
+    async with db.transaction(db_name) as conn:
+        return await conn.execute(query, params)
+
+
+async def count_day(
+    fecha: datetime.date | None = None,
+    dispositivo_id: int | None = None,
+    db_name: str = TRANSACCIONES_DB,
+) -> int:
+    """Marks of one day read from the maintained counter. Raises on errors."""
+    params: dict[str, object] = {"fecha": fecha}
+    condition = ""
+    if dispositivo_id is not None:
+        condition = "AND dispositivo_id = :dev_id"
+        params["dev_id"] = dispositivo_id
+    async with db.transaction(db_name) as conn:
+        rows = await conn.execute(
+            f"""
+            SELECT COALESCE(SUM(total), 0) AS total
+            FROM public.transacciones_diarias
+            WHERE fecha = {_DAY} {condition}
+            """,
+            params,
+        )
+    return int(rows[0]["total"]) if rows else 0
+
@@ -0,0 +1,184 @@
+import os
+import json
+import asyncio
+import logging
+from app.utils import db
+from app.utils.transacciones import TRANSACCIONES_DB
+
+CHANNEL = "transacciones_nuevas"
+# Above this many rows per statement the notification carries an id range
+# instead of the ids, to stay well below the 8000 byte payload limit.
+MAX_NOTIFY_IDS = 500
+
+
+def notify_statements() -> tuple[str, ...]:
+    """DDL for the statement-level trigger that announces new marks.
+
+    One NOTIFY per INSERT statement, sent at commit, whatever the number of
+    rows inserted.
+    """
+    return (
+        f"""
+        CREATE OR REPLACE FUNCTION public.fn_transacciones_notificar() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            total INTEGER;
+            payload TEXT;
+        BEGIN
+            SELECT COUNT(*) INTO total FROM nuevas;
+            IF total = 0 THEN
+                RETURN NULL;
+            ELSIF total <= {MAX_NOTIFY_IDS} THEN
+                SELECT json_build_object('ids', json_agg(id))::text INTO payload FROM nuevas;
+            ELSE
+                SELECT json_build_object('desde', MIN(id), 'hasta', MAX(id))::text
+                INTO payload FROM nuevas;
+            END IF;
+            PERFORM pg_notify('{CHANNEL}', payload);
+            RETURN NULL;
+        END $$
+        """,
+        "DROP TRIGGER IF EXISTS tr_transacciones_notificar ON public.transacciones",
+        """
+        CREATE TRIGGER tr_transacciones_notificar
+        AFTER INSERT ON public.transacciones
+        REFERENCING NEW TABLE AS nuevas
+        FOR EACH STATEMENT EXECUTE FUNCTION public.fn_transacciones_notificar()
+        """,
+    )
+
+
+def client_connected(token: str) -> bool:
+    """Whether the browser tab `token` still has a websocket on this worker."""
+    from reflex.utils.prerequisites import get_and_validate_app
+
+    try:
+        namespace = get_and_validate_app().app.event_namespace
+    except Exception:
+        return True
+    return namespace is None or token in namespace.token_to_sid
+
+
+class TransactionFeed:
+    """Per-worker fan-out of new public.transacciones rows.
+
+    A single LISTEN connection per worker receives the trigger notifications,
+    reads the announced rows once (only today's) and hands the same list to
+    every subscribed queue, so the number of open pages adds no queries.
+    The listener starts with the first subscriber and stops with the last.
+    Notifications are collected in windows of `batch_window` seconds and
+    each window's rows are read with one query.
+    A subscriber that falls `queue_size` batches behind gets None and must
+    reload.
+    """
+
+    def __init__(self, batch_window: float = 0.2, queue_size: int = 100):
+        self.batch_window = batch_window
+        self.queue_size = queue_size
+        self._subscribers: set[asyncio.Queue] = set()
+        self._task: asyncio.Task | None = None
+        self.batches = 0
+        self.rows = 0
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def _publish(self, item: list[dict[str, object]] | None):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                # Too far behind: replace its backlog with a reload signal.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def _fetch(self, ids: set[int], ranges: list[tuple[int, int]]):
+        conditions = []
+        params: dict[str, object] = {}
+        if ids:
+            conditions.append("t.id = ANY(:ids)")
+            params["ids"] = sorted(ids)
+        for i, (desde, hasta) in enumerate(ranges):
+            conditions.append(f"t.id BETWEEN :desde{i} AND :hasta{i}")
+            params[f"desde{i}"], params[f"hasta{i}"] = desde, hasta
+        async with db.transaction(TRANSACCIONES_DB) as conn:
+            return await conn.execute(
+                f"""
+                SELECT t.id, t.dispositivo_id, d.descripcion AS dispositivo_desc,
+                       t.fechahora, t.mensaje
+                FROM public.transacciones t
+                LEFT JOIN public.dispositivos d ON t.dispositivo_id = d.codigo
+                WHERE ({' OR '.join(conditions)})
+                AND t.fechahora >= CURRENT_DATE
+                ORDER BY t.fechahora DESC, t.id DESC
+                """,
+                params,
+            )
+
+    @staticmethod
+    def _announced(notifies) -> tuple[set[int], list[tuple[int, int]]]:
+        ids: set[int] = set()
+        ranges: list[tuple[int, int]] = []
+        for notify in notifies:
+            try:
+                payload = json.loads(notify.payload)
+            except ValueError:
+                continue
+            ids.update(payload.get("ids") or ())
+            if "desde" in payload:
+                ranges.append((payload["desde"], payload["hasta"]))
+        return ids, ranges
+
+    async def _listen(self):
+        delay = 1.0
+        reconnecting = False
+        while self._subscribers:
+            try:
+                async with db.direct_connection(
+                    TRANSACCIONES_DB, autocommit=True
+                ) as conn:
+                    await conn.execute(f"LISTEN {CHANNEL}")
+                    logging.info(f"📡 Listening on {CHANNEL}")
+                    if reconnecting:
+                        # Marks committed while reconnecting were missed.
+                        self._publish(None)
+                    reconnecting = True
+                    delay = 1.0
+                    while self._subscribers:
+                        pending = [
+                            n async for n in conn.notifies(timeout=self.batch_window)
+                        ]
+                        ids, ranges = self._announced(pending)
+                        if not ids and not ranges:
+                            continue
+                        rows = await self._fetch(ids, ranges)
+                        self.batches += 1
+                        self.rows += len(rows)
+                        if rows:
+                            self._publish(rows)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"Transaction feed listener failed, retrying in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+
+transaction_feed = TransactionFeed(
+    batch_window=float(os.getenv("NOVALINK_FEED_BATCH_WINDOW", "0.2")),
+)
@@ -0,0 +1,323 @@
+import os
+import re
+import csv
+import gzip
+import datetime
+import logging
+from pathlib import Path
+from typing import Iterator
+import psycopg
+from psycopg import sql
+from app.utils import db
+from app.utils.transacciones import TRANSACCIONES_DB
+
+PARTITION_PREFIX = "transacciones_p"
+DEFAULT_PARTITION = "transacciones_default"
+MESES_ADELANTE = int(os.getenv("NOVALINK_TRANSACCIONES_MESES_ADELANTE", "3"))
+# Months kept attached besides the current one; 0 (the default) keeps
+# everything. Archiving drops raw marks from the database, so it also needs
+# an explicit archive directory on durable storage.
+RETENCION_MESES = int(os.getenv("NOVALINK_TRANSACCIONES_RETENCION_MESES", "0"))
+ARCHIVO_DIR = (
+    Path(os.environ["NOVALINK_TRANSACCIONES_ARCHIVO"])
+    if os.getenv("NOVALINK_TRANSACCIONES_ARCHIVO")
+    else None
+)
+
+_PARTITION_NAME = re.compile(rf"^{PARTITION_PREFIX}(\d{{4}})(\d{{2}})$")
+
+
+def partition_statements() -> tuple[str, ...]:
+    """DDL that turns public.transacciones into a table partitioned by month.
+
+    `crear_particiones_transacciones(desde, meses)` creates the missing
+    monthly partitions (transacciones_pYYYYMM) starting at `desde`'s month;
+    rows already sitting in the default partition for that month are moved
+    into the new one. The conversion copies an existing plain table into the
+    new partitioned one within the migration transaction; NULL fechahora
+    values, which a partition key cannot hold, become the epoch and land in
+    the default partition.
+    """
+    return (
+        f"""
+        CREATE OR REPLACE FUNCTION public.crear_particiones_transacciones(
+            desde DATE, meses INTEGER
+        ) RETURNS INTEGER
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            inicio DATE := date_trunc('month', desde)::date;
+            fin DATE;
+            nombre TEXT;
+            creadas INTEGER := 0;
+        BEGIN
+            FOR i IN 1..meses LOOP
+                fin := (inicio + INTERVAL '1 month')::date;
+                nombre := '{PARTITION_PREFIX}' || to_char(inicio, 'YYYYMM');
+                IF to_regclass('public.' || nombre) IS NULL THEN
+                    IF EXISTS (
+                        SELECT 1 FROM public.{DEFAULT_PARTITION}
+                        WHERE fechahora >= inicio AND fechahora < fin
+                    ) THEN
+                        EXECUTE format(
+                            'CREATE TABLE public.%I (LIKE public.transacciones INCLUDING DEFAULTS)',
+                            nombre
+                        );
+                        EXECUTE format(
+                            'WITH movidas AS (DELETE FROM public.{DEFAULT_PARTITION}
+                             WHERE fechahora >= %L AND fechahora < %L RETURNING *)
+                             INSERT INTO public.%I SELECT * FROM movidas',
+                            inicio, fin, nombre
+                        );
+                        EXECUTE format(
+                            'ALTER TABLE public.transacciones ATTACH PARTITION public.%I
+                             FOR VALUES FROM (%L) TO (%L)',
+                            nombre, inicio, fin
+                        );
+                    ELSE
+                        EXECUTE format(
+                            'CREATE TABLE public.%I PARTITION OF public.transacciones
+                             FOR VALUES FROM (%L) TO (%L)',
+                            nombre, inicio, fin
+                        );
+                    END IF;
+                    creadas := creadas + 1;
+                END IF;
+                inicio := fin;
+            END LOOP;
+            RETURN creadas;
+        END $$
+        """,
+        f"""
+        DO $$
+        DECLARE
+            secuencia TEXT;
+            desde DATE;
+        BEGIN
+            IF (SELECT relkind FROM pg_class WHERE oid = 'public.transacciones'::regclass) <> 'r' THEN
+                RETURN;
+            END IF;
+            secuencia := pg_get_serial_sequence('public.transacciones', 'id');
+            DROP TRIGGER IF EXISTS tr_transacciones_diarias_ins ON public.transacciones;
+            DROP TRIGGER IF EXISTS tr_transacciones_diarias_upd ON public.transacciones;
+            DROP TRIGGER IF EXISTS tr_transacciones_diarias_del ON public.transacciones;
+            DROP TRIGGER IF EXISTS tr_transacciones_diarias_trunc ON public.transacciones;
+            DROP TRIGGER IF EXISTS tr_transacciones_notificar ON public.transacciones;
+            DROP INDEX IF EXISTS public.idx_transacciones_fechahora;
+            DROP INDEX IF EXISTS public.idx_transacciones_dispositivo_fechahora;
+            ALTER TABLE public.transacciones RENAME TO transacciones_legado;
+            ALTER TABLE public.transacciones_legado
+                RENAME CONSTRAINT transacciones_pkey TO transacciones_legado_pkey;
+            EXECUTE format('ALTER SEQUENCE %s OWNED BY NONE', secuencia);
+            ALTER TABLE public.transacciones_legado ALTER COLUMN id DROP DEFAULT;
+            EXECUTE format(
+                'CREATE TABLE public.transacciones (
+                    id BIGINT NOT NULL DEFAULT nextval(%L::regclass),
+                    dispositivo_id BIGINT,
+                    fechahora TIMESTAMP NOT NULL DEFAULT NOW(),
+                    mensaje TEXT,
+                    PRIMARY KEY (fechahora, id)
+                ) PARTITION BY RANGE (fechahora)',
+                secuencia
+            );
+            EXECUTE format(
+                'ALTER SEQUENCE %s AS BIGINT OWNED BY public.transacciones.id', secuencia
+            );
+            CREATE TABLE public.{DEFAULT_PARTITION} PARTITION OF public.transacciones DEFAULT;
+            SELECT date_trunc('month', COALESCE(MIN(fechahora), NOW()))::date INTO desde
+            FROM public.transacciones_legado;
+            PERFORM public.crear_particiones_transacciones(
+                desde,
+                ((EXTRACT(YEAR FROM CURRENT_DATE) - EXTRACT(YEAR FROM desde)) * 12
+                 + EXTRACT(MONTH FROM CURRENT_DATE) - EXTRACT(MONTH FROM desde))::int
+                 + 1 + {MESES_ADELANTE}
+            );
+            INSERT INTO public.transacciones (id, dispositivo_id, fechahora, mensaje)
+            SELECT id, dispositivo_id, COALESCE(fechahora, 'epoch'), mensaje
+            FROM public.transacciones_legado;
+            DROP TABLE public.transacciones_legado;
+        END $$
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_transacciones_dispositivo_fechahora
+        ON public.transacciones (dispositivo_id, fechahora DESC, id DESC)
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_transacciones_id ON public.transacciones (id)",
+    )
+
+
+def month_of(nombre: str) -> datetime.date | None:
+    """First day of the month a transacciones_pYYYYMM partition holds."""
+    match = _PARTITION_NAME.match(nombre)
+    if not match:
+        return None
+    return datetime.date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def partition_name(mes: datetime.date) -> str:
+    return f"{PARTITION_PREFIX}{mes:%Y%m}"
+
+
+def _add_months(mes: datetime.date, months: int) -> datetime.date:
+    index = mes.year * 12 + mes.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def archive_path(nombre: str, directory: Path | None = ARCHIVO_DIR) -> Path:
+    if directory is None:
+        raise ValueError("NOVALINK_TRANSACCIONES_ARCHIVO is not set")
+    return directory / f"{nombre}.csv.gz"
+
+
+async def ensure_partitions(
+    months_ahead: int = MESES_ADELANTE, db_name: str = TRANSACCIONES_DB
+) -> int:
+    """Create the partitions of the current month and `months_ahead` more."""
+    async with db.transaction(db_name) as conn:
+        rows = await conn.execute(
+            "SELECT public.crear_particiones_transacciones(CURRENT_DATE, :meses) AS creadas",
+            {"meses": months_ahead + 1},
+        )
+    creadas = rows[0]["creadas"] if rows else 0
+    if creadas:
+        logging.info(f"🗂️ Created {creadas} transacciones partitions on {db_name}")
+    return creadas
+
+
+async def list_partitions(db_name: str = TRANSACCIONES_DB) -> list[dict[str, object]]:
+    """Monthly partitions currently attached, oldest first."""
+    async with db.transaction(db_name) as conn:
+        rows = await conn.execute(
+            """
+            SELECT c.relname AS nombre, c.reltuples::bigint AS filas_estimadas
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'public.transacciones'::regclass
+            ORDER BY c.relname
+            """
+        )
+    return [
+        {**row, "mes": month_of(row["nombre"])}
+        for row in rows
+        if month_of(row["nombre"]) is not None
+    ]
+
+
+def _copy_statement(nombre: str, direction: str) -> sql.Composed:
+    return sql.SQL("COPY public.{} {} (FORMAT csv, HEADER)").format(
+        sql.Identifier(nombre), sql.SQL(direction)
+    )
+
+
+async def _export(conn, nombre: str, path: Path) -> int:
+    """Write the partition to a gzip'd CSV atomically; returns the row count."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix(path.suffix + ".parcial")
+    async with conn.cursor() as cur:
+        with gzip.open(partial, "wb") as out:
+            async with cur.copy(_copy_statement(nombre, "TO STDOUT")) as copy:
+                async for chunk in copy:
+                    out.write(chunk)
+        exported = cur.rowcount
+    partial.replace(path)
+    return exported
+
+
+async def archive_partition(
+    nombre: str, db_name: str = TRANSACCIONES_DB, directory: Path | None = ARCHIVO_DIR
+) -> Path:
+    """Export a monthly partition to `directory`, then detach and drop it.
+
+    The partition is locked against writes while it is exported, so the file
+    holds exactly the rows that are dropped. An existing archive (the
+    partition was restored from it) is kept and not rewritten.
+    """
+    if month_of(nombre) is None:
+        raise ValueError(f"{nombre} is not a monthly transacciones partition")
+    path = archive_path(nombre, directory)
+    async with db.direct_connection(db_name) as conn:
+        async with conn.transaction():
+            await conn.execute(
+                sql.SQL("LOCK TABLE public.{} IN SHARE MODE").format(
+                    sql.Identifier(nombre)
+                )
+            )
+            if not path.exists():
+                exported = await _export(conn, nombre, path)
+                logging.info(f"📦 Archived {exported} rows of {nombre} to {path}")
+            await conn.execute(
+                sql.SQL("ALTER TABLE public.transacciones DETACH PARTITION public.{}").format(
+                    sql.Identifier(nombre)
+                )
+            )
+            await conn.execute(
+                sql.SQL("DROP TABLE public.{}").format(sql.Identifier(nombre))
+            )
+    return path
+
+
+async def archive_expired(
+    retention_months: int = RETENCION_MESES, db_name: str = TRANSACCIONES_DB
+) -> list[Path]:
+    """Archive every partition older than the retention window.
+
+    The daily counter keeps the totals of archived days.
+    """
+    if retention_months <= 0:
+        return []
+    if ARCHIVO_DIR is None:
+        logging.error(
+            "Transacciones retention is set but NOVALINK_TRANSACCIONES_ARCHIVO is not: "
+            "expired partitions are kept"
+        )
+        return []
+    limite = _add_months(datetime.date.today().replace(day=1), -retention_months)
+    archived = []
+    for partition in await list_partitions(db_name):
+        if partition["mes"] < limite:
+            archived.append(await archive_partition(partition["nombre"], db_name))
+    return archived
+
+
+async def restore_partition(path: Path, db_name: str = TRANSACCIONES_DB) -> str:
+    """Load an archive file back and re-attach it as its monthly partition.
+
+    The retention job detaches it again on its next run, without rewriting
+    the archive.
+    """
+    nombre = Path(path).name.split(".", 1)[0]
+    mes = month_of(nombre)
+    if mes is None:
+        raise ValueError(f"{path} is not a transacciones partition archive")
+    hasta = _add_months(mes, 1)
+    async with db.direct_connection(db_name) as conn:
+        async with conn.transaction():
+            await conn.execute(
+                sql.SQL(
+                    "CREATE TABLE public.{} (LIKE public.transacciones INCLUDING DEFAULTS)"
+                ).format(sql.Identifier(nombre))
+            )
+            async with conn.cursor() as cur:
+                with gzip.open(path, "rb") as source:
+                    async with cur.copy(_copy_statement(nombre, "FROM STDIN")) as copy:
+                        while chunk := source.read(1 << 16):
+                            await copy.write(chunk)
+            await conn.execute(
+                sql.SQL(
+                    "ALTER TABLE public.transacciones ATTACH PARTITION public.{} "
+                    "FOR VALUES FROM ({}) TO ({})"
+                ).format(sql.Identifier(nombre), sql.Literal(mes), sql.Literal(hasta))
+            )
+    logging.info(f"📂 Restored {nombre} from {path}")
+    return nombre
+
+
+def read_archive(path: Path) -> Iterator[dict[str, str]]:
+    """Rows of an archive file, as CSV dicts, without touching the database."""
+    with gzip.open(path, "rt", newline="", encoding="utf-8") as source:
+        yield from csv.DictReader(source)
+
+
+async def maintain(db_name: str = TRANSACCIONES_DB):
+    """Scheduled job: create upcoming partitions and archive expired ones."""
+    await ensure_partitions(db_name=db_name)
+    await archive_expired(db_name=db_name)
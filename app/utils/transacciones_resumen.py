@@ -0,0 +1,238 @@
+import os
+import datetime
+import logging
+from app.utils import db
+from app.utils.transacciones import TRANSACCIONES_DB
+
+RECONCILIAR_DIAS = int(os.getenv("NOVALINK_RESUMEN_RECONCILIAR_DIAS", "2"))
+MAX_DIAS_HISTORIAL = 366
+
+
+def rollup_statements() -> tuple[str, ...]:
+    """DDL for `transacciones_por_hora`, one row per day, hour and device.
+
+    Statement-level triggers fold each INSERT/UPDATE/DELETE on the
+    partitioned parent into it (one upsert per touched hour and device), so
+    summaries never read raw marks. Writes made directly on a partition
+    bypass them; `reconcile()` repairs recent days.
+    """
+    return (
+        """
+        CREATE TABLE IF NOT EXISTS public.transacciones_por_hora (
+            fecha DATE NOT NULL,
+            dispositivo_id BIGINT NOT NULL DEFAULT 0,
+            hora SMALLINT NOT NULL,
+            total BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (fecha, dispositivo_id, hora)
+        )
+        """,
+        """
+        CREATE OR REPLACE FUNCTION public.fn_transacciones_por_hora() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'TRUNCATE' THEN
+                DELETE FROM public.transacciones_por_hora;
+                RETURN NULL;
+            END IF;
+            IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                UPDATE public.transacciones_por_hora h
+                SET total = h.total - o.total
+                FROM (
+                    SELECT fechahora::date AS fecha,
+                           COALESCE(dispositivo_id, 0) AS dispositivo_id,
+                           EXTRACT(HOUR FROM fechahora)::smallint AS hora,
+                           COUNT(*) AS total
+                    FROM anteriores
+                    GROUP BY 1, 2, 3
+                ) o
+                WHERE h.fecha = o.fecha AND h.dispositivo_id = o.dispositivo_id
+                AND h.hora = o.hora;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO public.transacciones_por_hora AS h
+                    (fecha, dispositivo_id, hora, total)
+                SELECT fechahora::date, COALESCE(dispositivo_id, 0),
+                       EXTRACT(HOUR FROM fechahora)::smallint, COUNT(*)
+                FROM nuevas
+                GROUP BY 1, 2, 3
+                ORDER BY 1, 2, 3
+                ON CONFLICT (fecha, dispositivo_id, hora)
+                DO UPDATE SET total = h.total + EXCLUDED.total;
+            END IF;
+            RETURN NULL;
+        END $$
+        """,
+        "DROP TRIGGER IF EXISTS tr_transacciones_por_hora_ins ON public.transacciones",
+        "DROP TRIGGER IF EXISTS tr_transacciones_por_hora_upd ON public.transacciones",
+        "DROP TRIGGER IF EXISTS tr_transacciones_por_hora_del ON public.transacciones",
+        "DROP TRIGGER IF EXISTS tr_transacciones_por_hora_trunc ON public.transacciones",
+        """
+        CREATE TRIGGER tr_transacciones_por_hora_ins
+        AFTER INSERT ON public.transacciones
+        REFERENCING NEW TABLE AS nuevas
+        FOR EACH STATEMENT EXECUTE FUNCTION public.fn_transacciones_por_hora()
+        """,
+        """
+        CREATE TRIGGER tr_transacciones_por_hora_upd
+        AFTER UPDATE ON public.transacciones
+        REFERENCING OLD TABLE AS anteriores NEW TABLE AS nuevas
+        FOR EACH STATEMENT EXECUTE FUNCTION public.fn_transacciones_por_hora()
+        """,
+        """
+        CREATE TRIGGER tr_transacciones_por_hora_del
+        AFTER DELETE ON public.transacciones
+        REFERENCING OLD TABLE AS anteriores
+        FOR EACH STATEMENT EXECUTE FUNCTION public.fn_transacciones_por_hora()
+        """,
+        """
+        CREATE TRIGGER tr_transacciones_por_hora_trunc
+        AFTER TRUNCATE ON public.transacciones
+        FOR EACH STATEMENT EXECUTE FUNCTION public.fn_transacciones_por_hora()
+        """,
+        """
+        INSERT INTO public.transacciones_por_hora (fecha, dispositivo_id, hora, total)
+        SELECT fechahora::date, COALESCE(dispositivo_id, 0),
+               EXTRACT(HOUR FROM fechahora)::smallint, COUNT(*)
+        FROM public.transacciones
+        GROUP BY 1, 2, 3
+        ON CONFLICT (fecha, dispositivo_id, hora) DO UPDATE SET total = EXCLUDED.total
+        """,
+    )
+
+
+async def reconcile(days: int = RECONCILIAR_DIAS, db_name: str = TRANSACCIONES_DB) -> int:
+    """Recompute the hourly and daily rollups of the last `days` days.
+
+    Both rollups are locked first, so writers that already counted their
+    marks have committed (and are seen by the recount) while later ones wait
+    and add on top of the recounted rows. Returns the rows rewritten.
+    """
+    async with db.transaction(db_name) as conn:
+        await conn.execute(
+            """
+            LOCK TABLE public.transacciones_por_hora, public.transacciones_diarias
+            IN EXCLUSIVE MODE
+            """
+        )
+        params = {"dias": days}
+        desde = "CURRENT_DATE - (CAST(:dias AS integer) - 1)"
+        await conn.execute(
+            f"DELETE FROM public.transacciones_por_hora WHERE fecha >= {desde}", params
+        )
+        await conn.execute(
+            f"DELETE FROM public.transacciones_diarias WHERE fecha >= {desde}", params
+        )
+        rows = await conn.execute(
+            f"""
+            WITH recuento AS (
+                SELECT fechahora::date AS fecha,
+                       COALESCE(dispositivo_id, 0) AS dispositivo_id,
+                       EXTRACT(HOUR FROM fechahora)::smallint AS hora,
+                       COUNT(*) AS total
+                FROM public.transacciones
+                WHERE fechahora >= {desde}
+                GROUP BY 1, 2, 3
+            ), horas AS (
+                INSERT INTO public.transacciones_por_hora (fecha, dispositivo_id, hora, total)
+                SELECT fecha, dispositivo_id, hora, total FROM recuento
+                RETURNING 1
+            ), dias AS (
+                INSERT INTO public.transacciones_diarias (fecha, dispositivo_id, total)
+                SELECT fecha, dispositivo_id, SUM(total) FROM recuento
+                GROUP BY fecha, dispositivo_id
+                RETURNING 1
+            )
+            SELECT (SELECT COUNT(*) FROM horas) + (SELECT COUNT(*) FROM dias) AS filas
+            """,
+            params,
+        )
+    filas = rows[0]["filas"] if rows else 0
+    logging.info(f"🧮 Reconciled {days} days of transaction rollups ({filas} rows)")
+    return filas
+
+
+async def resumen_dia(
+    fecha: datetime.date | None = None, db_name: str = TRANSACCIONES_DB
+) -> list[dict[str, object]]:
+    """Per-device totals of one day (today by default) with their 24 hours.
+
+    Every active device is listed, with zeros when it has no marks. Raises
+    on database errors.
+    """
+    async with db.transaction(db_name) as conn:
+        rows = await conn.execute(
+            """
+            WITH dia AS (
+                SELECT dispositivo_id, hora, total
+                FROM public.transacciones_por_hora
+                WHERE fecha = COALESCE(CAST(:fecha AS date), CURRENT_DATE)
+            ), dispositivos AS (
+                SELECT codigo AS dispositivo_id, descripcion
+                FROM public.dispositivos WHERE activo = true
+                UNION
+                SELECT DISTINCT dia.dispositivo_id, d.descripcion
+                FROM dia LEFT JOIN public.dispositivos d ON d.codigo = dia.dispositivo_id
+            )
+            SELECT d.dispositivo_id, d.descripcion,
+                   COALESCE(SUM(dia.total), 0) AS total,
+                   COALESCE(
+                       array_agg(dia.hora ORDER BY dia.hora) FILTER (WHERE dia.hora IS NOT NULL),
+                       '{}'
+                   ) AS horas,
+                   COALESCE(
+                       array_agg(dia.total ORDER BY dia.hora) FILTER (WHERE dia.hora IS NOT NULL),
+                       '{}'
+                   ) AS totales
+            FROM dispositivos d
+            LEFT JOIN dia ON dia.dispositivo_id = d.dispositivo_id
+            GROUP BY d.dispositivo_id, d.descripcion
+            ORDER BY total DESC, d.descripcion
+            """,
+            {"fecha": fecha},
+        )
+    resumen = []
+    for row in rows:
+        por_hora = [0] * 24
+        for hora, total in zip(row["horas"], row["totales"]):
+            por_hora[hora] = int(total)
+        resumen.append(
+            {
+                "dispositivo_id": row["dispositivo_id"],
+                "descripcion": row["descripcion"] or f"Dispositivo {row['dispositivo_id']}",
+                "total": int(row["total"]),
+                "por_hora": por_hora,
+            }
+        )
+    return resumen
+
+
+async def historial(
+    desde: datetime.date,
+    hasta: datetime.date,
+    dispositivo_id: int | None = None,
+    db_name: str = TRANSACCIONES_DB,
+) -> list[dict[str, object]]:
+    """Daily totals per device between `desde` and `hasta` (inclusive).
+
+    Read from the daily counter; the range is capped at MAX_DIAS_HISTORIAL
+    days. Raises on database errors.
+    """
+    if (hasta - desde).days >= MAX_DIAS_HISTORIAL:
+        desde = hasta - datetime.timedelta(days=MAX_DIAS_HISTORIAL - 1)
+    params: dict[str, object] = {"desde": desde, "hasta": hasta}
+    condition = ""
+    if dispositivo_id is not None:
+        condition = "AND c.dispositivo_id = :dev_id"
+        params["dev_id"] = dispositivo_id
+    async with db.transaction(db_name) as conn:
+        return await conn.execute(
+            f"""
+            SELECT c.fecha, c.dispositivo_id,
+                   COALESCE(d.descripcion, 'Desconocido') AS descripcion, c.total
+            FROM public.transacciones_diarias c
+            LEFT JOIN public.dispositivos d ON d.codigo = c.dispositivo_id
+            WHERE c.fecha BETWEEN :desde AND :hasta AND c.total > 0 {condition}
+            ORDER BY c.fecha DESC, descripcion
+            """,
+            params,
+        )
@@ -0,0 +1,177 @@
+"""Benchmark of the attendance engine on a synthetic period.
+
+Builds `--empleados` employees by `--dias` days with about four marks per
+laborable day (entry, lunch out/in, exit, with jitter, absences and double
+presses), runs `asistencia.calcular` `--repeticiones` times and prints the
+timings. `--verificar N` also runs a per employee, per day Python reference
+on the first N employees and checks that both agree.
+
+No database is needed. Usage:
+    python scripts/bench_asistencia.py --empleados 10000 --dias 31
+"""
+
+import argparse
+import datetime
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils import asistencia
+from app.utils.asistencia import JORNADA_DEFECTO, MINUTOS_DIA, Periodo
+
+
+def synthetic_period(empleados: int, dias: int, seed: int = 7) -> Periodo:
+    rng = np.random.default_rng(seed)
+    desde = datetime.date(2026, 1, 1)
+    semana = (desde.weekday() + np.arange(dias)) % 7
+    laborable = np.broadcast_to(
+        np.isin(semana, JORNADA_DEFECTO.dias_laborables), (empleados, dias)
+    ).copy()
+    laborable[:, rng.choice(dias, 2, replace=False)] = False
+    presente = laborable & (rng.random((empleados, dias)) > 0.04)
+    presente |= ~laborable & (rng.random((empleados, dias)) < 0.05)
+    emp_idx, dia = np.nonzero(presente)
+    base = dia.astype(np.int64) * MINUTOS_DIA
+    n = len(emp_idx)
+    turno_noche = rng.random(n) < 0.05
+    entrada = np.where(turno_noche, 18 * 60, 8 * 60) + rng.normal(0, 10, n).astype(np.int64)
+    salida = np.where(turno_noche, 23 * 60 + 30, 17 * 60) + rng.normal(0, 25, n).astype(np.int64)
+    marcas = [base + entrada, base + np.minimum(salida, MINUTOS_DIA - 1)]
+    almuerzo = rng.random(n) < 0.7
+    marcas += [(base + 13 * 60 + rng.integers(0, 30, n))[almuerzo]]
+    marcas += [(base + 14 * 60 + rng.integers(0, 30, n))[almuerzo]]
+    rebote = rng.random(n) < 0.02
+    marcas += [(base + entrada + 1)[rebote]]
+    olvido = rng.random(n) < 0.02
+    emp = [emp_idx, emp_idx, emp_idx[almuerzo], emp_idx[almuerzo], emp_idx[rebote]]
+    minutos = np.concatenate(marcas)
+    emp_all = np.concatenate(emp)
+    keep = np.ones(len(minutos), dtype=bool)
+    keep[n : 2 * n] = ~olvido
+    orden = rng.permutation(keep.sum())
+    return Periodo(
+        desde=desde,
+        dias=dias,
+        empleados=np.arange(1, empleados + 1, dtype=np.int64),
+        sobretiempo=rng.random(empleados) < 0.6,
+        nocturno=rng.random(empleados) < 0.3,
+        dia_libre=rng.random(empleados) < 0.5,
+        marca_empleado=emp_all[keep][orden].astype(np.int32),
+        marca_minuto=minutos[keep][orden],
+        laborable=laborable,
+        inicio=np.full((empleados, dias), JORNADA_DEFECTO.entrada, dtype=np.int32),
+        fin=np.full((empleados, dias), JORNADA_DEFECTO.salida, dtype=np.int32),
+        falta_justificada=rng.random((empleados, dias)) < 0.01,
+        atraso_justificado=rng.random((empleados, dias)) < 0.01,
+    )
+
+
+def reference(periodo: Periodo, limite: int) -> dict[str, np.ndarray]:
+    """Straightforward per employee, per day loop over the same rules."""
+    j = JORNADA_DEFECTO
+    D = periodo.dias
+    por_celda: dict[tuple[int, int], list[int]] = {}
+    for e, m in zip(periodo.marca_empleado.tolist(), periodo.marca_minuto.tolist()):
+        if e < limite and 0 <= m < D * MINUTOS_DIA:
+            por_celda.setdefault((e, m // MINUTOS_DIA), []).append(m % MINUTOS_DIA)
+    campos = (
+        "trabajados",
+        "atraso",
+        "salida_anticipada",
+        "sobretiempo",
+        "nocturnos",
+        "dia_libre",
+        "falta",
+    )
+    out = {campo: np.zeros((limite, D), dtype=np.int64) for campo in campos}
+
+    def overlap(a, b, c, d):
+        return max(0, min(b, d) - max(a, c))
+
+    for e in range(limite):
+        for d in range(D):
+            marcas = sorted(por_celda.get((e, d), []))
+            lab = periodo.laborable[e, d]
+            ini, fin = periodo.inicio[e, d], periodo.fin[e, d]
+            if not marcas:
+                out["falta"][e, d] = lab and not periodo.falta_justificada[e, d]
+                continue
+            entrada = marcas[0]
+            salida = marcas[-1] if marcas[-1] - marcas[0] >= asistencia.REBOTE_MINUTOS else None
+            if lab and entrada - ini > j.tolerancia and not periodo.atraso_justificado[e, d]:
+                out["atraso"][e, d] = min(entrada - ini, fin - ini)
+            if salida is None:
+                continue
+            trabajado = salida - entrada
+            out["trabajados"][e, d] = trabajado
+            if lab and salida < fin:
+                out["salida_anticipada"][e, d] = min(fin - max(salida, ini), fin - ini)
+            if lab:
+                if periodo.sobretiempo[e]:
+                    out["sobretiempo"][e, d] = trabajado - overlap(entrada, salida, ini, fin)
+            elif periodo.dia_libre[e]:
+                out["dia_libre"][e, d] = trabajado
+            elif periodo.sobretiempo[e]:
+                out["sobretiempo"][e, d] = trabajado
+            if periodo.nocturno[e]:
+                out["nocturnos"][e, d] = overlap(
+                    entrada, salida, 0, j.nocturno_hasta
+                ) + overlap(entrada, salida, j.nocturno_desde, MINUTOS_DIA)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--empleados", type=int, default=10000)
+    parser.add_argument("--dias", type=int, default=31)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--verificar", type=int, default=300)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    periodo = synthetic_period(args.empleados, args.dias)
+    print(
+        f"período         {args.empleados} empleados x {args.dias} días, "
+        f"{len(periodo.marca_minuto):,} marcas (generado en {time.perf_counter() - start:.2f} s)"
+    )
+    tiempos = []
+    for _ in range(args.repeticiones):
+        start = time.perf_counter()
+        resultado = asistencia.calcular(periodo)
+        tiempos.append(time.perf_counter() - start)
+    celdas = args.empleados * args.dias
+    print(
+        f"calcular        mediana {statistics.median(tiempos) * 1000:.0f} ms, "
+        f"mínimo {min(tiempos) * 1000:.0f} ms ({celdas / min(tiempos):,.0f} celdas/s)"
+    )
+    start = time.perf_counter()
+    copy = resultado.copy_binario()
+    print(
+        f"COPY binario    {len(copy) / 2**20:.1f} MiB "
+        f"(preparado en {(time.perf_counter() - start) * 1000:.0f} ms)"
+    )
+
+    if args.verificar:
+        limite = min(args.verificar, args.empleados)
+        start = time.perf_counter()
+        esperado = reference(periodo, limite)
+        loop = time.perf_counter() - start
+        print(
+            f"referencia      {limite} empleados en {loop:.2f} s "
+            f"(~{loop * args.empleados / limite:.0f} s para {args.empleados})"
+        )
+        errores = [
+            nombre
+            for nombre, matriz in esperado.items()
+            if not np.array_equal(getattr(resultado, nombre)[:limite].astype(np.int64), matriz)
+        ]
+        print(f"verificación    {'OK' if not errores else 'DIFERENCIAS en ' + ', '.join(errores)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Scaling benchmark of the sharded attendance period close.
+
+Builds a synthetic period (see bench_asistencia.py), splits it in shards of
+`--bloque` employees and computes them in a process pool of 1, 2, 4, ...
+up to `--procesos` workers, printing throughput and speedup against one
+worker. Shards are sent to the workers the way `asistencia_cierre` does, so
+pickling costs are included. `--desde/--hasta` additionally run the real
+pipeline against REFLEX_DB_URL.
+
+Usage:
+    python scripts/bench_cierre.py --empleados 40000 --dias 31 --procesos 8
+"""
+
+import argparse
+import asyncio
+import datetime
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils import asistencia, asistencia_cierre
+from app.utils.asistencia import Periodo
+from bench_asistencia import synthetic_period
+
+
+def shard(periodo: Periodo, lo: int, hi: int) -> Periodo:
+    """Employees [lo, hi) of `periodo`, with their marks re-indexed."""
+    mask = (periodo.marca_empleado >= lo) & (periodo.marca_empleado < hi)
+    return Periodo(
+        desde=periodo.desde,
+        dias=periodo.dias,
+        empleados=periodo.empleados[lo:hi],
+        sobretiempo=periodo.sobretiempo[lo:hi],
+        nocturno=periodo.nocturno[lo:hi],
+        dia_libre=periodo.dia_libre[lo:hi],
+        marca_empleado=periodo.marca_empleado[mask] - lo,
+        marca_minuto=periodo.marca_minuto[mask],
+        laborable=periodo.laborable[lo:hi],
+        inicio=periodo.inicio[lo:hi],
+        fin=periodo.fin[lo:hi],
+        falta_justificada=periodo.falta_justificada[lo:hi],
+        atraso_justificado=periodo.atraso_justificado[lo:hi],
+    )
+
+
+def run_pool(shards: list[Periodo], procesos: int) -> float:
+    with ProcessPoolExecutor(procesos, mp_context=multiprocessing.get_context("spawn")) as pool:
+        # Warm the workers up so process start-up is not measured.
+        list(pool.map(asistencia.calcular, shards[:procesos]))
+        start = time.perf_counter()
+        partes = list(pool.map(asistencia.calcular, shards))
+        elapsed = time.perf_counter() - start
+    asistencia.Resultado.unir(partes)
+    return elapsed
+
+
+async def run_db(desde: datetime.date, hasta: datetime.date, por: str):
+    async for progreso in asistencia_cierre.cerrar_periodo(desde, hasta, por):
+        print(
+            f"  {progreso.etapa:<11} {progreso.completados}/{progreso.bloques} bloques, "
+            f"{progreso.empleados} empleados, {progreso.filas} filas, {progreso.segundos:.2f} s"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--empleados", type=int, default=40000)
+    parser.add_argument("--dias", type=int, default=31)
+    parser.add_argument("--bloque", type=int, default=asistencia_cierre.CIERRE_BLOQUE)
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--desde", type=datetime.date.fromisoformat)
+    parser.add_argument("--hasta", type=datetime.date.fromisoformat)
+    parser.add_argument("--por", choices=("rango", "nivel"), default="rango")
+    args = parser.parse_args()
+
+    periodo = synthetic_period(args.empleados, args.dias)
+    shards = [
+        shard(periodo, lo, min(lo + args.bloque, args.empleados))
+        for lo in range(0, args.empleados, args.bloque)
+    ]
+    celdas = args.empleados * args.dias
+    print(
+        f"período         {args.empleados} empleados x {args.dias} días, "
+        f"{len(periodo.marca_minuto):,} marcas, {len(shards)} bloques de {args.bloque}"
+    )
+    print(f"núcleos         {os.cpu_count()}")
+    start = time.perf_counter()
+    asistencia.calcular(periodo)
+    serial = time.perf_counter() - start
+    print(f"en proceso      {serial:.2f} s ({celdas / serial:,.0f} celdas/s)")
+
+    procesos = sorted({1, *(2**i for i in range(1, 8) if 2**i <= args.procesos), args.procesos})
+    base = None
+    for n in procesos:
+        elapsed = run_pool(shards, n)
+        base = base or elapsed
+        print(
+            f"{n:>2} procesos      {elapsed:.2f} s ({celdas / elapsed:,.0f} celdas/s, "
+            f"x{base / elapsed:.2f})"
+        )
+
+    if args.desde and args.hasta:
+        print(f"cierre real     {args.desde}..{args.hasta} por {args.por}")
+        asyncio.run(run_db(args.desde, args.hasta, args.por))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Run the device prober against local socket stand-ins.
+
+Starts `--abiertos` listening sockets on 127.0.0.1 (answering devices), adds
+`--cerrados` ports with nothing listening (connection refused) and
+`--mudos` targets behind a listener whose backlog is full, so their SYNs
+are dropped and the probe times out like an unplugged terminal. Prints the
+outcome counts, latency percentiles and the scan time.
+
+Usage:
+    python scripts/sondeo_local.py --abiertos 450 --cerrados 30 --mudos 20
+"""
+
+import argparse
+import asyncio
+import socket
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils import sondeo
+
+
+def _closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _saturated_listener() -> tuple[socket.socket, list[socket.socket]]:
+    """A listener that never accepts, with its backlog already full."""
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(0)
+    fillers = []
+    for _ in range(8):
+        filler = socket.socket()
+        filler.setblocking(False)
+        filler.connect_ex(listener.getsockname())
+        fillers.append(filler)
+    time.sleep(0.2)
+    return listener, fillers
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--abiertos", type=int, default=450)
+    parser.add_argument("--cerrados", type=int, default=30)
+    parser.add_argument("--mudos", type=int, default=20)
+    parser.add_argument("--concurrencia", type=int, default=sondeo.SONDEO_CONCURRENCIA)
+    parser.add_argument("--timeout", type=float, default=sondeo.SONDEO_TIMEOUT)
+    args = parser.parse_args()
+
+    async def answer(reader, writer):
+        writer.close()
+
+    servers = [
+        await asyncio.start_server(answer, "127.0.0.1", 0) for _ in range(args.abiertos)
+    ]
+    targets = [
+        (i, "127.0.0.1", server.sockets[0].getsockname()[1])
+        for i, server in enumerate(servers)
+    ]
+    targets += [
+        (len(targets) + i, "127.0.0.1", _closed_port()) for i in range(args.cerrados)
+    ]
+    listener, fillers = _saturated_listener()
+    mudo = listener.getsockname()[1]
+    targets += [(len(targets) + i, "127.0.0.1", mudo) for i in range(args.mudos)]
+
+    start = time.perf_counter()
+    results = [
+        result
+        async for result in sondeo.probe_all(targets, args.concurrencia, args.timeout)
+    ]
+    elapsed = time.perf_counter() - start
+
+    for server in servers:
+        server.close()
+    for sock in (listener, *fillers):
+        sock.close()
+
+    ok = sorted(r.latencia_ms for r in results if r.alcanzable)
+    errores: dict[str, int] = {}
+    for result in results:
+        if not result.alcanzable:
+            errores[result.error] = errores.get(result.error, 0) + 1
+    print(f"targets       {len(targets)} (concurrencia {args.concurrencia}, timeout {args.timeout} s)")
+    print(f"alcanzables   {len(ok)}")
+    for error, total in sorted(errores.items()):
+        print(f"{error:<13} {total}")
+    if ok:
+        print(
+            f"latencia      p50={statistics.median(ok):.1f} ms "
+            f"p99={ok[int(len(ok) * 0.99) - 1]:.1f} ms"
+        )
+    print(f"duración      {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())